@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CarRental.settings')
 
 application = get_asgi_application()
+
+# Pre-compile templates and prime caches before the first request (WARMUP_ON_STARTUP).
+from CarRentalApp.warmup import warm_up_on_startup  # noqa: E402
+
+warm_up_on_startup()
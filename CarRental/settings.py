@@ -45,13 +45,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'CarRentalApp.middleware.ApiCompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'CarRentalApp.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'CarRentalApp.db_router.ReplicaPinningMiddleware',
 ]
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -63,6 +66,49 @@ CSRF_TRUSTED_ORIGINS = [
 
 ROOT_URLCONF = 'CarRental.urls'
 
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'CarRentalApp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'CarRentalApp.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Reverse proxies in front of the app. Client IPs (per-IP rate limits) are read from
+    # X-Forwarded-For only this many hops deep; with 0 the header is ignored and
+    # REMOTE_ADDR is used, so clients can't pick a fresh bucket by sending their own.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Token-bucket rates for CarRentalApp.throttling ('<url_name>.<kind>' overrides '<kind>').
+    'DEFAULT_THROTTLE_RATES': {
+        'endpoint': '600/min',
+        'ip': '60/min',
+        'email': '20/min',
+        'api_customer_login.ip': '20/min',
+        'api_customer_login.email': '5/min',
+        'api_customer_signup.ip': '10/hour',
+    },
+}
+
+# Shared token-bucket store for rate limiting; one SQLite file per host, shared by all workers.
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_DB = BASE_DIR / 'ratelimit.sqlite3'
+
+# /api/batch/: most sub-requests per batch, and threads used to run consecutive reads concurrently.
+API_BATCH_MAX_SIZE = 10
+API_BATCH_MAX_WORKERS = 4
+
+# Run CarRentalApp.warmup when a WSGI/ASGI worker loads the app, so the first
+# requests don't pay for template compilation and cold caches. Set WARMUP_ON_STARTUP=0 to skip.
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', '1') != '0'
+
+# API response compression (CarRentalApp.middleware.ApiCompressionMiddleware).
+# Brotli is used when the client accepts it and the brotli package is installed, gzip otherwise.
+COMPRESSION_PATH_PREFIXES = ('/api/',)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -94,6 +140,123 @@ DATABASES = {
     }
 }
 
+# Read replicas for the mobile read endpoints (CarRentalApp.db_router).
+# Locally, point DATABASE_REPLICA_PATHS at one or more files (comma separated)
+# and keep them fresh with `manage.py snapshot_replicas --interval 5`.
+DATABASE_REPLICAS = []
+for index, replica_path in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_PATHS', '').split(','))):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': replica_path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['CarRentalApp.db_router.PrimaryReplicaRouter']
+
+# After a client writes, its reads stay on the primary for this long (should exceed replica lag).
+REPLICA_PIN_SECONDS = 15
+
+# Request profiling (CarRentalApp.profiling.ProfilingMiddleware), off unless PROFILING_ENABLED=1.
+# cProfile runs on PROFILING_SAMPLE_RATE of requests and on staff requests sending an X-Profile header;
+# views listed by URL name in PROFILING_TRACEMALLOC_VIEWS also get a tracemalloc snapshot diff.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_TRACEMALLOC_VIEWS = [name for name in os.environ.get('PROFILING_TRACEMALLOC_VIEWS', '').split(',') if name]
+PROFILING_OUTPUT_DIR = BASE_DIR / 'profiles'
+
+# Logging. Stage timings of the rental workflow go to 'CarRentalApp.timing' at INFO;
+# set TIMING_LOG_LEVEL=WARNING to silence them, or LOG_LEVEL=DEBUG for request details.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'CarRentalApp': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'CarRentalApp.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Caches. 'availability' holds each car's merged blocked date ranges
+# (CarRentalApp.availability); it is file based so every worker on the host
+# sees the same entries and the same invalidations.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'availability': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'availability',
+    },
+}
+AVAILABILITY_CACHE_ALIAS = 'availability'
+AVAILABILITY_CACHE_TIMEOUT = 3600
+
+# Nearest branch / nearest available car search (CarRentalApp.geo).
+# Grid cell size of the in-memory branch index (0.1 degrees is about 11 km) and the largest ?limit=.
+BRANCH_GRID_CELL_DEGREES = 0.1
+NEAREST_SEARCH_MAX_RESULTS = 50
+
+# Live staff queues (CarRentalApp.live): how often each open pending/active page's
+# event stream checks the change log, how often an idle stream sends a keep-alive,
+# and how long a stream lives before the browser reconnects.
+LIVE_POLL_SECONDS = 2
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_STREAM_MAX_SECONDS = 300
+
+# Payment reconciliation (`manage.py reconcile_payments`, CarRentalApp.reconciliation).
+# A settlement line matches a payment whose date and amount are within these
+# tolerances; the file is joined in partitions of RECONCILE_PARTITION_DAYS days,
+# which bounds how many payments are held in memory at once.
+RECONCILE_DATE_TOLERANCE_DAYS = 2
+RECONCILE_AMOUNT_TOLERANCE = '0.00'
+RECONCILE_PARTITION_DAYS = 7
+
+# Audit trail of staff and customer actions (CarRentalApp.audit). Entries are
+# buffered per worker and written by a background thread in batches of
+# AUDIT_FLUSH_SIZE or every AUDIT_FLUSH_SECONDS. AUDIT_LOG_BACKEND is
+# 'database' (AuditLog table), 'jsonl' (AUDIT_LOG_FILE, rotated at
+# AUDIT_LOG_MAX_BYTES with AUDIT_LOG_BACKUPS old files kept) or None (off).
+AUDIT_LOG_BACKEND = 'database'
+AUDIT_FLUSH_SIZE = 100
+AUDIT_FLUSH_SECONDS = 5
+AUDIT_BUFFER_MAX_ENTRIES = 10000
+AUDIT_LOG_FILE = BASE_DIR / 'audit' / 'audit.jsonl'
+AUDIT_LOG_MAX_BYTES = 50 * 1024 * 1024
+AUDIT_LOG_BACKUPS = 10
+
+# Archival and retention (`manage.py archive_rentals`).
+RENTAL_ARCHIVE_AFTER_DAYS = 365
+RENTAL_ARCHIVE_BATCH_SIZE = 500
+NOTIFICATION_RETENTION_DAYS = 90
+
+# Change feed (/api/changes/, CarRentalApp.changelog). Entries older than the
+# retention are compacted to the newest one per row by `manage.py compact_change_log`.
+CHANGE_FEED_PAGE_SIZE = 500
+CHANGE_FEED_MAX_PAGE_SIZE = 2000
+CHANGE_LOG_RETENTION_DAYS = 30
+CHANGE_LOG_COMPACTION_BATCH_SIZE = 1000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -135,6 +298,53 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+STORAGES = {
+    'default': {
+        # Stores each upload once under its SHA-256 and fingerprints media URLs for immutable caching.
+        'BACKEND': 'CarRentalApp.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Media serving (CarRentalApp.media.serve_media).
+# Set MEDIA_SENDFILE_MODE to 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx)
+# to let the web server send file bodies; nginx needs an internal location at
+# MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT.
+MEDIA_SENDFILE_MODE = os.environ.get('MEDIA_SENDFILE_MODE') or None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 3600
+
+# Content-addressed uploads (CarRentalApp.storage.ContentAddressedStorage) are written
+# here first, outside MEDIA_ROOT but on the same filesystem (they are renamed into
+# place). An image no car references any more is only deleted once no upload has
+# stored or reused it for MEDIA_RELEASE_GRACE_SECONDS; younger ones are left for
+# `manage.py dedupe_media`.
+MEDIA_STAGING_DIR = os.path.join(BASE_DIR, 'media-staging')
+MEDIA_RELEASE_GRACE_SECONDS = 3600
+
+# Car image upload validation (CarRentalApp.images.prepare_car_image).
+CAR_IMAGE_ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'AVIF')
+CAR_IMAGE_MIN_DIMENSIONS = (200, 150)
+CAR_IMAGE_MAX_DIMENSIONS = (6000, 6000)
+CAR_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+
+# Resumable chunked car photo uploads (/cars/uploads/, CarRentalApp.uploads).
+# Partial files live outside MEDIA_ROOT so they are never served; uploads not
+# attached to a car within CHUNKED_UPLOAD_EXPIRY_HOURS are removed by
+# `manage.py prune_uploads`.
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'uploads'
+CHUNKED_UPLOAD_MAX_CHUNK_BYTES = 1024 * 1024
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+# Offline catalog bundle (`manage.py build_catalog_snapshot`, CarRentalApp.catalog).
+# Thumbnails fit in CATALOG_THUMBNAIL_SIZE px squares; the newest CATALOG_SNAPSHOT_KEEP bundles are kept.
+CATALOG_THUMBNAIL_SIZE = 320
+CATALOG_THUMBNAIL_QUALITY = 75
+CATALOG_SNAPSHOT_KEEP = 3
+CATALOG_VERSION_MAX_AGE = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
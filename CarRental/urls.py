@@ -4,12 +4,12 @@
 ... (The existing comments) ...
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
 
 from CarRental import views
 from CarRentalApp import views as app_views
+from CarRentalApp import media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -19,6 +19,10 @@ urlpatterns = [
     
     #  EXISTING API PATHS 
     path('api/cars/', app_views.api_car_list, name='api_car_list'),
+    path('api/cars/<int:car_id>/calendar/', app_views.api_car_calendar, name='api_car_calendar'),
+    path('api/cars/nearest/', app_views.api_nearest_cars, name='api_nearest_cars'),
+    path('api/branches/nearest/', app_views.api_nearest_branches, name='api_nearest_branches'),
+    path('api/catalog/version/', app_views.api_catalog_version, name='api_catalog_version'),
     path('api/customers/signup/', app_views.api_customer_signup, name='api_customer_signup'),
     path('api/customers/login/', app_views.api_customer_login, name='api_customer_login'),
     path('api/customers/update/', app_views.api_customer_update, name='api_customer_update'),
@@ -27,14 +31,17 @@ urlpatterns = [
     path('api/submit-rental-request/', app_views.api_submit_rental_request, name='api_submit_rental_request'),
     path('api/create-rental-transaction/', app_views.api_create_rental_transaction, name='api_create_rental_transaction'),
     path('api/submit-payment/', app_views.api_submit_payment, name='api_submit_payment'),
+    path('api/rentals/history/', app_views.api_rental_history, name='api_rental_history'),
     path('api/notifications/', app_views.api_get_notifications, name='api_get_notifications'),
     path('api/notifications/mark-read/', app_views.api_mark_notification_read, name='api_mark_notification_read'),
+    path('api/notifications/mark-all-read/', app_views.api_mark_all_notifications_read, name='api_mark_all_notifications_read'),
     path('api/notifications/delete/', app_views.api_delete_notification, name='api_delete_notification'),
+    path('api/batch/', app_views.api_batch, name='api_batch'),
+    path('api/changes/', app_views.api_changes, name='api_changes'),
     
     #  INCLUDE APP URLS (Staff views and CRUD) 
     path('cars/', include('CarRentalApp.urls')),
     
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    #  UPLOADED MEDIA (car images), served with caching and range support in every environment 
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), media.serve_media, name='media'),
+]
\ No newline at end of file
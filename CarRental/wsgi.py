@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CarRental.settings')
 
 application = get_wsgi_application()
+
+# Pre-compile templates and prime caches before the first request (WARMUP_ON_STARTUP).
+from CarRentalApp.warmup import warm_up_on_startup  # noqa: E402
+
+warm_up_on_startup()
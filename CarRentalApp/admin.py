@@ -1,11 +1,349 @@
-from django.contrib import admin
+from datetime import date, datetime, time, timedelta
 
-from CarRentalApp.models import Car, Customer, Payment, RentalTransaction, RentalRequest, Notification
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import models, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-# Register your models here.
-admin.site.register(Car)
-admin.site.register(Customer)
-admin.site.register(RentalTransaction)
-admin.site.register(Payment)
-admin.site.register(RentalRequest)
-admin.site.register(Notification)
\ No newline at end of file
+from CarRentalApp import audit
+from CarRentalApp.models import (
+    AuditLog, Branch, Car, Customer, Notification, Payment, RentalRequest, RentalTransaction, TableVersion,
+)
+from CarRentalApp.statuses import InvalidTransition, transition
+
+# --------------------------------------------------------------------------
+# ADMIN FOR LARGE TABLES
+# Every change list selects the related rows its columns (and __str__) need,
+# searches only unique/indexed columns with exact lookups, and sorts only by
+# indexed columns. Foreign keys to big tables use raw-id inputs instead of a
+# <select> of every row, and the paginator never counts a whole large table.
+# --------------------------------------------------------------------------
+
+
+def _periods(first, last, kind, limit):
+    """[(start, next start)] of the years, months or days from first to last (dates); None past limit."""
+    if kind == 'year':
+        start, step = date(first.year, 1, 1), lambda d: date(d.year + 1, 1, 1)
+    elif kind == 'month':
+        start, step = date(first.year, first.month, 1), lambda d: date(d.year + d.month // 12, d.month % 12 + 1, 1)
+    elif kind == 'day':
+        start, step = first, lambda d: d + timedelta(days=1)
+    else:
+        return None
+    periods = []
+    while start <= last:
+        periods.append((start, step(start)))
+        if len(periods) > limit:
+            return None
+        start = periods[-1][1]
+    return periods
+
+
+class LargeTableQuerySet(models.QuerySet):
+    """
+    Answers the admin's date hierarchy and min/max lookups from indexes:
+
+    - dates()/datetimes() probe each candidate year, month or day with an
+      indexed range EXISTS instead of a DISTINCT over every row;
+    - aggregate() of several MIN()/MAX() runs them one by one, because SQLite
+      only answers a lone MIN() or MAX() from an index.
+    """
+    MAX_PROBES = 400
+
+    def aggregate(self, *args, **kwargs):
+        if not args and len(kwargs) > 1 and all(isinstance(value, (Min, Max)) for value in kwargs.values()):
+            result = {}
+            for name, aggregate in kwargs.items():
+                result.update(super().aggregate(**{name: aggregate}))
+            return result
+        return super().aggregate(*args, **kwargs)
+
+    def _probe_periods(self, field_name, kind, order, local_date, bound):
+        """
+        Periods holding at least one row, or None if there are too many to probe.
+        local_date turns a stored value into a date; bound turns a date back into a lookup value.
+        """
+        present = self.filter(**{f'{field_name}__isnull': False}).order_by()
+        first = present.aggregate(value=Min(field_name))['value']
+        if first is None:
+            return []
+        last = present.aggregate(value=Max(field_name))['value']
+        periods = _periods(local_date(first), local_date(last), kind, self.MAX_PROBES)
+        if periods is None:
+            return None
+        found = []
+        for start, end in periods:
+            probe = {f'{field_name}__gte': bound(start), f'{field_name}__lt': bound(end)}
+            if present.query.distinct:
+                rows = present.filter(**probe)
+            else:
+                # Period range first: given two ranges on one column, SQLite seeks with the first
+                # one, and the list's own (wider) date filter would make each probe a scan.
+                rows = self.model._base_manager.filter(**probe) & present
+            if rows.exists():
+                found.append(bound(start))
+        return found[::-1] if order == 'DESC' else found
+
+    def dates(self, field_name, kind, order='ASC'):
+        periods = self._probe_periods(field_name, kind, order, lambda value: value, lambda day: day)
+        return super().dates(field_name, kind, order) if periods is None else periods
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tz = tzinfo or timezone.get_current_timezone()
+        periods = self._probe_periods(
+            field_name, kind, order,
+            lambda value: timezone.localtime(value, tz).date(),
+            lambda day: timezone.make_aware(datetime.combine(day, time.min), tz),
+        )
+        return super().datetimes(field_name, kind, order, tzinfo) if periods is None else periods
+
+
+class CountAtLeast(int):
+    """A row count that stopped at a limit; shown as "10000+" in the change list."""
+
+    def __str__(self):
+        return f"{int(self)}+"
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids COUNT(*) over large tables. An unfiltered list is
+    sized from its primary-key range (two index lookups; an upper bound when
+    rows were deleted, so the last pages may come out short). A filtered or
+    searched list is counted exactly up to EXACT_COUNT_LIMIT rows, or as far
+    as the requested page and the one after it if that is further. Past that
+    the total is a CountAtLeast and one more page is linked, so every page
+    stays reachable by paging on.
+    """
+    EXACT_COUNT_LIMIT = 10000
+
+    def __init__(self, *args, requested_page=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_page = requested_page
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        if not queryset.query.where:
+            # Two queries: SQLite only reads a lone MIN() or MAX() from the index.
+            high = queryset.aggregate(high=Max('pk'))['high']
+            if high is None:
+                return 0
+            span = high - queryset.aggregate(low=Min('pk'))['low'] + 1
+            if span > self.EXACT_COUNT_LIMIT:
+                return span
+        limit = max(self.EXACT_COUNT_LIMIT, (self.requested_page + 1) * self.per_page)
+        count = queryset.values('pk')[:limit + 1].count()
+        return CountAtLeast(limit) if count > limit else count
+
+    @cached_property
+    def num_pages(self):
+        num_pages = super().num_pages
+        return num_pages + 1 if isinstance(self.count, CountAtLeast) else num_pages
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Change lists with a date_hierarchy should also be ordered by that (indexed)
+    column: ordered by id, a drill-down sorts every row of the chosen period.
+    """
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) shown as "N results (M total)".
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            requested_page = int(request.GET.get(PAGE_VAR, 1))
+        except ValueError:
+            requested_page = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, requested_page=requested_page)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return LargeTableQuerySet(model=queryset.model, query=queryset.query, using=queryset._db, hints=queryset._hints)
+
+
+def _apply_transition(modeladmin, request, queryset, new_status, after_save=None):
+    """
+    Moves each selected object to new_status through the state machine and saves it
+    (so TableVersion, the change feed and the calendar see the change). Objects that
+    can't make the move are skipped and reported.
+    """
+    changed, skipped = 0, []
+    for obj in queryset:
+        with transaction.atomic():
+            old_status = obj.status
+            try:
+                transition(obj, new_status)
+            except InvalidTransition as e:
+                skipped.append(e.messages[0])
+                continue
+            obj.save()
+            audit.record('transition', obj, request.user, {'status': [old_status, obj.status]})
+            if after_save:
+                after_save(obj)
+        changed += 1
+    if changed:
+        modeladmin.message_user(request, f"Updated {changed} {modeladmin.model._meta.verbose_name_plural}.")
+    for message in skipped[:10]:
+        modeladmin.message_user(request, message, level=messages.WARNING)
+    if len(skipped) > 10:
+        modeladmin.message_user(request, f"... and {len(skipped) - 10} more skipped.", level=messages.WARNING)
+
+
+@admin.register(Branch)
+class BranchAdmin(admin.ModelAdmin):
+    list_display = ('name', 'address', 'latitude', 'longitude', 'is_active')
+    list_filter = ('is_active',)
+    # Small table; also backs the car form's branch autocomplete.
+    search_fields = ('name', 'address')
+
+
+@admin.register(Car)
+class CarAdmin(LargeTableAdmin):
+    list_display = ('plate_number', 'brand', 'model', 'year', 'type', 'status', 'branch', 'rental_rate_per_day')
+    list_select_related = ('branch',)
+    list_filter = ('status', 'type', 'branch')
+    search_fields = ('plate_number__exact',)
+    search_help_text = 'Exact plate number.'
+    sortable_by = ('plate_number', 'status')
+    autocomplete_fields = ('branch',)
+    actions = ('mark_available', 'send_to_maintenance')
+
+    @admin.action(description='Mark selected cars as Available')
+    def mark_available(self, request, queryset):
+        _apply_transition(self, request, queryset, Car.Status.AVAILABLE)
+
+    @admin.action(description='Send selected cars to Maintenance')
+    def send_to_maintenance(self, request, queryset):
+        _apply_transition(self, request, queryset, Car.Status.MAINTENANCE)
+
+
+@admin.register(Customer)
+class CustomerAdmin(LargeTableAdmin):
+    list_display = ('email', 'first_name', 'last_name', 'phone', 'license_number')
+    search_fields = ('email__exact', 'license_number__exact')
+    search_help_text = 'Exact email address or licence number.'
+    sortable_by = ('email',)
+
+
+@admin.register(RentalTransaction)
+class RentalTransactionAdmin(LargeTableAdmin):
+    list_display = ('id', 'car', 'customer', 'start_date', 'end_date', 'total_cost', 'status')
+    list_select_related = ('car', 'customer')
+    list_filter = ('status',)
+    search_fields = ('car__plate_number__exact', 'customer__email__exact')
+    search_help_text = 'Exact plate number or customer email.'
+    date_hierarchy = 'end_date'
+    ordering = ('-end_date',)
+    sortable_by = ('id', 'end_date')
+    raw_id_fields = ('car', 'customer')
+    actions = ('complete_rentals',)
+
+    @admin.action(description='Complete selected rentals and free their cars')
+    def complete_rentals(self, request, queryset):
+        # Same steps as the staff "complete" button: the car goes back to Available.
+        def release_car(rental):
+            transition(rental.car, Car.Status.AVAILABLE)
+            rental.car.save()
+
+        _apply_transition(
+            self, request, queryset.select_related('car'), RentalTransaction.Status.COMPLETED, after_save=release_car,
+        )
+
+
+@admin.register(Payment)
+class PaymentAdmin(LargeTableAdmin):
+    list_display = ('id', 'transaction', 'amount_paid', 'payment_date', 'method', 'reference')
+    list_select_related = ('transaction',)
+    list_filter = ('method',)
+    search_fields = ('transaction__id__exact', 'reference__exact')
+    search_help_text = 'Transaction id or exact processor reference.'
+    date_hierarchy = 'payment_date'
+    ordering = ('-payment_date',)
+    sortable_by = ('id', 'payment_date')
+    raw_id_fields = ('transaction',)
+
+
+@admin.register(RentalRequest)
+class RentalRequestAdmin(LargeTableAdmin):
+    list_display = ('id', 'car', 'customer', 'request_date', 'pickup_date', 'return_date', 'status')
+    list_select_related = ('car', 'customer')
+    list_filter = ('status',)
+    search_fields = ('car__plate_number__exact', 'customer__email__exact')
+    search_help_text = 'Exact plate number or customer email.'
+    date_hierarchy = 'pickup_date'
+    ordering = ('-pickup_date',)
+    sortable_by = ('id', 'pickup_date')
+    raw_id_fields = ('car', 'customer')
+    actions = ('reject_requests',)
+
+    @admin.action(description='Reject selected pending requests')
+    def reject_requests(self, request, queryset):
+        # Customers are notified exactly as when staff reject from the pending list.
+        def notify(rental_request):
+            Notification.objects.create(
+                customer=rental_request.customer,
+                rental_request=rental_request,
+                title='Rental Request Rejected',
+                message=f'Your rental request for {rental_request.car.brand} {rental_request.car.model} has been rejected.'
+            )
+
+        _apply_transition(
+            self, request, queryset.select_related('car', 'customer'), RentalRequest.Status.REJECTED, after_save=notify,
+        )
+
+
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdmin):
+    list_display = ('id', 'customer', 'title', 'is_read', 'created_at')
+    list_select_related = ('customer',)
+    list_filter = ('is_read',)
+    search_fields = ('customer__email__exact',)
+    search_help_text = 'Exact customer email.'
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    sortable_by = ('id', 'created_at')
+    raw_id_fields = ('customer', 'rental_request', 'broadcast')
+    actions = ('mark_read', 'mark_unread')
+
+    def _set_read(self, request, queryset, is_read):
+        # update() skips auto_now and the post_save signal, so both are done here.
+        with transaction.atomic():
+            updated = queryset.update(is_read=is_read, updated_at=timezone.now())
+            TableVersion.bump('notification')
+        self.message_user(request, f"Updated {updated} notifications.")
+
+    @admin.action(description='Mark selected notifications as read')
+    def mark_read(self, request, queryset):
+        self._set_read(request, queryset, True)
+
+    @admin.action(description='Mark selected notifications as unread')
+    def mark_unread(self, request, queryset):
+        self._set_read(request, queryset, False)
+
+
+@admin.register(AuditLog)
+class AuditLogAdmin(LargeTableAdmin):
+    """Read-only: entries are only written by CarRentalApp.audit."""
+    list_display = ('created_at', 'actor_type', 'actor', 'action', 'object_type', 'object_id')
+    search_fields = ('object_id__exact', 'actor__exact')
+    search_help_text = 'Object id or exact actor (username or email).'
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    sortable_by = ('created_at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
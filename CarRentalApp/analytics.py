@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+import numpy as np
+
+from .models import ArchivedRentalTransaction, Car, RentalTransaction
+
+# --------------------------------------------------------------------------
+# FLEET OCCUPANCY ANALYTICS
+# Rental intervals are loaded once and painted onto a cars x days boolean
+# matrix with a difference array: +1 at each interval start, -1 at its end,
+# then a cumulative sum along the day axis. Painting is O(rentals + cars x
+# days) no matter how long the intervals are, and every aggregate below is a
+# NumPy reduction over that matrix.
+#
+# A rental occupies [start_date, end_date): the return day is free again,
+# matching how rental cost is computed (end - start days). No maintenance
+# history is recorded, so a car whose current status is Maintenance counts
+# every non-rented day in the window as a maintenance day.
+# --------------------------------------------------------------------------
+
+MAX_WINDOW_DAYS = 731
+
+
+def _to_day_offsets(dates, origin):
+    # date.toordinal() is far cheaper than NumPy's per-object datetime64 parsing.
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates)) - origin.toordinal()
+
+
+def load_intervals(start, end):
+    """Returns (car_ids, start_dates, end_dates) of every non-cancelled rental overlapping [start, end]."""
+    overlapping = {'start_date__lte': end, 'end_date__gt': start}
+    rows = list(
+        RentalTransaction.objects
+        .filter(**overlapping)
+        .exclude(status=RentalTransaction.Status.CANCELLED)
+        .values_list('car_id', 'start_date', 'end_date')
+    )
+    rows += list(
+        ArchivedRentalTransaction.objects
+        .filter(**overlapping)
+        .exclude(status='Cancelled')
+        .values_list('car_id', 'start_date', 'end_date')
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), [], []
+    car_ids, starts, ends = zip(*rows)
+    return np.array(car_ids, dtype=np.int64), starts, ends
+
+
+def occupancy_matrix(car_ids, interval_car_ids, starts, ends, origin, days):
+    """
+    Paints rental intervals onto a (len(car_ids), days) boolean matrix.
+    car_ids must be sorted; intervals for cars not in car_ids are ignored.
+    """
+    rented = np.zeros((len(car_ids), days), dtype=bool)
+    if len(interval_car_ids) == 0 or len(car_ids) == 0:
+        return rented
+
+    rows = np.searchsorted(car_ids, interval_car_ids)
+    known = (rows < len(car_ids)) & (car_ids[np.minimum(rows, len(car_ids) - 1)] == interval_car_ids)
+    first = np.clip(_to_day_offsets(starts, origin), 0, days)
+    last = np.clip(_to_day_offsets(ends, origin), 0, days)
+    keep = known & (first < last)
+    rows, first, last = rows[keep], first[keep], last[keep]
+
+    # Difference array with one spare column for intervals that run past the
+    # window, accumulated on flat indices (bincount is much faster than add.at).
+    width = days + 1
+    size = len(car_ids) * width
+    diff = np.bincount(rows * width + first, minlength=size) - np.bincount(rows * width + last, minlength=size)
+    return np.cumsum(diff.reshape(len(car_ids), width)[:, :days], axis=1) > 0
+
+
+def fleet_occupancy(start, end):
+    """
+    Utilization over the inclusive window [start, end]: per car, per car type and per day.
+    Returns a JSON-ready dict.
+    """
+    days = (end - start).days + 1
+    if days <= 0:
+        raise ValueError("'to' must be on or after 'from'.")
+    if days > MAX_WINDOW_DAYS:
+        raise ValueError(f"The window can be at most {MAX_WINDOW_DAYS} days.")
+
+    cars = list(Car.objects.order_by('id').values_list('id', 'brand', 'model', 'plate_number', 'type', 'status'))
+    car_ids = np.array([car[0] for car in cars], dtype=np.int64)
+    interval_car_ids, starts, ends = load_intervals(start, end)
+    rented = occupancy_matrix(car_ids, interval_car_ids, starts, ends, start, days)
+
+    in_maintenance = np.array([car[5] == Car.Status.MAINTENANCE for car in cars], dtype=bool)
+    maintenance = ~rented & in_maintenance[:, None]
+
+    rented_per_car = rented.sum(axis=1)
+    maintenance_per_car = maintenance.sum(axis=1)
+    idle_per_car = days - rented_per_car - maintenance_per_car
+
+    # Per type: group the per-car counts with bincount over the type index.
+    type_names, type_index = np.unique(np.array([car[4] for car in cars], dtype=object), return_inverse=True)
+    type_index = type_index.reshape(-1)
+    cars_per_type = np.bincount(type_index, minlength=len(type_names))
+    rented_per_type = np.bincount(type_index, weights=rented_per_car, minlength=len(type_names))
+    maintenance_per_type = np.bincount(type_index, weights=maintenance_per_car, minlength=len(type_names))
+
+    rented_per_day = rented.sum(axis=0)
+    maintenance_per_day = maintenance.sum(axis=0)
+    fleet_size = len(cars)
+
+    def share(value, total):
+        return round(float(value) / total, 4) if total else 0.0
+
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'days': days,
+        'fleet_size': fleet_size,
+        'utilization': share(rented_per_car.sum(), fleet_size * days),
+        'cars': [
+            {
+                'car_id': car[0],
+                'car': f"{car[1]} {car[2]} ({car[3]})",
+                'type': car[4],
+                'rented_days': int(rented_per_car[i]),
+                'maintenance_days': int(maintenance_per_car[i]),
+                'idle_days': int(idle_per_car[i]),
+                'utilization': share(rented_per_car[i], days),
+            }
+            for i, car in enumerate(cars)
+        ],
+        'types': [
+            {
+                'type': type_names[i],
+                'cars': int(cars_per_type[i]),
+                'rented_share': share(rented_per_type[i], cars_per_type[i] * days),
+                'maintenance_share': share(maintenance_per_type[i], cars_per_type[i] * days),
+                'idle_share': share(
+                    cars_per_type[i] * days - rented_per_type[i] - maintenance_per_type[i], cars_per_type[i] * days
+                ),
+            }
+            for i in range(len(type_names))
+        ],
+        'daily': [
+            {
+                'date': (start + timedelta(days=day)).isoformat(),
+                'rented': int(rented_per_day[day]),
+                'maintenance': int(maintenance_per_day[day]),
+                'idle': int(fleet_size - rented_per_day[day] - maintenance_per_day[day]),
+                'utilization': share(rented_per_day[day], fleet_size),
+            }
+            for day in range(days)
+        ],
+    }
@@ -0,0 +1,267 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    ArchivedPayment, ArchivedRentalRequest, ArchivedRentalTransaction, Customer,
+    Notification, Payment, RentalRequest, RentalTransaction, TableVersion,
+)
+
+# --------------------------------------------------------------------------
+# RENTAL ARCHIVAL AND NOTIFICATION RETENTION
+# Each batch is moved in its own transaction (copy into the archive tables,
+# then delete from the live ones), so an interrupted run loses nothing and
+# simply continues where it stopped when started again.
+# --------------------------------------------------------------------------
+
+FINISHED_TRANSACTION_STATUSES = [RentalTransaction.Status.COMPLETED, RentalTransaction.Status.CANCELLED]
+FINISHED_REQUEST_STATUSES = [
+    RentalRequest.Status.APPROVED, RentalRequest.Status.REJECTED,
+    RentalRequest.Status.CANCELLED, RentalRequest.Status.COMPLETED,
+]
+
+# The archive tables keep statuses as their legacy strings ('Completed', 'REJECTED').
+_transaction_legacy = {member.value: member.legacy for member in RentalTransaction.Status}
+_request_legacy = {member.value: member.legacy for member in RentalRequest.Status}
+
+
+def archive_transactions(cutoff, batch_size):
+    """
+    Archives finished transactions that ended before cutoff, with their payments.
+    Yields (transactions, payments) archived per batch.
+    """
+    while True:
+        with transaction.atomic():
+            batch = list(
+                RentalTransaction.objects
+                .filter(status__in=FINISHED_TRANSACTION_STATUSES, end_date__lt=cutoff)
+                .select_related('car')
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                return
+            ids = [rental.id for rental in batch]
+            payments = list(Payment.objects.filter(transaction_id__in=ids))
+
+            ArchivedRentalTransaction.objects.bulk_create([
+                ArchivedRentalTransaction(
+                    id=rental.id,
+                    car_id=rental.car_id,
+                    car_description=str(rental.car),
+                    customer_id=rental.customer_id,
+                    start_date=rental.start_date,
+                    end_date=rental.end_date,
+                    total_cost=rental.total_cost,
+                    status=_transaction_legacy[rental.status],
+                ) for rental in batch
+            ], ignore_conflicts=True)
+            ArchivedPayment.objects.bulk_create([
+                ArchivedPayment(
+                    id=payment.id,
+                    transaction_id=payment.transaction_id,
+                    amount_paid=payment.amount_paid,
+                    payment_date=payment.payment_date,
+                    method=payment.method,
+                    reference=payment.reference,
+                ) for payment in payments
+            ], ignore_conflicts=True)
+
+            Payment.objects.filter(transaction_id__in=ids).delete()
+            RentalTransaction.objects.filter(id__in=ids).delete()
+        yield len(batch), len(payments)
+
+
+def archive_requests(cutoff, batch_size):
+    """
+    Archives decided requests whose return date is before cutoff.
+    Requests whose rental is still ongoing are kept. Notifications about an
+    archived request stay in the customer's feed, detached from it; only
+    prune_notifications() deletes them, once read.
+    Yields the number of requests archived per batch.
+    """
+    still_ongoing = RentalTransaction.objects.filter(
+        car_id=OuterRef('car_id'),
+        customer_id=OuterRef('customer_id'),
+        start_date=OuterRef('pickup_date'),
+        status=RentalTransaction.Status.ONGOING,
+    )
+    while True:
+        with transaction.atomic():
+            batch = list(
+                RentalRequest.objects
+                .filter(status__in=FINISHED_REQUEST_STATUSES, return_date__lt=cutoff)
+                .exclude(Exists(still_ongoing))
+                .select_related('car')
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                return
+            ArchivedRentalRequest.objects.bulk_create([
+                ArchivedRentalRequest(
+                    id=rental_request.id,
+                    car_id=rental_request.car_id,
+                    car_description=str(rental_request.car),
+                    customer_id=rental_request.customer_id,
+                    request_date=rental_request.request_date,
+                    pickup_date=rental_request.pickup_date,
+                    return_date=rental_request.return_date,
+                    status=_request_legacy[rental_request.status],
+                ) for rental_request in batch
+            ], ignore_conflicts=True)
+            ids = [rental_request.id for rental_request in batch]
+            # The foreign key cascades, so detach them first. update() skips auto_now and post_save.
+            if Notification.objects.filter(rental_request_id__in=ids).update(rental_request=None, updated_at=timezone.now()):
+                TableVersion.bump('notification')
+            RentalRequest.objects.filter(id__in=ids).delete()
+        yield len(batch)
+
+
+def prune_notifications(cutoff, batch_size):
+    """Deletes read notifications created before cutoff. Yields the number deleted per batch."""
+    while True:
+        with transaction.atomic():
+            ids = list(
+                Notification.objects
+                .filter(is_read=True, created_at__lt=cutoff)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return
+            Notification.objects.filter(id__in=ids).delete()
+        yield len(ids)
+
+
+# --------------------------------------------------------------------------
+# HISTORY AND EXPORT (live + archived rows)
+# --------------------------------------------------------------------------
+
+HISTORY_FIELDS = (
+    'id', 'car_id', 'car', 'start_date', 'end_date', 'total_cost', 'status', 'archived', 'payments',
+)
+
+# History fields read straight from a model column of the same name.
+_HISTORY_COLUMNS = ('car_id', 'start_date', 'end_date', 'total_cost', 'status')
+
+
+def _history_item(rental, columns):
+    item = {name: getattr(rental, name) for name in columns}
+    if 'total_cost' in item:
+        item['total_cost'] = str(item['total_cost'])
+    if 'status' in item and not isinstance(rental, ArchivedRentalTransaction):
+        item['status'] = _transaction_legacy[item['status']]
+    return item
+
+
+def rental_history(customer, fields=HISTORY_FIELDS):
+    """
+    Returns all of a customer's rentals, live and archived, newest first, each with its payments.
+    `fields` is a subset of HISTORY_FIELDS; columns, joins and payment queries that are
+    not needed for it are skipped.
+    """
+    with_car = 'car' in fields
+    with_payments = 'payments' in fields
+    # id and start_date are always read because the merged list is sorted on them.
+    columns = ['id', 'start_date'] + [name for name in _HISTORY_COLUMNS if name in fields and name != 'start_date']
+
+    history = []
+    live = RentalTransaction.objects.filter(customer=customer).only(*columns)
+    if with_car:
+        live = live.select_related('car').only(*columns, 'car')
+    if with_payments:
+        live = live.prefetch_related('payments')
+    for rental in live:
+        item = _history_item(rental, columns)
+        item['archived'] = False
+        if with_car:
+            item['car'] = str(rental.car)
+        if with_payments:
+            item['payments'] = [_payment_data(payment) for payment in rental.payments.all()]
+        history.append(item)
+
+    archived_columns = columns + ['car_description'] if with_car else columns
+    archived = list(ArchivedRentalTransaction.objects.filter(customer_id=customer.id).only(*archived_columns))
+    archived_payments = defaultdict(list)
+    if with_payments and archived:
+        for payment in ArchivedPayment.objects.filter(transaction_id__in=[rental.id for rental in archived]):
+            archived_payments[payment.transaction_id].append(_payment_data(payment))
+    for rental in archived:
+        item = _history_item(rental, columns)
+        item['archived'] = True
+        if with_car:
+            item['car'] = rental.car_description
+        if with_payments:
+            item['payments'] = archived_payments[rental.id]
+        history.append(item)
+
+    history.sort(key=lambda item: (item['start_date'], item['id']), reverse=True)
+    for item in history:
+        item['start_date'] = item['start_date'].isoformat()
+        if 'end_date' in item:
+            item['end_date'] = item['end_date'].isoformat()
+    return [{name: item[name] for name in fields} for item in history]
+
+
+def _payment_data(payment):
+    return {
+        'id': payment.id,
+        'amount_paid': str(payment.amount_paid),
+        'payment_date': payment.payment_date.isoformat(),
+        'method': payment.method,
+    }
+
+
+def _money(value):
+    # SQLite returns aggregated decimals as plain numbers; format them like DecimalField values.
+    return f"{Decimal(str(value)):.2f}"
+
+
+EXPORT_HEADER = [
+    'transaction_id', 'archived', 'car_id', 'car', 'customer_id', 'customer_email',
+    'start_date', 'end_date', 'total_cost', 'status', 'amount_paid',
+]
+
+
+def export_rows(chunk_size=2000):
+    """Yields one CSV row per rental transaction (live, then archived), streamed from the database."""
+    zero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    live = (
+        RentalTransaction.objects
+        .order_by('id')
+        .annotate(paid=Coalesce(Sum('payments__amount_paid'), zero))
+        .values_list(
+            'id', 'car_id', 'car__brand', 'car__model', 'car__plate_number', 'customer_id',
+            'customer__email', 'start_date', 'end_date', 'total_cost', 'status', 'paid',
+        )
+    )
+    for (rental_id, car_id, brand, model, plate, customer_id, email,
+         start, end, total_cost, status, paid) in live.iterator(chunk_size=chunk_size):
+        yield [rental_id, 'no', car_id, f"{brand} {model} ({plate})", customer_id, email,
+               start, end, total_cost, _transaction_legacy[status], _money(paid)]
+
+    archived_paid = (
+        ArchivedPayment.objects
+        .filter(transaction_id=OuterRef('id'))
+        .values('transaction_id')
+        .annotate(total=Sum('amount_paid'))
+        .values('total')
+    )
+    customer_email = Customer.objects.filter(id=OuterRef('customer_id')).values('email')[:1]
+    archived = (
+        ArchivedRentalTransaction.objects
+        .order_by('id')
+        .annotate(paid=Coalesce(Subquery(archived_paid), zero), customer_email=Subquery(customer_email))
+        .values_list(
+            'id', 'car_id', 'car_description', 'customer_id', 'customer_email',
+            'start_date', 'end_date', 'total_cost', 'status', 'paid',
+        )
+    )
+    for (rental_id, car_id, description, customer_id, email,
+         start, end, total_cost, status, paid) in archived.iterator(chunk_size=chunk_size):
+        yield [rental_id, 'yes', car_id, description, customer_id, email,
+               start, end, total_cost, status, _money(paid)]
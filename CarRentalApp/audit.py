@@ -0,0 +1,272 @@
+import atexit
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.exceptions import ValidationError
+from django.core.files import locks
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog, Customer
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------
+# AUDIT TRAIL
+# Staff and customer actions (approve, reject, complete, car edits and
+# deletes, profile updates, ...) are recorded with audit.record(). A record
+# never touches the database in the request: it is queued once the action's
+# transaction commits (a rolled-back action leaves no trace) into a buffer
+# owned by this worker process. A background thread writes the buffer in one
+# batch when it reaches AUDIT_FLUSH_SIZE entries or every AUDIT_FLUSH_SECONDS,
+# and once more when the process exits.
+#
+# AUDIT_LOG_BACKEND picks where batches go: 'database' (one bulk INSERT into
+# AuditLog) or 'jsonl' (appended to AUDIT_LOG_FILE, rotated at
+# AUDIT_LOG_MAX_BYTES keeping AUDIT_LOG_BACKUPS old files); None disables
+# auditing. trail() answers "what happened to this object" from either.
+# --------------------------------------------------------------------------
+
+# Never written to the trail (customer passwords are stored as entered), only flagged as changed.
+REDACTED_FIELDS = {'password'}
+# Bookkeeping columns that change on every save.
+IGNORED_FIELDS = {'updated_at'}
+REDACTED = '***'
+
+ENTRY_FIELDS = ('actor_type', 'actor_id', 'actor', 'action', 'object_type', 'object_id', 'changes', 'created_at')
+
+
+def snapshot(instance):
+    """The row's column values before an edit, to diff() against afterwards. Not redacted: don't record it."""
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in IGNORED_FIELDS:
+            continue
+        value = field.value_from_object(instance)
+        if isinstance(value, FieldFile):
+            value = value.name or None
+        else:
+            # Views assign form strings ('2022') that only become 2022 in the database.
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                pass
+        values[field.attname] = value
+    return values
+
+
+def diff(before, after):
+    """{field: [old, new]} for every column that differs between two snapshots."""
+    return {
+        name: [REDACTED, REDACTED] if name in REDACTED_FIELDS else [before.get(name), value]
+        for name, value in after.items()
+        if before.get(name) != value
+    }
+
+
+def row(instance):
+    """The row's values, redacted, as the changes of a create or delete."""
+    return {name: REDACTED if name in REDACTED_FIELDS else value for name, value in snapshot(instance).items()}
+
+
+def _actor(actor):
+    if isinstance(actor, AbstractBaseUser):
+        return 'staff', actor.pk, actor.get_username()
+    if isinstance(actor, Customer):
+        return 'customer', actor.pk, actor.email
+    return 'system', None, ''
+
+
+def record(action, instance, actor=None, changes=None, object_id=None):
+    """
+    Queues an audit entry for instance (a staff User, a Customer or None as actor).
+    Pass object_id for an instance that has just been deleted. Costs no query.
+    """
+    if not getattr(settings, 'AUDIT_LOG_BACKEND', 'database'):
+        return
+    actor_type, actor_id, actor_label = _actor(actor)
+    entry = {
+        'actor_type': actor_type,
+        'actor_id': actor_id,
+        'actor': actor_label,
+        'action': action,
+        'object_type': instance._meta.model_name,
+        'object_id': object_id if object_id is not None else instance.pk,
+        'changes': changes,
+        'created_at': timezone.now(),
+    }
+    transaction.on_commit(lambda: buffer.add(entry))
+
+
+# --------------------------------------------------------------------------
+# BACKENDS
+# --------------------------------------------------------------------------
+
+class DatabaseBackend:
+
+    def write(self, entries):
+        AuditLog.objects.bulk_create([AuditLog(**entry) for entry in entries], batch_size=500)
+
+    def trail(self, object_type, object_id, limit):
+        return list(
+            AuditLog.objects.filter(object_type=object_type, object_id=object_id)
+            .order_by('-created_at', '-id')
+            .values(*ENTRY_FIELDS)[:limit]
+        )
+
+
+class JsonlBackend:
+    """
+    Append-only JSON lines. Writers from every worker take an exclusive lock on a
+    side file, so batches never interleave and only one process rotates.
+    """
+
+    def __init__(self):
+        self.path = Path(getattr(settings, 'AUDIT_LOG_FILE', settings.BASE_DIR / 'audit' / 'audit.jsonl'))
+        self.max_bytes = getattr(settings, 'AUDIT_LOG_MAX_BYTES', 50 * 1024 * 1024)
+        self.backups = getattr(settings, 'AUDIT_LOG_BACKUPS', 10)
+
+    def _backup(self, number):
+        return self.path.with_name(f'{self.path.name}.{number}')
+
+    def _rotate(self):
+        self._backup(self.backups).unlink(missing_ok=True)
+        for number in range(self.backups - 1, 0, -1):
+            if self._backup(number).exists():
+                self._backup(number).replace(self._backup(number + 1))
+        if self.backups:
+            self.path.replace(self._backup(1))
+        else:
+            self.path.unlink()
+
+    def write(self, entries):
+        data = ''.join(json.dumps(entry, cls=DjangoJSONEncoder) + '\n' for entry in entries).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + '.lock'), 'a') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                size = self.path.stat().st_size if self.path.exists() else 0
+                if size and size + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'ab') as log:
+                    log.write(data)
+            finally:
+                locks.unlock(lock)
+
+    def trail(self, object_type, object_id, limit):
+        # No index here: every retained file is scanned. Use the database backend for frequent lookups.
+        entries = []
+        for path in [self.path] + [self._backup(number) for number in range(1, self.backups + 1)]:
+            if not path.exists():
+                continue
+            with open(path, encoding='utf-8') as log:
+                for line in log:
+                    entry = json.loads(line)
+                    if entry['object_type'] == object_type and entry['object_id'] == object_id:
+                        entry['created_at'] = parse_datetime(entry['created_at'])
+                        entries.append(entry)
+        entries.sort(key=lambda entry: entry['created_at'], reverse=True)
+        return entries[:limit]
+
+
+BACKENDS = {'database': DatabaseBackend, 'jsonl': JsonlBackend}
+
+
+def get_backend():
+    name = getattr(settings, 'AUDIT_LOG_BACKEND', 'database')
+    return BACKENDS[name]() if name else None
+
+
+# --------------------------------------------------------------------------
+# PER-WORKER BUFFER
+# --------------------------------------------------------------------------
+
+class AuditBuffer:
+    """Entries waiting to be written by this process, and the thread that writes them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries = []
+        self._pid = None
+        self._wake = threading.Event()
+
+    def add(self, entry):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            self._entries.append(entry)
+            dropped = len(self._entries) - getattr(settings, 'AUDIT_BUFFER_MAX_ENTRIES', 10000)
+            if dropped > 0:
+                # Only reached while the backend keeps failing; keep the newest entries.
+                del self._entries[:dropped]
+                logger.error("Audit buffer full; dropped %s oldest entries.", dropped)
+            full = len(self._entries) >= getattr(settings, 'AUDIT_FLUSH_SIZE', 100)
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        # First entry in this process, or a forked worker: entries inherited from the parent are the parent's to write.
+        self._pid = os.getpid()
+        self._entries = []
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, args=(self._wake,), name='audit-flush', daemon=True).start()
+
+    def _run(self, wake):
+        while True:
+            wake.wait(getattr(settings, 'AUDIT_FLUSH_SECONDS', 5))
+            wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not write the audit buffer; retrying on the next flush.")
+            finally:
+                # This thread's connection would otherwise stay open between flushes.
+                connections.close_all()
+
+    def take(self):
+        """Removes and returns every waiting entry."""
+        with self._lock:
+            entries, self._entries = self._entries, []
+        return entries
+
+    def flush(self):
+        """Writes every waiting entry in one batch; returns how many. Failed entries go back to the buffer."""
+        with self._flush_lock:
+            entries = self.take()
+            backend = get_backend()
+            if not entries or backend is None:
+                return 0
+            try:
+                backend.write(entries)
+            except Exception:
+                with self._lock:
+                    self._entries[:0] = entries
+                raise
+            return len(entries)
+
+
+buffer = AuditBuffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception("Could not write the audit buffer at exit.")
+
+
+def trail(object_type, object_id, limit=100):
+    """An object's audit entries, newest first, including any still buffered in this worker."""
+    buffer.flush()
+    backend = get_backend()
+    return backend.trail(object_type, object_id, limit) if backend else []
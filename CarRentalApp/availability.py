@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Exists, OuterRef
+
+from .models import RentalRequest, RentalTransaction
+
+# --------------------------------------------------------------------------
+# PER-CAR AVAILABILITY CALENDAR
+# A car's blocked dates come from its PENDING/APPROVED requests and Ongoing
+# transactions; an approved request stops counting once its rental is over,
+# even if the car came back before the request's return date. They are merged
+# into disjoint, inclusive [start, end] ranges once per car and kept in the
+# shared 'availability' cache under the car's current version; signals move
+# the version on when one of that car's bookings changes, and each request
+# only slices the cached list to its window.
+# --------------------------------------------------------------------------
+
+BLOCKING_REQUEST_STATUSES = [RentalRequest.Status.PENDING, RentalRequest.Status.APPROVED]
+BLOCKING_TRANSACTION_STATUSES = [RentalTransaction.Status.ONGOING]
+MAX_WINDOW_DAYS = 366
+
+
+def _cache():
+    return caches[getattr(settings, 'AVAILABILITY_CACHE_ALIAS', 'default')]
+
+
+def _version_key(car_id):
+    return f'car-calendar-v:{car_id}'
+
+
+def _cache_key(car_id, version):
+    return f'car-calendar:{car_id}:{version}'
+
+
+def blocking_requests():
+    """Requests that hold their dates: pending ones, and approved ones whose rental has not finished."""
+    finished_rental = RentalTransaction.objects.filter(
+        car_id=OuterRef('car_id'),
+        customer_id=OuterRef('customer_id'),
+        start_date=OuterRef('pickup_date'),
+    ).exclude(status__in=BLOCKING_TRANSACTION_STATUSES)
+    return (
+        RentalRequest.objects
+        .filter(status__in=BLOCKING_REQUEST_STATUSES)
+        .exclude(Exists(finished_rental), status=RentalRequest.Status.APPROVED)
+    )
+
+
+def merge_intervals(intervals):
+    """Merges overlapping or back-to-back inclusive (start, end) date ranges."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def compute_blocked_ranges(car_id):
+    """Reads the car's blocking bookings and returns them merged."""
+    intervals = list(blocking_requests().filter(car_id=car_id).values_list('pickup_date', 'return_date'))
+    intervals += RentalTransaction.objects.filter(
+        car_id=car_id, status__in=BLOCKING_TRANSACTION_STATUSES
+    ).values_list('start_date', 'end_date')
+    return merge_intervals(intervals)
+
+
+def _current_version(cache, car_id):
+    key = _version_key(car_id)
+    version = cache.get(key)
+    if version is None:
+        # First read, or the counter was evicted: start from a value no earlier entry was stored under.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def blocked_ranges(car_id):
+    """Returns the car's merged blocked ranges, computing and caching them on a miss."""
+    cache = _cache()
+    # Read before the bookings: ranges computed from rows a concurrent write is replacing
+    # are stored under the version that write's invalidation leaves behind.
+    version = _current_version(cache, car_id)
+    if version is None:
+        return compute_blocked_ranges(car_id)
+    key = _cache_key(car_id, version)
+    ranges = cache.get(key)
+    if ranges is None:
+        ranges = compute_blocked_ranges(car_id)
+        # The timeout only bounds staleness if an invalidation is ever missed.
+        cache.set(key, ranges, getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 3600))
+    return ranges
+
+
+def invalidate_car(car_id):
+    # A new version rather than a delete, so a slower reader can't put old ranges back.
+    try:
+        _cache().incr(_version_key(car_id))
+    except ValueError:
+        # No version yet: the next read starts a fresh one.
+        pass
+
+
+def blocked_ranges_between(car_id, start, end):
+    """Returns the car's blocked ranges overlapping [start, end], clipped to it."""
+    return [
+        (max(range_start, start), min(range_end, end))
+        for range_start, range_end in blocked_ranges(car_id)
+        if range_start <= end and range_end >= start
+    ]
@@ -0,0 +1,177 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+# --------------------------------------------------------------------------
+# BATCH API (/api/batch/)
+# The mobile app sends its start-up calls in one round trip. Each sub-request
+# is turned into a normal HttpRequest (same cookies, client address and user
+# as the batch) and handed to the resolved view in-process, skipping the
+# middleware stack that the batch request itself already went through.
+#
+# Consecutive reads (GET/HEAD) run concurrently on a small thread pool; any
+# other method runs on its own, in order, so a read listed after a write
+# always sees that write.
+# --------------------------------------------------------------------------
+
+logger = logging.getLogger('django.request')
+
+READ_METHODS = ('GET', 'HEAD')
+ALLOWED_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+API_PREFIX = '/api/'
+
+# Headers of the batch request that must not leak into its sub-requests.
+_BATCH_ONLY_META = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_ACCEPT_ENCODING', 'PATH_INFO', 'QUERY_STRING')
+
+
+class BatchError(ValueError):
+    """The batch payload itself is malformed (answered with a single 400)."""
+
+
+def parse_batch(data):
+    """Validates the batch payload and returns its list of sub-request dicts."""
+    max_size = getattr(settings, 'API_BATCH_MAX_SIZE', 10)
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError("'requests' must be a non-empty list.")
+    if len(items) > max_size:
+        raise BatchError(f"A batch can contain at most {max_size} requests.")
+
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f"Request {index} must be an object with a 'path'.")
+        method = str(item.get('method', 'GET')).upper()
+        if method not in ALLOWED_METHODS:
+            raise BatchError(f"Request {index} uses unsupported method '{method}'.")
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            raise BatchError(f"Request {index} 'headers' must be an object.")
+        parsed.append({
+            'id': item.get('id', index),
+            'method': method,
+            'path': item['path'],
+            'body': item.get('body'),
+            'headers': headers,
+        })
+    return parsed
+
+
+def _build_request(batch_request, item):
+    """Creates the HttpRequest for one sub-request from the (Django) batch request."""
+    url = urlsplit(item['path'])
+    body = b'' if item['body'] is None else json.dumps(item['body']).encode()
+
+    environ = {key: value for key, value in batch_request.META.items() if key not in _BATCH_ONLY_META}
+    # Conditional headers of the batch itself never apply to its parts.
+    environ = {key: value for key, value in environ.items() if not key.startswith('HTTP_IF_')}
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': url.path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': BytesIO(body),
+    })
+    for name, value in item['headers'].items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+
+    request = WSGIRequest(environ)
+    # Authentication and session come from the batch request, which already passed the middleware.
+    request.user = getattr(batch_request, 'user', None)
+    request.session = getattr(batch_request, 'session', None)
+    request._dont_enforce_csrf_checks = True
+    return request
+
+
+def _error(item, status, message):
+    return {'id': item['id'], 'status': status, 'headers': {}, 'body': {'error': message}}
+
+
+def dispatch(batch_request, item):
+    """Runs one sub-request and returns its {'id', 'status', 'headers', 'body'} result."""
+    path = urlsplit(item['path']).path
+    if not path.startswith(API_PREFIX):
+        return _error(item, 400, f"Only {API_PREFIX} endpoints can be batched.")
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(item, 404, 'Not found.')
+    if match.url_name == 'api_batch':
+        return _error(item, 400, 'Batches cannot be nested.')
+
+    request = _build_request(batch_request, item)
+    request.resolver_match = match
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Exception:
+        logger.error('Internal Server Error in batch: %s', path, exc_info=True, extra={'request': request})
+        return _error(item, 500, 'Internal server error.')
+
+    if response.streaming:
+        return _error(item, 400, 'Streaming responses cannot be batched.')
+
+    content = response.content
+    if not content:
+        body = None
+    elif response.get('Content-Type', '').startswith('application/json'):
+        body = json.loads(content)
+    else:
+        body = content.decode(response.charset, errors='replace')
+    headers = {
+        name: value for name, value in response.items()
+        if name not in ('Content-Type', 'Content-Length', 'Vary', 'Allow')
+    }
+    return {'id': item['id'], 'status': response.status_code, 'headers': headers, 'body': body}
+
+
+def _dispatch_in_thread(context, batch_request, item):
+    try:
+        # The copied context carries request-scoped state such as replica pinning.
+        return context.run(dispatch, batch_request, item)
+    finally:
+        connections.close_all()
+
+
+def _groups(items):
+    """Splits the batch into runs of consecutive reads and single non-read requests."""
+    group = []
+    for item in items:
+        if item['method'] in READ_METHODS:
+            group.append(item)
+            continue
+        if group:
+            yield group
+            group = []
+        yield [item]
+    if group:
+        yield group
+
+
+def run_batch(batch_request, items):
+    """Dispatches every sub-request and returns their results in request order."""
+    max_workers = getattr(settings, 'API_BATCH_MAX_WORKERS', 4)
+    results = []
+    for group in _groups(items):
+        if len(group) == 1 or max_workers <= 1:
+            results.extend(dispatch(batch_request, item) for item in group)
+            continue
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(group))) as executor:
+            futures = [
+                executor.submit(_dispatch_in_thread, copy_context(), batch_request, item)
+                for item in group
+            ]
+            results.extend(future.result() for future in futures)
+    return results
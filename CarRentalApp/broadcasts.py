@@ -0,0 +1,76 @@
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import Broadcast, Customer, Notification, RentalRequest, RentalTransaction, TableVersion
+
+# --------------------------------------------------------------------------
+# BROADCAST NOTIFICATIONS
+# A broadcast writes one Notification per recipient. Rows are generated by
+# the database with INSERT ... SELECT over customer-id ranges instead of
+# building model instances in Python (bulk_create spends ~0.1 ms per row on
+# instance and value preparation). Each id range commits on its own so the
+# SQLite write lock is released between chunks and approvals/payments are
+# not stalled behind a large fan-out.
+# --------------------------------------------------------------------------
+
+DEFAULT_CHUNK_SIZE = 20000
+
+
+def customers_for_segment(segment):
+    """Returns the Customer queryset a broadcast segment targets."""
+    if segment == 'all':
+        return Customer.objects.all()
+    if segment == 'active':
+        return Customer.objects.filter(rentals__status=RentalTransaction.Status.ONGOING).distinct()
+    if segment == 'pending':
+        return Customer.objects.filter(customer_requests__status=RentalRequest.Status.PENDING).distinct()
+    raise ValueError(f"Unknown broadcast segment '{segment}'.")
+
+
+def send_broadcast(title, message, segment='all', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Creates a Broadcast and one unread Notification for every customer in the segment."""
+    recipients = customers_for_segment(segment)
+    broadcast = Broadcast.objects.create(title=title, message=message, segment=segment)
+
+    id_range = Customer.objects.aggregate(low=Min('id'), high=Max('id'))
+    if id_range['low'] is None:
+        return broadcast
+
+    # Column values shared by every row, prepared exactly as the ORM would save them.
+    now = timezone.now()
+    values = {
+        'broadcast_id': broadcast.id,
+        'title': title,
+        'message': message,
+        'is_read': False,
+        'created_at': now,
+        'updated_at': now,
+    }
+    columns = [Notification._meta.get_field(name) for name in values]
+    constants = [field.get_db_prep_save(values[field.attname], connection) for field in columns]
+
+    quote = connection.ops.quote_name
+    insert_columns = ', '.join(quote(column) for column in ['customer_id'] + [field.column for field in columns])
+    placeholders = ', '.join(['%s'] * len(constants))
+
+    total = 0
+    low = id_range['low'] - 1
+    while low < id_range['high']:
+        high = low + chunk_size
+        chunk = recipients.filter(id__gt=low, id__lte=high).order_by().values_list('id')
+        select_sql, select_params = chunk.query.sql_with_params()
+        sql = (
+            f"INSERT INTO {quote(Notification._meta.db_table)} ({insert_columns}) "
+            f"SELECT recipients.{quote('id')}, {placeholders} FROM ({select_sql}) recipients"
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [*constants, *select_params])
+            total += cursor.rowcount
+        low = high
+
+    broadcast.recipient_count = total
+    broadcast.save(update_fields=['recipient_count'])
+    # The INSERT skips post_save, so bump the notifications version once here.
+    TableVersion.bump('notification')
+    return broadcast
@@ -0,0 +1,249 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .fast_serializers import car_list_serializer
+from .models import Car, ChangeLogEntry
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------------
+# OFFLINE CATALOG SNAPSHOT
+# `manage.py build_catalog_snapshot` writes the car list (same output as
+# /api/cars/) plus a manifest of small WebP thumbnails into MEDIA_ROOT/catalog:
+#
+#   catalog/snapshot-<version>.json.gz   the bundle, named by its version
+#   catalog/thumbs/<sha256>.webp         thumbnails, named by their content
+#   catalog/latest.json                  pointer to the current bundle
+#
+# Everything is served by serve_media, so bundle and thumbnail URLs carry a
+# fingerprint and are cached as immutable (CDN friendly); the app checks
+# /api/catalog/version/ (which only reads latest.json) and downloads a bundle
+# only when the version changed. The version is a hash of the cars and
+# thumbnails, so rebuilding an unchanged catalog writes nothing.
+#
+# Each bundle records the change feed cursor read before the cars, so a client
+# can continue from it with /api/changes/?tables=car&after=<change_cursor>.
+# --------------------------------------------------------------------------
+
+SNAPSHOT_FORMAT = 1
+CATALOG_DIR = 'catalog'
+THUMBNAIL_DIR = f'{CATALOG_DIR}/thumbs'
+POINTER_NAME = f'{CATALOG_DIR}/latest.json'
+
+
+def _write_atomic(name, data):
+    """Writes bytes to a media-relative path through a temporary file, so readers never see a partial file."""
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def read_pointer():
+    """Returns the parsed latest.json, or None if no snapshot has been built."""
+    try:
+        with open(default_storage.path(POINTER_NAME), 'rb') as pointer_file:
+            return json.loads(pointer_file.read())
+    except FileNotFoundError:
+        return None
+
+
+_pointer_cache = {'mtime_ns': None, 'pointer': None}
+
+
+def current_snapshot():
+    """latest.json, re-read only when the file changes (one stat() per call otherwise)."""
+    try:
+        mtime_ns = os.stat(default_storage.path(POINTER_NAME)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _pointer_cache['mtime_ns'] != mtime_ns:
+        _pointer_cache['pointer'] = read_pointer()
+        _pointer_cache['mtime_ns'] = mtime_ns
+    return _pointer_cache['pointer']
+
+
+def _read_snapshot(name):
+    with default_storage.open(name, 'rb') as snapshot_file:
+        return json.loads(gzip.decompress(snapshot_file.read()))
+
+
+def make_thumbnail(image_name, size, quality):
+    """
+    Returns (webp_bytes, width, height) for a stored car image fitted into size x size,
+    or None if the image is missing or unreadable.
+    """
+    try:
+        with default_storage.open(image_name, 'rb') as image_file:
+            image = Image.open(image_file)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            output = io.BytesIO()
+            image.save(output, 'WEBP', quality=quality)
+    except (FileNotFoundError, UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning('No catalog thumbnail for %s: %s', image_name, e)
+        return None
+    return output.getvalue(), image.width, image.height
+
+
+def build_thumbnails(image_names, previous=()):
+    """
+    Returns {image name: manifest entry} for the given stored images. Thumbnails of
+    source images that already have an entry in `previous` (matched by source
+    fingerprint and size) are reused instead of being re-encoded.
+    """
+    size = getattr(settings, 'CATALOG_THUMBNAIL_SIZE', 320)
+    quality = getattr(settings, 'CATALOG_THUMBNAIL_QUALITY', 75)
+    reusable = {
+        (entry['source'], entry['size']): entry
+        for entry in previous
+        if default_storage.exists(entry['name'])
+    }
+
+    thumbnails = {}
+    for image_name in image_names:
+        source = default_storage.fingerprint(image_name)
+        if source is None:
+            continue
+        entry = reusable.get((source, size))
+        if entry is None:
+            thumbnail = make_thumbnail(image_name, size, quality)
+            if thumbnail is None:
+                continue
+            data, width, height = thumbnail
+            digest = hashlib.sha256(data).hexdigest()
+            name = f'{THUMBNAIL_DIR}/{digest}.webp'
+            if not default_storage.exists(name):
+                _write_atomic(name, data)
+            entry = {
+                'name': name, 'sha256': digest, 'bytes': len(data),
+                'width': width, 'height': height, 'size': size, 'source': source,
+            }
+            reusable[(source, size)] = entry
+        thumbnails[image_name] = entry
+    return thumbnails
+
+
+def build_catalog_snapshot(force=False):
+    """
+    Builds the catalog bundle and points latest.json at it.
+    Returns (pointer, written): written is False when the catalog is unchanged
+    since the current bundle (and force is not set), in which case nothing is written.
+    """
+    # 1. Cursor first, then cars: every change after the cursor is either in the
+    #    bundle already or replayed by the feed, and replaying is idempotent.
+    with transaction.atomic():
+        change_cursor = ChangeLogEntry.objects.aggregate(cursor=Max('id'))['cursor'] or 0
+        cars = car_list_serializer.serialize(Car.objects.order_by('id'))
+        image_names = dict(Car.objects.exclude(image='').exclude(image=None).values_list('id', 'image'))
+
+    # 2. Thumbnails, reusing the ones of the current bundle
+    pointer = read_pointer()
+    previous = ()
+    if pointer and default_storage.exists(pointer['name']):
+        previous = _read_snapshot(pointer['name'])['thumbnails'].values()
+    thumbnails_by_image = build_thumbnails(sorted(set(image_names.values())), previous)
+    thumbnails = {
+        str(car_id): thumbnails_by_image[image_name]
+        for car_id, image_name in image_names.items()
+        if image_name in thumbnails_by_image
+    }
+    for entry in thumbnails.values():
+        entry['url'] = default_storage.url(entry['name'])
+
+    # 3. Version from the content only, so an unchanged catalog keeps its bundle
+    canonical = json.dumps([cars, thumbnails], sort_keys=True, cls=DjangoJSONEncoder).encode()
+    version = hashlib.sha256(canonical).hexdigest()[:16]
+    if pointer and pointer['version'] == version and not force:
+        return pointer, False
+
+    built_at = timezone.now()
+    bundle = {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'built_at': built_at,
+        'change_cursor': change_cursor,
+        'cars': cars,
+        'thumbnails': thumbnails,
+    }
+    # mtime=0 keeps the gzip bytes (and so the URL fingerprint) stable for the same content.
+    data = gzip.compress(
+        json.dumps(bundle, cls=DjangoJSONEncoder, separators=(',', ':')).encode(), compresslevel=9, mtime=0,
+    )
+    name = f'{CATALOG_DIR}/snapshot-{version}.json.gz'
+    _write_atomic(name, data)
+
+    pointer = {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'name': name,
+        'url': default_storage.url(name),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'bytes': len(data),
+        'car_count': len(cars),
+        'thumbnail_count': len(thumbnails),
+        'change_cursor': change_cursor,
+        'built_at': built_at.isoformat(),
+    }
+    _write_atomic(POINTER_NAME, json.dumps(pointer, indent=2).encode())
+    return pointer, True
+
+
+def prune_catalog_snapshots(keep):
+    """
+    Deletes all but the newest `keep` bundles (clients may still be downloading a
+    recent one) and the thumbnails none of the kept bundles reference.
+    Returns (bundles deleted, thumbnails deleted).
+    """
+    if not default_storage.exists(CATALOG_DIR):
+        return 0, 0
+    _, files = default_storage.listdir(CATALOG_DIR)
+    bundles = sorted(
+        (f'{CATALOG_DIR}/{filename}' for filename in files
+         if filename.startswith('snapshot-') and filename.endswith('.json.gz')),
+        key=default_storage.get_modified_time, reverse=True,
+    )
+    pointer = read_pointer()
+    kept = bundles[:keep]
+    if pointer and pointer['name'] not in kept and pointer['name'] in bundles:
+        kept.append(pointer['name'])
+    stale = [name for name in bundles if name not in kept]
+    for name in stale:
+        default_storage.delete(name)
+
+    referenced = set()
+    for name in kept:
+        referenced.update(entry['name'] for entry in _read_snapshot(name)['thumbnails'].values())
+    stale_thumbnails = []
+    if default_storage.exists(THUMBNAIL_DIR):
+        _, thumbnail_files = default_storage.listdir(THUMBNAIL_DIR)
+        # Temporary files of a build running right now start with a dot and are left alone.
+        stale_thumbnails = [
+            f'{THUMBNAIL_DIR}/{filename}' for filename in thumbnail_files
+            if filename.endswith('.webp') and f'{THUMBNAIL_DIR}/{filename}' not in referenced
+        ]
+    for name in stale_thumbnails:
+        default_storage.delete(name)
+    return len(stale), len(stale_thumbnails)
@@ -0,0 +1,136 @@
+"""
+Client for the /api/changes/ feed, for services that keep their own copy of
+cars and bookings. Only uses the standard library (no Django), so it can be
+copied into other code bases as is.
+
+    consumer = ChangeFeedConsumer('https://gowheels-backend.onrender.com', tables=['car'],
+                                  cursor_store=FileCursorStore('cars.cursor'))
+    mirror = Mirror()
+    consumer.sync(mirror.apply)          # catch up once
+    consumer.follow(mirror.apply)        # or keep polling
+
+Entries are delivered at least once: the cursor is saved after each page has
+been applied, so a crash mid-page replays that page. Applying an entry is an
+upsert or delete of (table, id), which makes replays harmless.
+"""
+import json
+import os
+import tempfile
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+
+class ChangeFeedError(Exception):
+    pass
+
+
+class FileCursorStore:
+    """Keeps the cursor in a small file, replaced atomically on every save."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def save(self, cursor):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.cursor-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(cursor))
+        os.replace(tmp_path, self.path)
+
+
+class MemoryCursorStore:
+    def __init__(self, cursor=0):
+        self.cursor = cursor
+
+    def load(self):
+        return self.cursor
+
+    def save(self, cursor):
+        self.cursor = cursor
+
+
+class Mirror:
+    """In-memory copy of the fed tables: {table: {id: row}}."""
+
+    def __init__(self):
+        self.tables = {}
+
+    def apply(self, change):
+        rows = self.tables.setdefault(change['table'], {})
+        if change['action'] == 'delete':
+            rows.pop(change['id'], None)
+        else:
+            rows[change['id']] = change['data']
+
+    def get(self, table, object_id):
+        return self.tables.get(table, {}).get(object_id)
+
+
+class ChangeFeedConsumer:
+    """
+    Reads the change feed of base_url from the stored cursor. headers are sent with
+    every request (e.g. a staff session cookie for the non-public tables).
+    """
+
+    def __init__(self, base_url, tables=None, cursor_store=None, page_size=500, headers=None, timeout=10):
+        self.url = base_url.rstrip('/') + '/api/changes/'
+        self.tables = list(tables or [])
+        self.cursor_store = cursor_store or MemoryCursorStore()
+        self.page_size = page_size
+        self.headers = {'Accept': 'application/json', **(headers or {})}
+        self.timeout = timeout
+
+    @property
+    def cursor(self):
+        return self.cursor_store.load()
+
+    def fetch_page(self, cursor):
+        """Returns the decoded response for one page after cursor."""
+        params = {'after': cursor, 'limit': self.page_size}
+        if self.tables:
+            params['tables'] = ','.join(self.tables)
+        request = Request(f'{self.url}?{urlencode(params)}', headers=self.headers)
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            raise ChangeFeedError(f'Change feed returned {e.code}: {e.read()[:200]!r}') from e
+        except URLError as e:
+            raise ChangeFeedError(f'Change feed unreachable: {e.reason}') from e
+
+    def sync(self, apply):
+        """Applies every pending entry in order, saving the cursor after each page. Returns the count."""
+        applied = 0
+        cursor = self.cursor_store.load()
+        while True:
+            page = self.fetch_page(cursor)
+            for change in page['changes']:
+                apply(change)
+            applied += len(page['changes'])
+            if page['cursor'] != cursor:
+                cursor = page['cursor']
+                self.cursor_store.save(cursor)
+            if not page['has_more']:
+                return applied
+
+    def follow(self, apply, interval=5.0, stop=None, on_error=None):
+        """
+        Calls sync() every interval seconds until stop() returns true. Feed errors are
+        passed to on_error (if given) and retried on the next round.
+        """
+        while not (stop and stop()):
+            try:
+                self.sync(apply)
+            except ChangeFeedError as e:
+                if on_error:
+                    on_error(e)
+            time.sleep(interval)
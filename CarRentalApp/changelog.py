@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.fields.files import FieldFile
+
+from .models import Car, ChangeLogEntry, Payment, RentalRequest, RentalTransaction
+
+# --------------------------------------------------------------------------
+# CHANGE FEED
+# Every create, update and delete of a change-logged model appends a
+# ChangeLogEntry in the same transaction (signals.py). Consumers read the log
+# in id order from a cursor (/api/changes/?after=, or change_consumer.py) and
+# apply each entry as an upsert or delete of (table, id).
+#
+# Once entries are older than CHANGE_LOG_RETENTION_DAYS they are compacted per
+# row: only the newest entry for each (table, object_id) is kept, deletes
+# included, so a consumer starting from any cursor (0 for a full snapshot)
+# still ends at the current state; it only skips intermediate versions.
+# --------------------------------------------------------------------------
+
+CHANGE_LOGGED_MODELS = (Car, RentalRequest, RentalTransaction, Payment)
+FEED_TABLES = tuple(model._meta.model_name for model in CHANGE_LOGGED_MODELS)
+
+# Tables any caller may read; the rest carry customer and payment data and are staff only.
+PUBLIC_FEED_TABLES = ('car',)
+
+
+def row_data(instance):
+    """The instance's column values, keyed by column attribute name ('car_id', not 'car')."""
+    data = {}
+    for field in instance._meta.concrete_fields:
+        value = getattr(instance, field.attname)
+        if isinstance(value, FieldFile):
+            value = value.name or None
+        data[field.attname] = value
+    return data
+
+
+def record_change(instance, action):
+    ChangeLogEntry.objects.create(
+        table=instance._meta.model_name,
+        object_id=instance.pk,
+        action=action,
+        data=None if action == 'delete' else row_data(instance),
+    )
+
+
+def changes_after(cursor, tables, limit):
+    """
+    Returns (entries, has_more): up to limit entries after cursor from the given tables,
+    oldest first, as dicts ready to be sent to consumers.
+    """
+    entries = ChangeLogEntry.objects.filter(id__gt=cursor)
+    if set(tables) != set(FEED_TABLES):
+        entries = entries.filter(table__in=tables)
+    rows = list(
+        entries.order_by('id')
+        .values_list('id', 'table', 'object_id', 'action', 'data', 'changed_at')[:limit + 1]
+    )
+    return [
+        {
+            'cursor': entry_id,
+            'table': table,
+            'id': object_id,
+            'action': action,
+            'data': data,
+            'changed_at': changed_at.isoformat(),
+        }
+        for entry_id, table, object_id, action, data, changed_at in rows[:limit]
+    ], len(rows) > limit
+
+
+def compact_change_log(cutoff, batch_size):
+    """
+    Deletes entries changed before cutoff that a newer entry for the same row supersedes.
+    Yields the number deleted per batch.
+    """
+    superseded = Exists(ChangeLogEntry.objects.filter(
+        table=OuterRef('table'), object_id=OuterRef('object_id'), id__gt=OuterRef('id'),
+    ))
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                ChangeLogEntry.objects
+                .filter(superseded, id__gt=last_id, changed_at__lt=cutoff)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return
+            ChangeLogEntry.objects.filter(id__in=ids).delete()
+        last_id = ids[-1]
+        yield len(ids)
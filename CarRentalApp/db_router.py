@@ -0,0 +1,93 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# --------------------------------------------------------------------------
+# READ-REPLICA ROUTING
+# Only views wrapped in @read_from_replica read from a replica; everything
+# else (staff pages, writes, reads inside a transaction) stays on the primary.
+# After a client writes, ReplicaPinningMiddleware pins its reads to the
+# primary for REPLICA_PIN_SECONDS so it always sees its own changes.
+# --------------------------------------------------------------------------
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+PIN_COOKIE_NAME = 'db_pin'
+PIN_COOKIE_SALT = 'CarRentalApp.db_router.pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    """Sends opted-in reads to a random replica and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or _pinned_to_primary.get():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction must see that transaction's writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = replica_aliases()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas are copies of the primary, so objects from any of them can be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are snapshots of the primary and get its schema with the data.
+        return db not in replica_aliases()
+
+
+def read_from_replica(view_func):
+    """Lets the decorated view's reads go to a replica (unless the client is pinned)."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes stickiness: a successful write sets a short-lived signed
+    cookie, and requests carrying it read from the primary only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+        pinned = request.get_signed_cookie(
+            PIN_COOKIE_NAME, default=None, salt=PIN_COOKIE_SALT, max_age=pin_seconds
+        ) is not None
+
+        token = _pinned_to_primary.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned_to_primary.reset(token)
+
+        # A POST that only carries reads (e.g. an /api/batch/ of GETs) sets replica_pin_exempt.
+        wrote = request.method not in SAFE_METHODS and not getattr(request, 'replica_pin_exempt', False)
+        if replica_aliases() and wrote and response.status_code < 400:
+            response.set_signed_cookie(
+                PIN_COOKIE_NAME, '1', salt=PIN_COOKIE_SALT, max_age=pin_seconds, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,155 @@
+import decimal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.utils.functional import cached_property
+from rest_framework import fields as drf_fields
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from .serializers import CarSerializer, LegacyStatusField
+
+# --------------------------------------------------------------------------
+# FAST READ-ONLY SERIALIZATION (List endpoints)
+# A ModelSerializer instantiates and walks every field for every row. For
+# read-only list responses we instead read plain tuples with values_list()
+# and run only the few converters a field actually needs (Decimal -> string,
+# image path -> URL). The output is identical to the wrapped serializer.
+# --------------------------------------------------------------------------
+
+# DRF fields whose to_representation() is a no-op for values coming
+# straight from the database, so they need no converter at all.
+PASSTHROUGH_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.IntegerField,
+    drf_fields.ReadOnlyField,
+)
+
+
+def _decimal_converter(field):
+    """Builds the DecimalField.to_representation() equivalent with its quantizer precomputed."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.localize or field.normalize_output or not coerce_to_string:
+        return field.to_representation
+
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f'{value.quantize(quantum, rounding=rounding, context=context):f}'
+
+    return convert
+
+
+class ValuesListSerializer:
+    """
+    Read-only, list-only counterpart of a ModelSerializer.
+    Builds response dicts from values_list() rows using per-field converters
+    computed once from the wrapped serializer's fields.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def model(self):
+        return self.serializer_class.Meta.model
+
+    @cached_property
+    def field_names(self):
+        return list(self.serializer_class.Meta.fields)
+
+    @cached_property
+    def _converters(self):
+        """
+        Maps field name -> (converter, needs_request) for the columns that need
+        work. Columns whose database value is already the serialized value are
+        left out entirely.
+        """
+        converters = {}
+        serializer_fields = self.serializer_class().fields
+        for name in self.field_names:
+            field = serializer_fields[name]
+            if field.source != name:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} uses source='{field.source}', "
+                    "which values_list() cannot read."
+                )
+
+            if isinstance(field, LegacyStatusField):
+                converters[name] = (field.legacy_by_code.__getitem__, False)
+            elif isinstance(field, drf_fields.FileField):
+                converters[name] = (self._file_converter(name, field), True)
+            elif isinstance(field, drf_fields.DecimalField):
+                converters[name] = (_decimal_converter(field), False)
+            elif isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+                # values_list() already returns the related primary key.
+                continue
+            elif type(field) not in PASSTHROUGH_FIELDS:
+                # Exact type match: subclasses may override to_representation().
+                converters[name] = (field.to_representation, False)
+        return converters
+
+    def _plan(self, names):
+        """Returns (plain, with_request): lists of (column index, converter) for the selected columns."""
+        plain = []
+        with_request = []
+        converters = self._converters
+        for index, name in enumerate(names):
+            if name in converters:
+                convert, needs_request = converters[name]
+                (with_request if needs_request else plain).append((index, convert))
+        return plain, with_request
+
+    def _file_converter(self, name, field):
+        model_field = self.model._meta.get_field(name)
+        if not isinstance(model_field, models.FileField):
+            raise ImproperlyConfigured(f"{self.model.__name__}.{name} is not a FileField.")
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return lambda value, request: value or None
+
+        storage_url = model_field.storage.url
+
+        def convert(value, request):
+            if not value:
+                return None
+            url = storage_url(value)
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+
+        return convert
+
+    def serialize(self, queryset, request=None, fields=None):
+        """
+        Returns a list of dicts for the given queryset.
+        Pass the request only where the wrapped serializer would get it in
+        its context (it turns image paths into absolute URLs). `fields`
+        limits both the SELECT and the output to a subset of field_names.
+        """
+        names = self.field_names if fields is None else list(fields)
+        plain, with_request = self._plan(names)
+
+        results = []
+        append = results.append
+        for row in queryset.values_list(*names):
+            if plain or with_request:
+                row = list(row)
+                for index, convert in plain:
+                    value = row[index]
+                    if value is not None:
+                        row[index] = convert(value)
+                for index, convert in with_request:
+                    row[index] = convert(row[index], request)
+            append(dict(zip(names, row)))
+        return results
+
+
+car_list_serializer = ValuesListSerializer(CarSerializer)
@@ -0,0 +1,201 @@
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from .availability import BLOCKING_TRANSACTION_STATUSES, blocking_requests
+from .fast_serializers import car_list_serializer
+from .models import Branch, Car, RentalTransaction, TableVersion
+
+# --------------------------------------------------------------------------
+# NEAREST BRANCH / NEAREST AVAILABLE CAR
+# Active branches are kept in an in-memory grid index per worker, rebuilt when
+# the 'branch' TableVersion changes (one primary-key lookup per search). A
+# search walks the grid outwards from the customer and yields branches in
+# order of distance; the car search then reads available cars branch batch by
+# branch batch (car_branch_status_idx) and stops as soon as the nearest
+# `limit` cars are certain, so it only touches the branches it needs.
+# --------------------------------------------------------------------------
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# First batch of branches the car search reads; each further batch is twice as large.
+FIRST_BRANCH_BATCH = 4
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in degrees, in kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Points bucketed into square cells of cell_degrees. nearest() visits rings of
+    cells around the query outwards and yields points closest first, stopping as
+    soon as no unvisited cell can hold a closer point. Longitudes do not wrap
+    at +/-180 degrees (the fleet is in one country).
+    """
+
+    def __init__(self, points, cell_degrees):
+        self.cell_degrees = cell_degrees
+        self.cells = defaultdict(list)
+        max_abs_lat = 0.0
+        for key, lat, lon in points:
+            self.cells[self._cell(lat, lon)].append((key, lat, lon))
+            max_abs_lat = max(max_abs_lat, abs(lat))
+        self.size = sum(len(points) for points in self.cells.values())
+        self.max_abs_lat = max_abs_lat
+        if self.cells:
+            rows = [row for row, _ in self.cells]
+            cols = [col for _, col in self.cells]
+            self.min_row, self.max_row = min(rows), max(rows)
+            self.min_col, self.max_col = min(cols), max(cols)
+
+    def __len__(self):
+        return self.size
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _ring(self, row, col, ring):
+        """Occupied cells exactly `ring` cells away from (row, col), clipped to the indexed area."""
+        cells = self.cells
+        first_row, last_row = max(row - ring, self.min_row), min(row + ring, self.max_row)
+        first_col, last_col = max(col - ring, self.min_col), min(col + ring, self.max_col)
+        for r in range(first_row, last_row + 1):
+            if abs(r - row) == ring:
+                columns = range(first_col, last_col + 1)
+            else:
+                columns = [c for c in (col - ring, col + ring) if first_col <= c <= last_col]
+            for c in columns:
+                if (r, c) in cells:
+                    yield cells[(r, c)]
+
+    def _ring_floor_km(self, lat, ring):
+        """Lower bound on the distance from the query to any point `ring` or more cells away."""
+        if ring <= 1:
+            return 0.0
+        # East-west cells are narrowest at the highest latitude involved; the
+        # 0.99 covers great circles being slightly shorter than parallels.
+        widest_lat = min(89.0, max(self.max_abs_lat, abs(lat)))
+        return (ring - 1) * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(widest_lat)) * 0.99
+
+    def nearest(self, lat, lon, max_km=None):
+        """Yields (distance_km, key) closest first, up to max_km away if given."""
+        if not self.cells:
+            return
+        row, col = self._cell(lat, lon)
+        # Rings that can't reach the indexed area are empty, so start at the first one that can.
+        first_ring = max(0, self.min_row - row, row - self.max_row, self.min_col - col, col - self.max_col)
+        last_ring = max(abs(row - self.min_row), abs(row - self.max_row), abs(col - self.min_col), abs(col - self.max_col))
+        heap = []
+        for ring in range(first_ring, last_ring + 1):
+            for points in self._ring(row, col, ring):
+                for key, point_lat, point_lon in points:
+                    heapq.heappush(heap, (haversine_km(lat, lon, point_lat, point_lon), key))
+            floor = self._ring_floor_km(lat, ring + 1)
+            while heap and heap[0][0] <= floor:
+                distance, key = heapq.heappop(heap)
+                if max_km is not None and distance > max_km:
+                    return
+                yield distance, key
+            if max_km is not None and floor > max_km:
+                return
+        while heap:
+            distance, key = heapq.heappop(heap)
+            if max_km is not None and distance > max_km:
+                return
+            yield distance, key
+
+
+# ((version, updated_at) of the 'branch' TableVersion, GridIndex, {branch id: branch dict}),
+# swapped in as a whole.
+_branch_index = None
+
+
+def branch_index():
+    """Returns (index, branches by id) for the active branches, rebuilding it if branches changed."""
+    global _branch_index
+    version = TableVersion.current('branch')
+    if _branch_index is None or _branch_index[0] != version:
+        branches = {
+            branch_id: {
+                'id': branch_id, 'name': name, 'address': address,
+                'latitude': latitude, 'longitude': longitude,
+            }
+            for branch_id, name, address, latitude, longitude in (
+                Branch.objects.filter(is_active=True)
+                .values_list('id', 'name', 'address', 'latitude', 'longitude')
+            )
+        }
+        index = GridIndex(
+            ((branch['id'], branch['latitude'], branch['longitude']) for branch in branches.values()),
+            getattr(settings, 'BRANCH_GRID_CELL_DEGREES', 0.1),
+        )
+        _branch_index = (version, index, branches)
+    return _branch_index[1], _branch_index[2]
+
+
+def nearest_branches(lat, lon, limit, max_km=None):
+    """Up to limit active branches closest to (lat, lon), each with its distance_km."""
+    index, branches = branch_index()
+    results = []
+    for distance, branch_id in index.nearest(lat, lon, max_km):
+        results.append({**branches[branch_id], 'distance_km': round(distance, 3)})
+        if len(results) == limit:
+            break
+    return results
+
+
+def available_cars(start=None, end=None, car_type=None):
+    """Available cars, optionally only those free from start to end (inclusive) and of one type."""
+    cars = Car.objects.filter(status=Car.Status.AVAILABLE)
+    if car_type:
+        cars = cars.filter(type__iexact=car_type)
+    if start and end:
+        cars = cars.exclude(Exists(blocking_requests().filter(
+            car=OuterRef('pk'), pickup_date__lte=end, return_date__gte=start,
+        ))).exclude(Exists(RentalTransaction.objects.filter(
+            car=OuterRef('pk'), status__in=BLOCKING_TRANSACTION_STATUSES,
+            start_date__lte=end, end_date__gte=start,
+        )))
+    return cars
+
+
+def nearest_available_cars(lat, lon, limit, max_km=None, start=None, end=None, car_type=None, request=None):
+    """
+    Up to limit available cars closest to (lat, lon), serialized like /api/cars/ plus
+    distance_km and branch_name. Cars at the same branch are ordered by id.
+    """
+    index, branches = branch_index()
+    cars = available_cars(start, end, car_type)
+    found = []
+    batch = []
+    batch_size = FIRST_BRANCH_BATCH
+    nearest = index.nearest(lat, lon, max_km)
+    while True:
+        next_branch = next(nearest, None)
+        if next_branch is not None:
+            batch.append(next_branch)
+            if len(batch) < batch_size:
+                continue
+        if batch:
+            distances = {branch_id: distance for distance, branch_id in batch}
+            # No ORDER BY: with one, SQLite walks the primary key instead of car_branch_status_idx.
+            for car in car_list_serializer.serialize(cars.filter(branch_id__in=distances), request):
+                found.append((distances[car['branch']], car['id'], car))
+            batch = []
+            batch_size *= 2
+        # Branches come closest first, so once limit cars are found no later branch can beat them.
+        if len(found) >= limit or next_branch is None:
+            break
+
+    found.sort(key=lambda item: item[:2])
+    return [
+        {**car, 'distance_km': round(distance, 3), 'branch_name': branches[car['branch']]['name']}
+        for distance, _, car in found[:limit]
+    ]
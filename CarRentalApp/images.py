@@ -0,0 +1,85 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# --------------------------------------------------------------------------
+# CAR IMAGE VALIDATION
+# Every uploaded car photo is checked for format, size and dimensions, and
+# re-encoded without EXIF/XMP metadata (GPS position, camera serials, ...)
+# when it carries any. Images without metadata are stored byte-for-byte so
+# identical uploads still deduplicate in ContentAddressedStorage.
+# --------------------------------------------------------------------------
+
+DEFAULT_ALLOWED_FORMATS = ('JPEG', 'PNG', 'WEBP', 'AVIF')
+FORMAT_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'AVIF': '.avif'}
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+def _has_metadata(image):
+    return bool(image.info.get('exif') or image.info.get('xmp') or image.getexif())
+
+
+def prepare_car_image(uploaded_file):
+    """
+    Validates an uploaded car photo and returns a ContentFile ready for Car.image.
+    Raises ValidationError with a staff-readable message if the file is rejected.
+    """
+    max_bytes = getattr(settings, 'CAR_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+    if uploaded_file.size > max_bytes:
+        raise ValidationError(f'Image is too large (max {max_bytes // (1024 * 1024)} MB).')
+
+    uploaded_file.seek(0)
+    original = uploaded_file.read()
+    try:
+        image = Image.open(io.BytesIO(original))
+        image_format = image.format
+        width, height = image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise ValidationError('The uploaded file is not a supported image.')
+
+    allowed_formats = getattr(settings, 'CAR_IMAGE_ALLOWED_FORMATS', DEFAULT_ALLOWED_FORMATS)
+    if image_format not in allowed_formats:
+        raise ValidationError(f"Unsupported image format '{image_format}'. Use {', '.join(allowed_formats)}.")
+
+    min_width, min_height = getattr(settings, 'CAR_IMAGE_MIN_DIMENSIONS', (200, 150))
+    max_width, max_height = getattr(settings, 'CAR_IMAGE_MAX_DIMENSIONS', (6000, 6000))
+    if width < min_width or height < min_height:
+        raise ValidationError(f'Image is too small ({width}x{height}); minimum is {min_width}x{min_height}.')
+    if width > max_width or height > max_height:
+        raise ValidationError(f'Image is too large ({width}x{height}); maximum is {max_width}x{max_height}.')
+
+    stem = os.path.splitext(os.path.basename(uploaded_file.name or 'car'))[0]
+    name = stem + FORMAT_EXTENSIONS.get(image_format, '')
+
+    try:
+        image.load()
+        if not _has_metadata(image):
+            return ContentFile(original, name=name)
+        return ContentFile(_strip_metadata(image, image_format), name=name)
+    except (OSError, ValueError):
+        raise ValidationError('The uploaded image could not be processed.')
+
+
+def _strip_metadata(image, image_format):
+    # Bake the EXIF orientation into the pixels before the tag is dropped.
+    options = {}
+    if image.getexif().get(EXIF_ORIENTATION_TAG, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+    elif image_format == 'JPEG':
+        # Reuse the original quantization tables so re-encoding is (nearly) lossless.
+        options['quality'] = 'keep'
+    if image_format == 'JPEG' and options.get('quality') != 'keep':
+        options['quality'] = 90
+
+    # The colour profile is not personal metadata and is needed to render correctly.
+    icc_profile = image.info.get('icc_profile')
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+
+    output = io.BytesIO()
+    image.save(output, format=image_format, **options)
+    return output.getvalue()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max
+from django.template.loader import render_to_string
+
+from .models import ChangeLogEntry, RentalRequest, RentalTransaction
+
+# --------------------------------------------------------------------------
+# LIVE STAFF QUEUES
+# The pending and active rental pages open a Server-Sent Events stream
+# (/cars/rentals/events/?queue=...) instead of reloading themselves. Each
+# stream follows the change log from the cursor the page was rendered at: one
+# query on the log's primary key per poll, and when rows of its table changed,
+# one query for just those rows. Every changed row is sent as its rendered
+# partial (the same template the page uses), or as null when it left the
+# queue, and the page swaps that one card.
+#
+# Under ASGI a stream waits between polls without holding a worker thread.
+# Streams end after LIVE_STREAM_MAX_SECONDS and the browser reconnects with
+# Last-Event-ID, so no change is lost and long-lived connections get recycled.
+# --------------------------------------------------------------------------
+
+# Change log entries read per poll; a busier stream catches up over several polls.
+POLL_BATCH_SIZE = 500
+RECONNECT_MILLISECONDS = 3000
+
+
+class LiveQueue:
+    """One staff queue: which log table feeds it, which rows belong in it and how a row is rendered."""
+
+    def __init__(self, table, queryset, template, context_name, dom_prefix, sort_field):
+        self.table = table
+        self.queryset = queryset
+        self.template = template
+        self.context_name = context_name
+        self.dom_prefix = dom_prefix
+        self.sort_field = sort_field
+
+    def rows(self, ids):
+        return {row.id: row for row in self.queryset().filter(id__in=ids)}
+
+
+LIVE_QUEUES = {
+    'pending': LiveQueue(
+        table=RentalRequest._meta.model_name,
+        queryset=lambda: RentalRequest.objects.filter(status=RentalRequest.Status.PENDING).select_related('car', 'customer'),
+        template='cars/partials/pending_row.html',
+        context_name='rental_request',
+        dom_prefix='request',
+        sort_field='pickup_date',
+    ),
+    'active': LiveQueue(
+        table=RentalTransaction._meta.model_name,
+        queryset=lambda: RentalTransaction.objects.filter(status=RentalTransaction.Status.ONGOING).select_related('car', 'customer'),
+        template='cars/partials/active_row.html',
+        context_name='rental',
+        dom_prefix='rental',
+        sort_field='end_date',
+    ),
+}
+
+
+def current_cursor():
+    """Newest change log id; pages render it so their stream starts exactly where the page left off."""
+    return ChangeLogEntry.objects.aggregate(cursor=Max('id'))['cursor'] or 0
+
+
+def _event(name, data, event_id=None):
+    lines = [f'event: {name}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class QueueStream:
+    """
+    SSE stream of one queue from cursor. events() is the blocking version (WSGI,
+    runserver, tests) and aevents() the asynchronous one used under ASGI.
+    """
+
+    def __init__(self, queue, cursor, request):
+        self.queue = queue
+        self.cursor = cursor
+        self.request = request
+        self.poll_seconds = getattr(settings, 'LIVE_POLL_SECONDS', 2)
+        self.heartbeat_seconds = getattr(settings, 'LIVE_HEARTBEAT_SECONDS', 15)
+        self.max_seconds = getattr(settings, 'LIVE_STREAM_MAX_SECONDS', 300)
+
+    def poll(self):
+        """Returns the next 'rows' event, or None when the queue's table has not changed since the cursor."""
+        entries = list(
+            ChangeLogEntry.objects.filter(id__gt=self.cursor, table=self.queue.table)
+            .order_by('id').values_list('id', 'object_id')[:POLL_BATCH_SIZE]
+        )
+        if not entries:
+            return None
+        self.cursor = entries[-1][0]
+        # Each row once, however often it changed since the last poll.
+        ids = list(dict.fromkeys(object_id for _, object_id in entries))
+        rows = self.queue.rows(ids)
+        payload = []
+        for object_id in ids:
+            row = rows.get(object_id)
+            payload.append({
+                'dom_id': f'{self.queue.dom_prefix}-{object_id}',
+                'sort': getattr(row, self.queue.sort_field).isoformat() if row else None,
+                'html': render_to_string(self.queue.template, {self.queue.context_name: row}, self.request) if row else None,
+            })
+        return _event('rows', {'rows': payload}, event_id=self.cursor)
+
+    def _deadline(self):
+        return time.monotonic() + self.max_seconds
+
+    def events(self):
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+        deadline = self._deadline()
+        quiet_since = time.monotonic()
+        while True:
+            message = self.poll()
+            if message:
+                yield message
+                quiet_since = time.monotonic()
+            elif time.monotonic() - quiet_since >= self.heartbeat_seconds:
+                # A comment line keeps proxies from closing an idle connection.
+                yield ': keep-alive\n\n'
+                quiet_since = time.monotonic()
+            if time.monotonic() >= deadline:
+                return
+            time.sleep(self.poll_seconds)
+
+    async def aevents(self):
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+        poll = sync_to_async(self.poll)
+        deadline = self._deadline()
+        quiet_since = time.monotonic()
+        while True:
+            message = await poll()
+            if message:
+                yield message
+                quiet_since = time.monotonic()
+            elif time.monotonic() - quiet_since >= self.heartbeat_seconds:
+                yield ': keep-alive\n\n'
+                quiet_since = time.monotonic()
+            if time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(self.poll_seconds)
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from CarRentalApp.archive import archive_requests, archive_transactions, prune_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves finished rentals (with their payments and requests) older than the archive "
+        "threshold into the archive tables, and deletes read notifications past their retention TTL. "
+        "Works in batches; safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=getattr(settings, 'RENTAL_ARCHIVE_AFTER_DAYS', 365),
+            help="Archive rentals that ended more than this many days ago.",
+        )
+        parser.add_argument(
+            '--notification-ttl-days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+            help="Delete read notifications older than this many days.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=getattr(settings, 'RENTAL_ARCHIVE_BATCH_SIZE', 500),
+        )
+        parser.add_argument('--skip-notifications', action='store_true', help="Only archive rentals.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = timezone.localdate() - timedelta(days=options['older_than_days'])
+
+        # 1. Transactions and their payments.
+        transactions = payments = 0
+        for archived, archived_payments in archive_transactions(cutoff, batch_size):
+            transactions += archived
+            payments += archived_payments
+            self.stdout.write(f"  archived {transactions} transactions, {payments} payments so far")
+
+        # 2. Requests whose rentals are over.
+        requests = 0
+        for archived in archive_requests(cutoff, batch_size):
+            requests += archived
+            self.stdout.write(f"  archived {requests} requests so far")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {transactions} transactions, {payments} payments and {requests} requests "
+            f"that ended before {cutoff}."
+        ))
+
+        # 3. Notification retention.
+        if options['skip_notifications']:
+            return
+        notification_cutoff = timezone.now() - timedelta(days=options['notification_ttl_days'])
+        pruned = sum(prune_notifications(notification_cutoff, batch_size))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {pruned} read notifications older than {notification_cutoff:%Y-%m-%d}."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from CarRentalApp.broadcasts import DEFAULT_CHUNK_SIZE, send_broadcast
+from CarRentalApp.models import Broadcast
+
+
+class Command(BaseCommand):
+    help = "Sends a notification to every customer, or to a segment of them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title', required=True)
+        parser.add_argument('--message', required=True)
+        parser.add_argument('--segment', default='all', choices=[choice for choice, _ in Broadcast.SEGMENT_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            broadcast = send_broadcast(
+                options['title'], options['message'], options['segment'], chunk_size=options['chunk_size']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Broadcast {broadcast.id} sent to {broadcast.recipient_count} customers."
+        ))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from CarRentalApp.catalog import build_catalog_snapshot, prune_catalog_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the offline catalog bundle (cars plus a thumbnail manifest) under MEDIA_ROOT/catalog "
+        "and points /api/catalog/version/ at it. Writes nothing when the catalog is unchanged, so it "
+        "can run from cron every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Write a new bundle even if nothing changed.")
+        parser.add_argument(
+            '--keep', type=int, default=getattr(settings, 'CATALOG_SNAPSHOT_KEEP', 3),
+            help="Number of recent bundles to keep for clients still downloading them.",
+        )
+
+    def handle(self, *args, **options):
+        pointer, written = build_catalog_snapshot(force=options['force'])
+        if not written:
+            self.stdout.write(f"Catalog unchanged; current bundle is version {pointer['version']}.")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built catalog bundle {pointer['version']}: {pointer['car_count']} cars, "
+            f"{pointer['thumbnail_count']} thumbnails, {pointer['bytes'] / 1024:.1f} KiB -> {pointer['name']}"
+        ))
+        bundles, thumbnails = prune_catalog_snapshots(options['keep'])
+        if bundles or thumbnails:
+            self.stdout.write(f"  removed {bundles} old bundles and {thumbnails} unused thumbnails")
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from CarRentalApp.changelog import compact_change_log
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacts the change feed: entries older than the retention horizon are deleted when a "
+        "newer entry exists for the same row. Works in batches; safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=getattr(settings, 'CHANGE_LOG_RETENTION_DAYS', 30),
+            help="Only compact entries written more than this many days ago.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=getattr(settings, 'CHANGE_LOG_COMPACTION_BATCH_SIZE', 1000),
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        deleted = 0
+        for batch in compact_change_log(cutoff, options['batch_size']):
+            deleted += batch
+            self.stdout.write(f"  deleted {deleted} superseded entries so far")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} superseded change log entries written before {cutoff:%Y-%m-%d %H:%M}."
+        ))
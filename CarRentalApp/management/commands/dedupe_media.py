@@ -0,0 +1,91 @@
+import os
+import posixpath
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from CarRentalApp.models import Car
+from CarRentalApp.storage import file_digest
+
+IMAGE_DIR = 'cars'
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves existing car images into content-addressed storage, pointing cars that "
+        "used copies of the same photo at a single file, then removes unreferenced files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without touching anything.")
+        parser.add_argument('--keep-orphans', action='store_true', help="Don't delete image files no car refers to.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = default_storage
+        if not hasattr(storage, 'is_content_addressed'):
+            self.stderr.write("The default storage is not content-addressed; check STORAGES in settings.")
+            return
+
+        # 1. Group every stored image by content so the report shows the duplicates.
+        groups = defaultdict(list)
+        sizes = {}
+        for name in self._stored_images(storage):
+            with storage.open(name, 'rb') as stored:
+                digest = file_digest(stored)
+            groups[digest].append(name)
+            sizes[name] = storage.size(name)
+        duplicate_bytes = sum(sum(sizes[n] for n in names[1:]) for names in groups.values())
+        self.stdout.write(
+            f"{len(sizes)} files, {len(groups)} unique images, {duplicate_bytes} bytes in duplicate copies."
+        )
+
+        # 2. Re-save each car's image through the storage; identical photos collapse onto one blob.
+        migrated = 0
+        for car in Car.objects.exclude(image='').exclude(image__isnull=True).order_by('id'):
+            name = car.image.name
+            if storage.is_content_addressed(name):
+                continue
+            if not storage.exists(name):
+                self.stderr.write(f"Car {car.id}: image '{name}' is missing, skipped.")
+                continue
+            migrated += 1
+            if dry_run:
+                self.stdout.write(f"Car {car.id}: would move '{name}' into content-addressed storage.")
+                continue
+            with storage.open(name, 'rb') as stored:
+                new_name = storage.save(posixpath.join(IMAGE_DIR, os.path.basename(name)), File(stored))
+            car.image.name = new_name
+            # Saving releases the old file once nothing else references it (see signals.py).
+            car.save(update_fields=['image', 'updated_at'])
+            self.stdout.write(f"Car {car.id}: '{name}' -> '{new_name}'")
+
+        # 3. Sweep files that no car points at (left behind by earlier deletes and edits).
+        #    Files an upload has just stored or reused may belong to a car not committed yet.
+        removed = 0
+        if not options['keep_orphans']:
+            grace = getattr(settings, 'MEDIA_RELEASE_GRACE_SECONDS', 3600)
+            referenced = set(Car.objects.exclude(image='').values_list('image', flat=True))
+            for name in self._stored_images(storage):
+                if name in referenced:
+                    continue
+                if dry_run:
+                    removed += 1
+                    self.stdout.write(f"Would remove unreferenced '{name}'.")
+                elif storage.delete_if_idle(name, grace):
+                    removed += 1
+
+        if dry_run:
+            self.stdout.write(f"Dry run: {migrated} car images to migrate, {removed} unreferenced files to remove.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Migrated {migrated} car images, removed {removed} unreferenced files."))
+
+    def _stored_images(self, storage):
+        if not storage.exists(IMAGE_DIR):
+            return []
+        _, files = storage.listdir(IMAGE_DIR)
+        return [posixpath.join(IMAGE_DIR, filename) for filename in sorted(files)]
+
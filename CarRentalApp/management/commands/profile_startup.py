@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under -X importtime: times django.setup() and
+# each AppConfig.ready(), optionally the warm-up, and prints the result as JSON.
+CHILD_SCRIPT = """
+import json, os, sys, time
+os.environ['DJANGO_SETTINGS_MODULE'] = sys.argv[1]
+from django.apps.config import AppConfig
+
+ready_times = {}
+original_create = AppConfig.create.__func__
+
+def create(cls, entry):
+    app_config = original_create(cls, entry)
+    ready = app_config.ready
+    def timed_ready():
+        start = time.perf_counter()
+        try:
+            ready()
+        finally:
+            ready_times[app_config.name] = time.perf_counter() - start
+    app_config.ready = timed_ready
+    return app_config
+
+AppConfig.create = classmethod(create)
+
+import django
+start = time.perf_counter()
+django.setup()
+result = {'setup': time.perf_counter() - start, 'ready': ready_times, 'warmup': []}
+if sys.argv[2] == '1':
+    from CarRentalApp.warmup import warm_up
+    result['warmup'] = [[name, seconds] for name, _, seconds in warm_up()]
+print(json.dumps(result))
+"""
+
+
+def parse_importtime(stderr):
+    """Parses `-X importtime` output into (module, self_us, cumulative_us) tuples."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        modules.append((module.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures cold start in a fresh interpreter: slowest imports, import time per top-level "
+        "package, django.setup() and each AppConfig.ready(), and optionally the warm-up steps."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help="How many of the slowest modules to list.")
+        parser.add_argument('--warmup', action='store_true', help="Also time the warm-up steps.")
+
+    def handle(self, *args, **options):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT,
+             os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE), '1' if options['warmup'] else '0'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"Startup failed:\n{completed.stderr[-2000:]}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(completed.stderr)
+
+        # 1. Slowest individual imports (cumulative, so a package includes what it pulls in).
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Slowest imports (top {options['top']}, cumulative ms):"))
+        for module, _, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:9.1f}  {module}")
+
+        # 2. Self time summed per top-level package, which adds up to the total import time.
+        per_package = defaultdict(int)
+        for module, self_us, _ in modules:
+            per_package[module.split('.')[0]] += self_us
+        self.stdout.write(self.style.MIGRATE_HEADING("Import time per top-level package (self ms):"))
+        for package, self_us in sorted(per_package.items(), key=lambda p: p[1], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {self_us / 1000:9.1f}  {package}")
+        total_import_ms = sum(per_package.values()) / 1000
+
+        # 3. App start-up.
+        self.stdout.write(self.style.MIGRATE_HEADING("AppConfig.ready() (ms):"))
+        for app, seconds in sorted(result['ready'].items(), key=lambda r: r[1], reverse=True):
+            self.stdout.write(f"  {seconds * 1000:9.1f}  {app}")
+
+        if result['warmup']:
+            self.stdout.write(self.style.MIGRATE_HEADING("Warm-up steps (ms):"))
+            for name, seconds in result['warmup']:
+                self.stdout.write(f"  {seconds * 1000:9.1f}  {name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Total import time {total_import_ms:.1f} ms; django.setup() {result['setup'] * 1000:.1f} ms."
+        ))
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from CarRentalApp.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes chunked car photo uploads that were started long ago and never attached to a car, "
+        "together with their partial files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours', type=int, default=getattr(settings, 'CHUNKED_UPLOAD_EXPIRY_HOURS', 24),
+            help="Delete uploads started more than this many hours ago.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        pruned = prune_uploads(cutoff)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {pruned} uploads started before {cutoff:%Y-%m-%d %H:%M}."))
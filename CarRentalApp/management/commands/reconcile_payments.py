@@ -0,0 +1,50 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from CarRentalApp.reconciliation import RESULT_HEADER, STATUSES, Reconciliation, ReconciliationError
+
+
+class Command(BaseCommand):
+    help = (
+        "Matches a settlement CSV (reference, amount and date columns) against recorded payments "
+        "and writes every line's outcome - matched, missing or duplicate - to a result CSV. "
+        "Reads the file in date partitions, so memory stays flat however long it is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('settlement_file', help="Settlement CSV from the payment processor.")
+        parser.add_argument('--output', default='-', help="Result CSV path ('-' for stdout, the default).")
+        parser.add_argument('--method', help="Only reconcile payments with this method (e.g. Card).")
+        parser.add_argument(
+            '--date-tolerance-days', type=int,
+            help="Largest gap between settlement and payment dates (default RECONCILE_DATE_TOLERANCE_DAYS).",
+        )
+        parser.add_argument(
+            '--amount-tolerance',
+            help="Largest amount difference, e.g. 0.50 (default RECONCILE_AMOUNT_TOLERANCE).",
+        )
+
+    def handle(self, *args, **options):
+        output = None
+        try:
+            with open(options['settlement_file'], newline='', encoding='utf-8-sig') as settlement:
+                reconciliation = Reconciliation(
+                    settlement,
+                    method=options['method'],
+                    date_tolerance_days=options['date_tolerance_days'],
+                    amount_tolerance=options['amount_tolerance'],
+                )
+                output = self.stdout if options['output'] == '-' else open(options['output'], 'w', newline='', encoding='utf-8')
+                writer = csv.writer(output)
+                writer.writerow(RESULT_HEADER)
+                for row in reconciliation.rows():
+                    writer.writerow(row)
+        except (OSError, ReconciliationError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if output is not None and output is not self.stdout:
+                output.close()
+
+        summary = ', '.join(f"{reconciliation.counts[status]} {status}" for status in STATUSES)
+        self.stderr.write(self.style.SUCCESS(f"Reconciled {options['settlement_file']}: {summary}."))
@@ -0,0 +1,47 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the primary SQLite database into every replica file listed in "
+        "DATABASE_REPLICAS, once or every --interval seconds. Intended for running "
+        "the read-replica setup locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0, help="Repeat every N seconds (default: run once).")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("snapshot_replicas only supports SQLite databases.")
+        if not replicas:
+            raise CommandError("No replicas configured; set DATABASE_REPLICA_PATHS.")
+
+        while True:
+            start = time.perf_counter()
+            for alias in replicas:
+                self.snapshot(str(primary['NAME']), str(settings.DATABASES[alias]['NAME']))
+            self.stdout.write(f"Snapshotted {len(replicas)} replica(s) in {time.perf_counter() - start:.3f}s.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def snapshot(self, primary_path, replica_path):
+        # Back up into a temp file and swap it in, so readers never open a half-written replica.
+        temp_path = f"{replica_path}.tmp"
+        source = sqlite3.connect(primary_path)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        os.replace(temp_path, replica_path)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from CarRentalApp.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-compiles templates, populates the URL resolver, builds serializer field maps and "
+        "primes the catalog and image fingerprint caches, reporting how long each step took."
+    )
+
+    def handle(self, *args, **options):
+        total = 0.0
+        for name, items, seconds in warm_up():
+            total += seconds
+            if items is None:
+                self.stdout.write(self.style.ERROR(f"  {name}: failed after {seconds:.3f}s (see log)"))
+            else:
+                self.stdout.write(f"  {name}: {items} in {seconds:.3f}s")
+        self.stdout.write(self.style.SUCCESS(f"Warm-up finished in {total:.3f}s."))
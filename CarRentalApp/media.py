@@ -0,0 +1,160 @@
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+# --------------------------------------------------------------------------
+# PRODUCTION MEDIA SERVING
+# Replaces django.views.static.serve for uploaded car images: strong ETags,
+# immutable caching for fingerprinted URLs, single byte-range requests and an
+# optional X-Sendfile / X-Accel-Redirect mode that hands the file body to the
+# front-end web server.
+# --------------------------------------------------------------------------
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STREAM_BLOCK_SIZE = 64 * 1024
+
+range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _parse_range(header, size):
+    """
+    Parses a single-range 'Range: bytes=...' header.
+    Returns (start, end) inclusive, None to serve the whole file (absent,
+    malformed or multi-range headers), or False when it cannot be satisfied.
+    """
+    match = range_re.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, last_modified):
+    # A Range is only honoured when If-Range (if sent) still names the current file.
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and int(last_modified) <= if_range_date
+
+
+def _stream_range(path, start, length):
+    with open(path, 'rb') as media_file:
+        media_file.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = media_file.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+@require_safe
+def serve_media(request, path):
+    """Serves one uploaded file from MEDIA_ROOT."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        statobj = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Media file not found.')
+    if not stat.S_ISREG(statobj.st_mode):
+        raise Http404('Media file not found.')
+
+    fingerprint = getattr(default_storage, 'fingerprint', None)
+    fingerprint = fingerprint(path) if fingerprint else None
+    etag = f'"{fingerprint}"' if fingerprint else None
+    last_modified = statobj.st_mtime
+    size = statobj.st_size
+
+    # Fingerprinted URLs never change content, so they can be cached forever.
+    if fingerprint and request.GET.get('v') == fingerprint:
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f"public, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}"
+
+    # If-None-Match / If-Modified-Since -> 304, If-Match / If-Unmodified-Since -> 412.
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        response = _build_media_response(request, fullpath, path, size, etag, last_modified)
+
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Last-Modified'] = http_date(last_modified)
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+def _build_media_response(request, fullpath, path, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    sendfile_mode = getattr(settings, 'MEDIA_SENDFILE_MODE', None)
+    if sendfile_mode:
+        # The front-end server reads the file and handles Range itself.
+        response = HttpResponse(content_type=content_type)
+        if sendfile_mode == 'x-accel-redirect':
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + path
+        elif sendfile_mode == 'x-sendfile':
+            response.headers['X-Sendfile'] = fullpath
+        else:
+            raise ValueError(f"Unknown MEDIA_SENDFILE_MODE '{sendfile_mode}'.")
+        # The front-end server sets the real length; don't let Django claim 0 bytes.
+        del response.headers['Content-Length']
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    byte_range = None
+    if _if_range_matches(request, etag, last_modified):
+        byte_range = _parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _stream_range(fullpath, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.headers['Content-Length'] = str(length)
+
+    response.headers['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
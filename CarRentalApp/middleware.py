@@ -0,0 +1,76 @@
+import secrets
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; without it API responses are gzip-only.
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+# Metadata meta-blocks written with a one-byte length carry at most this many bytes.
+MAX_METADATA_BYTES = 256
+
+
+def compress_brotli(data, quality, max_random_bytes):
+    """
+    Brotli-compresses data, padded like Django's gzip output (BREACH mitigation): up to
+    max_random_bytes random bytes go into a metadata meta-block, which decoders skip.
+    """
+    compressor = brotli.Compressor(quality=quality)
+    # flush() leaves the stream byte-aligned, where a new meta-block can start.
+    stream = compressor.process(data) + compressor.flush()
+    if max_random_bytes:
+        length = secrets.randbelow(min(max_random_bytes, MAX_METADATA_BYTES)) + 1
+        # ISLAST=0, MNIBBLES=0 (metadata), reserved bit, MSKIPBYTES=1, MSKIPLEN-1 (RFC 7932, section 9.2).
+        stream += (0b010110 | (length - 1) << 6).to_bytes(2, 'little') + secrets.token_bytes(length)
+    # An empty last meta-block (ISLAST=1, ISLASTEMPTY=1) ends the stream.
+    return stream + b'\x03'
+
+
+class ApiCompressionMiddleware(GZipMiddleware):
+    """
+    Compresses API responses with Brotli or gzip, depending on what the client accepts.
+    Only paths under COMPRESSION_PATH_PREFIXES whose body is at least
+    COMPRESSION_MIN_SIZE bytes are compressed; everything else passes through.
+    """
+
+    def process_response(self, request, response):
+        prefixes = getattr(settings, 'COMPRESSION_PATH_PREFIXES', ('/api/',))
+        if not request.path.startswith(tuple(prefixes)):
+            return response
+
+        # Streaming bodies have no known size up front, so only buffered ones are size-checked.
+        min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        if (
+            brotli is not None
+            and not response.streaming
+            and not response.has_header('Content-Encoding')
+            and re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            compressed_content = compress_brotli(
+                response.content,
+                quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5),
+                max_random_bytes=self.max_random_bytes,
+            )
+            # Return the compressed content only if it's actually shorter.
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+            etag = response.get('ETag')
+            if etag and etag.startswith('"'):
+                response.headers['ETag'] = 'W/' + etag
+            response.headers['Content-Encoding'] = 'br'
+            return response
+
+        return super().process_response(request, response)
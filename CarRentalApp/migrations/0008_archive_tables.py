@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarRentalApp', '0007_car_updated_at_notification_updated_at_tableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_id', models.BigIntegerField(db_index=True)),
+                ('amount_paid', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_date', models.DateField()),
+                ('method', models.CharField(max_length=50)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRentalRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('car_id', models.BigIntegerField(db_index=True)),
+                ('car_description', models.CharField(max_length=255)),
+                ('customer_id', models.BigIntegerField(db_index=True)),
+                ('request_date', models.DateTimeField()),
+                ('pickup_date', models.DateField()),
+                ('return_date', models.DateField()),
+                ('status', models.CharField(max_length=10)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRentalTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('car_id', models.BigIntegerField(db_index=True)),
+                ('car_description', models.CharField(max_length=255)),
+                ('customer_id', models.BigIntegerField(db_index=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('total_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(max_length=20)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
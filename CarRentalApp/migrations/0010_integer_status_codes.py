@@ -0,0 +1,102 @@
+from django.db import migrations, models
+
+# Status strings were written with mixed spellings ('Available' vs 'AVAILABLE',
+# a stray 'PENDING' on transactions), so matching is case-insensitive and
+# unknown values fall back to the model's default status.
+STATUS_CODES = {
+    'car': ({'available': 1, 'rented': 2, 'maintenance': 3}, 1),
+    'rentaltransaction': ({'ongoing': 1, 'completed': 2, 'cancelled': 3, 'canceled': 3, 'pending': 1}, 1),
+    'rentalrequest': (
+        {'pending': 1, 'approved': 2, 'rejected': 3, 'cancelled': 4, 'canceled': 4, 'completed': 5}, 1,
+    ),
+}
+
+# Spellings written back when migrating backwards (the ones the old choices used).
+LEGACY_STATUSES = {
+    'car': {1: 'Available', 2: 'Rented', 3: 'Maintenance'},
+    'rentaltransaction': {1: 'Ongoing', 2: 'Completed', 3: 'Cancelled'},
+    'rentalrequest': {1: 'PENDING', 2: 'APPROVED', 3: 'REJECTED', 4: 'CANCELLED', 5: 'COMPLETED'},
+}
+
+
+def encode_statuses(apps, schema_editor):
+    for model_name, (codes, default) in STATUS_CODES.items():
+        model = apps.get_model('CarRentalApp', model_name)
+        for legacy in model.objects.values_list('status', flat=True).distinct():
+            code = codes.get((legacy or '').strip().casefold(), default)
+            model.objects.filter(status=legacy).update(status_code=code)
+
+
+def decode_statuses(apps, schema_editor):
+    for model_name, legacy_statuses in LEGACY_STATUSES.items():
+        model = apps.get_model('CarRentalApp', model_name)
+        for code, legacy in legacy_statuses.items():
+            model.objects.filter(status_code=code).update(status=legacy)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarRentalApp', '0009_broadcast_notifications'),
+    ]
+
+    operations = [
+        # 1. Add the integer columns next to the string ones and fill them.
+        migrations.AddField(
+            model_name='car',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='rentaltransaction',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='rentalrequest',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(encode_statuses, decode_statuses),
+
+        # 2. Swap them in for the string columns.
+        migrations.RemoveField(model_name='car', name='status'),
+        migrations.RemoveField(model_name='rentaltransaction', name='status'),
+        migrations.RemoveField(model_name='rentalrequest', name='status'),
+        migrations.RenameField(model_name='car', old_name='status_code', new_name='status'),
+        migrations.RenameField(model_name='rentaltransaction', old_name='status_code', new_name='status'),
+        migrations.RenameField(model_name='rentalrequest', old_name='status_code', new_name='status'),
+        migrations.AlterField(
+            model_name='car',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Available'), (2, 'Rented'), (3, 'Maintenance')], db_index=True, default=1),
+        ),
+        migrations.AlterField(
+            model_name='rentaltransaction',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Ongoing'), (2, 'Completed'), (3, 'Cancelled')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='rentalrequest',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'Approved'), (3, 'Rejected'), (4, 'Cancelled'), (5, 'Completed')], default=1, help_text='Current status of the rental request.'),
+        ),
+
+        # 3. Indexes for the hot status filters.
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(fields=['status', 'end_date'], name='transaction_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(fields=['car', 'status'], name='transaction_car_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(fields=['status', 'pickup_date'], name='request_status_pickup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(fields=['car', 'status'], name='request_car_status_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarRentalApp', '0012_branches'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['created_at'], name='notification_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentalrequest',
+            index=models.Index(fields=['pickup_date'], name='request_pickup_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rentaltransaction',
+            index=models.Index(fields=['end_date'], name='transaction_end_date_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:43
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CarRentalApp', '0015_image_uploads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor_type', models.CharField(choices=[('staff', 'Staff user'), ('customer', 'Customer'), ('system', 'System')], max_length=10)),
+                ('actor_id', models.BigIntegerField(blank=True, null=True)),
+                ('actor', models.CharField(blank=True, max_length=255)),
+                ('action', models.CharField(max_length=50)),
+                ('object_type', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('changes', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['object_type', 'object_id', '-created_at'], name='audit_object_idx'), models.Index(fields=['created_at'], name='audit_created_idx')],
+            },
+        ),
+    ]
@@ -1,20 +1,54 @@
-from django.db import models
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, router, transaction
 from django.utils import timezone
 
+from .statuses import CarStatus, RequestStatus, TransactionStatus
 
-class Car(models.Model):
-    STATUS_CHOICES = [
-        ("Available", "Available"),
-        ("Rented", "Rented"),
-        ("Maintenance", "Maintenance"),
-    ]
+
+class ChangeLoggedModel(models.Model):
+    """
+    Base for models whose writes go to the change feed (ChangeLogEntry, written by
+    the post_save/post_delete receivers in signals.py). save() runs in a transaction
+    so the row and its log entry commit or roll back together; deletes, cascades
+    included, already run in one opened by Django's deletion collector.
+    queryset.update() and bulk_create() bypass the log, as they bypass TableVersion.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+class Branch(models.Model):
+    """A pick-up location. Nearest-branch and nearest-car searches go through geo.py."""
+    name = models.CharField(max_length=100, unique=True)
+    address = models.CharField(max_length=255, blank=True)
+    latitude = models.FloatField(validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Car(ChangeLoggedModel):
+    Status = CarStatus
 
     brand = models.CharField(max_length=100)
     model = models.CharField(max_length=100)
     year = models.IntegerField()
     plate_number = models.CharField(max_length=20, unique=True)
     type = models.CharField(max_length=50)  # sedan, suv, van, etc.
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Available")
+    status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.AVAILABLE, db_index=True)
     rental_rate_per_day = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='cars/', blank=True, null=True)
 
@@ -50,11 +84,46 @@ class Car(models.Model):
         default=0,
         help_text="Odometer reading in kilometers."
     )
+    # Indexed through car_branch_status_idx, which starts with this column.
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.SET_NULL,
+        related_name='cars',
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Available cars at the branches nearest to a customer.
+            models.Index(fields=['branch', 'status'], name='car_branch_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.plate_number})"
 
 
+class ImageUpload(models.Model):
+    """
+    A car photo being uploaded in chunks (see uploads.py). The bytes live in a file
+    under CHUNKED_UPLOAD_DIR, whose size is the resume offset; the row only holds
+    what the client declared up front. Deleted once attached to a car.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # Optional SHA-256 (hex) of the whole file, checked when the last chunk arrives.
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='image_uploads')
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload {self.id} - {self.filename} ({self.size} bytes)"
+
+
 class Customer(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
@@ -68,43 +137,50 @@ class Customer(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
-class RentalTransaction(models.Model):
-    STATUS_CHOICES = [
-        ("Ongoing", "Ongoing"),
-        ("Completed", "Completed"),
-        ("Cancelled", "Cancelled"),
-    ]
+class RentalTransaction(ChangeLoggedModel):
+    Status = TransactionStatus
 
     car = models.ForeignKey(Car, on_delete=models.CASCADE, related_name="rentals")
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="rentals")
     start_date = models.DateField(default=timezone.now)
     end_date = models.DateField()
     total_cost = models.DecimalField(max_digits=10, decimal_places=2)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Ongoing")
+    status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.ONGOING)
+
+    class Meta:
+        indexes = [
+            # Active rentals list (status = Ongoing ORDER BY end_date) and per-car availability.
+            models.Index(fields=['status', 'end_date'], name='transaction_status_end_idx'),
+            models.Index(fields=['car', 'status'], name='transaction_car_status_idx'),
+            # Admin date drill-down and sorting.
+            models.Index(fields=['end_date'], name='transaction_end_date_idx'),
+        ]
 
     def __str__(self):
-        return f"Transaction {self.id} - {self.car.plate_number}"
+        return f"Transaction {self.id} - car {self.car_id}"
 
 
-class Payment(models.Model):
+class Payment(ChangeLoggedModel):
     transaction = models.ForeignKey(RentalTransaction, on_delete=models.CASCADE, related_name="payments")
     amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
     payment_date = models.DateField(default=timezone.now)
     method = models.CharField(max_length=50) 
+    # The processor's transaction reference, printed on settlement files (see reconciliation.py).
+    reference = models.CharField(max_length=100, blank=True, default='', db_index=True)
+
+    class Meta:
+        indexes = [
+            # Admin date drill-down and sorting; reconciliation reads payments by date range.
+            models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ]
 
     def __str__(self):
-        return f"Payment {self.id} for Transaction {self.transaction.id}"
+        return f"Payment {self.id} for Transaction {self.transaction_id}"
     
 
 
-class RentalRequest(models.Model):
-    STATUS_CHOICES = [
-        ('PENDING', 'Pending'),
-        ('APPROVED', 'Approved'),
-        ('REJECTED', 'Rejected'),
-        ('CANCELLED', 'Cancelled'),
-        ('COMPLETED', 'Completed'),
-    ]
+class RentalRequest(ChangeLoggedModel):
+    Status = RequestStatus
 
     car = models.ForeignKey(
         'Car', 
@@ -124,27 +200,206 @@ class RentalRequest(models.Model):
     )
     pickup_date = models.DateField()
     return_date = models.DateField()
-    status = models.CharField(
-        max_length=10, 
-        choices=STATUS_CHOICES, 
-        default='PENDING',
+    status = models.PositiveSmallIntegerField(
+        choices=Status.choices,
+        default=Status.PENDING,
         help_text="Current status of the rental request."
     )
 
+    class Meta:
+        indexes = [
+            # Pending requests list (status = Pending ORDER BY pickup_date) and per-car availability.
+            models.Index(fields=['status', 'pickup_date'], name='request_status_pickup_idx'),
+            models.Index(fields=['car', 'status'], name='request_car_status_idx'),
+            # Admin date drill-down and sorting.
+            models.Index(fields=['pickup_date'], name='request_pickup_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Request {self.id} - car {self.car_id}, customer {self.customer_id} ({self.Status(self.status).legacy})"
+
+
+class Broadcast(models.Model):
+    """A fleet-wide announcement fanned out as one Notification per recipient."""
+    SEGMENT_CHOICES = [
+        ('all', 'All customers'),
+        ('active', 'Customers with an ongoing rental'),
+        ('pending', 'Customers with a pending request'),
+    ]
+
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    segment = models.CharField(max_length=20, choices=SEGMENT_CHOICES, default='all')
+    recipient_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
     def __str__(self):
-        return f"Request for {self.car.brand} {self.car.model} by {self.customer.first_name} ({self.status})"
+        return f"Broadcast {self.id} - {self.title} ({self.recipient_count} recipients)"
 
 
 class Notification(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='notifications')
-    rental_request = models.ForeignKey(RentalRequest, on_delete=models.CASCADE, related_name='notifications')
+    # Empty for broadcast notifications, which aren't about a specific request.
+    rental_request = models.ForeignKey(RentalRequest, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
     title = models.CharField(max_length=255)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A customer's feed, newest first, and their unread count.
+            models.Index(fields=['customer', '-created_at'], name='notification_feed_idx'),
+            models.Index(fields=['customer', 'is_read'], name='notification_unread_idx'),
+            # Retention pruning and the admin date drill-down.
+            models.Index(fields=['created_at'], name='notification_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Notification {self.id} for customer {self.customer_id} - {self.title}"
+
+
+class TableVersion(models.Model):
+    """
+    Per-table change counter, bumped on every save/delete of a tracked model (see signals.py).
+    Lets list endpoints answer conditional GETs without reading the rows themselves.
+    """
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
+    @classmethod
+    def bump(cls, table):
+        updated = cls.objects.filter(table=table).update(
+            version=models.F('version') + 1,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            cls.objects.get_or_create(table=table, defaults={'version': 1})
+
+    @classmethod
+    def current(cls, table):
+        """Returns (version, updated_at) for a table; (0, None) if it has never changed."""
+        row = cls.objects.filter(table=table).values_list('version', 'updated_at').first()
+        return row or (0, None)
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only change feed: one row per create, update or delete of a
+    ChangeLoggedModel, holding the row's column values after the change (none for
+    deletes). The id is the cursor served by /api/changes/; see changelog.py.
+    """
+    ACTION_CHOICES = [
+        ('create', 'Created'),
+        ('update', 'Updated'),
+        ('delete', 'Deleted'),
+    ]
+
+    table = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Compaction looks up newer entries for the same row.
+            models.Index(fields=['table', 'object_id', 'id'], name='changelog_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.action} {self.table} {self.object_id}"
+
+
+class AuditLog(models.Model):
+    """
+    Who did what to which row: one entry per staff or customer action (see audit.py).
+    Entries are buffered per worker and written in batches, so created_at is when the
+    action happened, not when the row was inserted. object_id is a plain id so the
+    trail outlives the object.
+    """
+    ACTOR_CHOICES = [
+        ('staff', 'Staff user'),
+        ('customer', 'Customer'),
+        ('system', 'System'),
+    ]
+
+    actor_type = models.CharField(max_length=10, choices=ACTOR_CHOICES)
+    actor_id = models.BigIntegerField(null=True, blank=True)
+    # Username or email at the time of the action.
+    actor = models.CharField(max_length=255, blank=True)
+    action = models.CharField(max_length=50)
+    object_type = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    # {field: [old, new]} for edits, the row's values for creates and deletes.
+    changes = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # One object's trail, newest first.
+            models.Index(fields=['object_type', 'object_id', '-created_at'], name='audit_object_idx'),
+            # Admin date drill-down and sorting.
+            models.Index(fields=['created_at'], name='audit_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.actor or self.actor_type} {self.action} {self.object_type} {self.object_id}"
+
+
+# --------------------------------------------------------------------------
+# ARCHIVE TABLES
+# Finished rentals older than RENTAL_ARCHIVE_AFTER_DAYS are moved here by
+# `manage.py archive_rentals`, keeping the live tables (and their indexes)
+# small. Rows keep their original ids; car and customer are stored as plain
+# ids plus a car snapshot, so archived history survives later car deletions.
+# --------------------------------------------------------------------------
+
+class ArchivedRentalTransaction(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    car_id = models.BigIntegerField(db_index=True)
+    car_description = models.CharField(max_length=255)
+    customer_id = models.BigIntegerField(db_index=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    total_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archived transaction {self.id} - {self.car_description}"
+
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    transaction_id = models.BigIntegerField(db_index=True)
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_date = models.DateField()
+    method = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100, blank=True, default='')
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Archived payment {self.id} for Transaction {self.transaction_id}"
+
+
+class ArchivedRentalRequest(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    car_id = models.BigIntegerField(db_index=True)
+    car_description = models.CharField(max_length=255)
+    customer_id = models.BigIntegerField(db_index=True)
+    request_date = models.DateTimeField()
+    pickup_date = models.DateField()
+    return_date = models.DateField()
+    status = models.CharField(max_length=10)
+    archived_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return f"Notification for {self.customer.email} - {self.title}"
\ No newline at end of file
+        return f"Archived request {self.id} - {self.car_description} ({self.status})"
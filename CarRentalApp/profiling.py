@@ -0,0 +1,176 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+# --------------------------------------------------------------------------
+# PROFILING AND STAGE TIMING
+# ProfilingMiddleware is opt-in (PROFILING_ENABLED). It runs cProfile on a
+# sampled fraction of requests, or on any request from a staff user that
+# sends the X-Profile header, and writes one .pstats file per profiled
+# request (open with snakeviz, or turn into a flame graph with flameprof or
+# gprof2dot). Views named in PROFILING_TRACEMALLOC_VIEWS also get a
+# tracemalloc snapshot diff written next to it.
+#
+# StageTimer records how long each stage of a view took and logs them as a
+# single record on the 'CarRentalApp.timing' logger.
+# --------------------------------------------------------------------------
+
+timing_logger = logging.getLogger('CarRentalApp.timing')
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+TRACEMALLOC_FRAMES = 25
+TRACEMALLOC_TOP_STATS = 50
+
+
+class StageTimer:
+    """
+    Times the stages of one operation:
+
+        with StageTimer('request_approve', request_id=5) as timer:
+            with timer.stage('load_request'):
+                ...
+
+    On exit one record is logged at INFO (ERROR if an exception escaped) with the
+    per-stage milliseconds in the message and as `extra` fields for structured handlers.
+    """
+
+    def __init__(self, operation, logger=timing_logger, **context):
+        self.operation = operation
+        self.logger = logger
+        self.context = context
+        self.stages = {}
+        self.outcome = 'ok'
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = (time.perf_counter() - start) * 1000
+
+    def __exit__(self, exc_type, exc, tb):
+        total_ms = (time.perf_counter() - self._start) * 1000
+        level = logging.ERROR if exc_type else logging.INFO
+        if exc_type:
+            self.outcome = 'error'
+        if not self.logger.isEnabledFor(level):
+            return False
+        fields = [f'total={total_ms:.1f}ms']
+        fields += [f'{name}={ms:.1f}ms' for name, ms in self.stages.items()]
+        fields += [f'{key}={value}' for key, value in self.context.items()]
+        self.logger.log(
+            level,
+            '%s %s %s',
+            self.operation,
+            self.outcome,
+            ' '.join(fields),
+            extra={
+                'operation': self.operation,
+                'outcome': self.outcome,
+                'total_ms': round(total_ms, 3),
+                'stages_ms': {name: round(ms, 3) for name, ms in self.stages.items()},
+                **self.context,
+            },
+        )
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in cProfile/tracemalloc capture; must come after AuthenticationMiddleware
+    so the X-Profile header can be limited to staff users.
+    """
+
+    # tracemalloc is process-wide, so only one request is traced at a time.
+    _tracemalloc_lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            return self.get_response(request)
+
+        get_response = self._trace_memory if self._traces_memory(request) else self.get_response
+        on_demand = bool(request.META.get(PROFILE_HEADER)) and getattr(request.user, 'is_staff', False)
+        sampled = random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        if not (on_demand or sampled):
+            return get_response(request)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+
+        path = self._output_path(request, 'pstats')
+        profiler.dump_stats(path)
+        logger.info('Profiled %s %s -> %s', request.method, request.path, path)
+        if on_demand:
+            response['X-Profile-File'] = path.name
+        return response
+
+    @staticmethod
+    def _traces_memory(request):
+        # resolver_match is only set once the request reaches the view, so resolve the path here.
+        try:
+            url_name = resolve(request.path_info, getattr(request, 'urlconf', None)).url_name
+        except Resolver404:
+            return False
+        return url_name in getattr(settings, 'PROFILING_TRACEMALLOC_VIEWS', ())
+
+    def _trace_memory(self, request):
+        if tracemalloc.is_tracing() or not self._tracemalloc_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            response = self.get_response(request)
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            self._tracemalloc_lock.release()
+
+        path = self._output_path(request, 'tracemalloc.txt')
+        self._write_memory_report(path, request, before, after, current, peak)
+        after.dump(str(path.with_suffix('.snapshot')))
+        logger.info('Traced memory of %s %s (peak %.1f KiB) -> %s', request.method, request.path, peak / 1024, path)
+        return response
+
+    @staticmethod
+    def _output_path(request, suffix):
+        directory = Path(getattr(settings, 'PROFILING_OUTPUT_DIR', settings.BASE_DIR / 'profiles'))
+        directory.mkdir(parents=True, exist_ok=True)
+        url_name = (request.resolver_match.url_name if request.resolver_match else None) or 'unresolved'
+        stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+        return directory / f'{stamp}-{url_name}-{os.getpid()}.{suffix}'
+
+    @staticmethod
+    def _write_memory_report(path, request, before, after, current, peak):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+        with open(path, 'w') as report:
+            report.write(f'{request.method} {request.get_full_path()}\n')
+            report.write(f'traced memory at end: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB\n\n')
+            report.write(f'Top {TRACEMALLOC_TOP_STATS} allocation differences by line:\n')
+            for stat in stats[:TRACEMALLOC_TOP_STATS]:
+                report.write(f'{stat}\n')
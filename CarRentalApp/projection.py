@@ -0,0 +1,37 @@
+# --------------------------------------------------------------------------
+# SPARSE FIELDSETS (?fields= / ?exclude=)
+# List endpoints let the client name the fields it actually shows, e.g.
+# /api/cars/?fields=id,brand,model,rental_rate_per_day,image. The views pass
+# the selection down to values_list()/only() so unused columns are neither
+# read from the database nor serialized.
+# --------------------------------------------------------------------------
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    Returns the fields selected by ?fields= or ?exclude= (comma separated),
+    in the order of `available`. Without either parameter every field is returned.
+    Raises ValueError for unknown fields or when both parameters are given.
+    """
+    fields = request.GET.get('fields')
+    exclude = request.GET.get('exclude')
+    if fields is not None and exclude is not None:
+        raise ValueError("Use either 'fields' or 'exclude', not both.")
+    if fields is None and exclude is None:
+        return tuple(available)
+
+    names = _split(fields if fields is not None else exclude)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(unknown)}. Available fields: {', '.join(available)}."
+        )
+    if fields is not None:
+        if not names:
+            raise ValueError("'fields' must name at least one field.")
+        return tuple(name for name in available if name in names)
+    return tuple(name for name in available if name not in names)
@@ -0,0 +1,291 @@
+import csv
+import os
+import tempfile
+from collections import Counter, OrderedDict, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+from .models import Payment
+
+# --------------------------------------------------------------------------
+# PAYMENT RECONCILIATION
+# Matches a processor's settlement CSV against Payment rows (`manage.py
+# reconcile_payments`, POST /cars/payments/reconcile/). Files run to hundreds
+# of thousands of lines, so this is a partitioned hash join rather than a
+# lookup per line:
+#
+#   1. The CSV is read once and every valid line is spilled to a temporary
+#      file for its RECONCILE_PARTITION_DAYS date partition.
+#   2. Partitions are joined in date order. Each one loads only the payments
+#      dated within its range plus the date tolerance (one query on
+#      payment_date_idx), hashes them by reference and by amount, and probes
+#      them with its settlement lines.
+#
+# Memory is bounded by one partition, never by the whole file or table.
+# Lines match on reference first; lines without one (or whose reference is
+# unknown) fall back to amount within RECONCILE_AMOUNT_TOLERANCE and date
+# within RECONCILE_DATE_TOLERANCE_DAYS, closest candidate first.
+# --------------------------------------------------------------------------
+
+MATCHED = 'matched'
+MISSING_PAYMENT = 'missing_payment'          # settled, but no payment recorded
+MISSING_SETTLEMENT = 'missing_settlement'    # payment recorded, but never settled
+DUPLICATE_SETTLEMENT = 'duplicate_settlement'
+DUPLICATE_PAYMENT = 'duplicate_payment'
+INVALID = 'invalid'
+STATUSES = (MATCHED, MISSING_PAYMENT, MISSING_SETTLEMENT, DUPLICATE_SETTLEMENT, DUPLICATE_PAYMENT, INVALID)
+
+RESULT_HEADER = ['status', 'line', 'reference', 'amount', 'date', 'payment_id', 'transaction_id', 'note']
+
+# Accepted spellings of the three columns, compared case-insensitively ('Settlement Date' is settlement_date).
+COLUMN_ALIASES = {
+    'reference': ('reference', 'ref', 'reference_id', 'transaction_reference', 'transaction_ref'),
+    'amount': ('amount', 'amount_paid', 'settled_amount', 'gross_amount'),
+    'date': ('date', 'settlement_date', 'payment_date', 'transaction_date'),
+}
+
+# Spill files kept open at once; the rest are reopened in append mode when needed.
+MAX_OPEN_PARTITIONS = 64
+
+CENT = Decimal('0.01')
+
+
+class ReconciliationError(ValueError):
+    """The file can't be reconciled at all (missing columns); per-line problems are reported as 'invalid' rows."""
+
+
+def parse_amount(value):
+    """Amount in cents, or None. Accepts thousands separators and a leading currency sign."""
+    text = (value or '').strip().replace(',', '').lstrip('$₱')
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite():
+        return None
+    try:
+        return int(amount.quantize(CENT) * 100)
+    except InvalidOperation:
+        # More digits than the decimal context holds (e.g. 1e30).
+        return None
+
+
+def parse_date(value):
+    """ISO date, or the date part of an ISO datetime; None when unparseable."""
+    try:
+        return date.fromisoformat((value or '').strip()[:10])
+    except ValueError:
+        return None
+
+
+def _cents(amount):
+    return f'{Decimal(amount) / 100:.2f}'
+
+
+def _columns(header):
+    normalized = {name.strip().lower().replace(' ', '_').replace('-', '_'): index for index, name in enumerate(header or [])}
+    columns = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        columns[column] = next((normalized[alias] for alias in aliases if alias in normalized), None)
+    missing = [column for column in ('amount', 'date') if columns[column] is None]
+    if missing:
+        raise ReconciliationError(f"Settlement file has no {' or '.join(missing)} column.")
+    return columns
+
+
+class _Spill:
+    """Per-partition temporary files with a small LRU of open handles."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.handles = OrderedDict()
+
+    def path(self, partition):
+        return os.path.join(self.directory, f'{partition}.csv')
+
+    def write(self, partition, row):
+        handle = self.handles.pop(partition, None)
+        if handle is None:
+            if len(self.handles) >= MAX_OPEN_PARTITIONS:
+                self.handles.popitem(last=False)[1].close()
+            handle = open(self.path(partition), 'a', newline='', encoding='utf-8')
+        self.handles[partition] = handle
+        csv.writer(handle).writerow(row)
+
+    def read(self, partition):
+        self.close()
+        path = self.path(partition)
+        if not os.path.exists(path):
+            return
+        with open(path, newline='', encoding='utf-8') as handle:
+            for line, reference, amount, day in csv.reader(handle):
+                yield int(line), reference, int(amount), date.fromisoformat(day)
+
+    def close(self):
+        while self.handles:
+            self.handles.popitem()[1].close()
+
+
+class Reconciliation:
+    """
+    One reconciliation run over a settlement file (any iterable of CSV text lines).
+    Iterate rows() for the result rows (RESULT_HEADER order); `counts` holds the
+    per-status totals once it is exhausted.
+    """
+
+    def __init__(self, lines, method=None, date_tolerance_days=None, amount_tolerance=None, partition_days=None):
+        self.lines = lines
+        self.method = method
+        if date_tolerance_days is None:
+            date_tolerance_days = getattr(settings, 'RECONCILE_DATE_TOLERANCE_DAYS', 2)
+        if amount_tolerance is None:
+            amount_tolerance = getattr(settings, 'RECONCILE_AMOUNT_TOLERANCE', '0.00')
+        self.date_tolerance = timedelta(days=int(date_tolerance_days))
+        self.amount_tolerance = parse_amount(str(amount_tolerance))
+        if self.amount_tolerance is None or self.amount_tolerance < 0 or self.date_tolerance.days < 0:
+            raise ReconciliationError("Tolerances must be non-negative numbers.")
+        self.partition_days = max(int(partition_days or getattr(settings, 'RECONCILE_PARTITION_DAYS', 7)), 1)
+        # Amount hash buckets are as wide as the tolerance, so a match is always in a neighbouring bucket.
+        self.bucket_width = self.amount_tolerance + 1
+        self.counts = Counter()
+
+    def _result(self, status, line='', reference='', amount=None, day=None, payment=None, note=''):
+        self.counts[status] += 1
+        if payment is not None:
+            amount = amount if amount is not None else payment['cents']
+            day = day or payment['payment_date']
+            reference = reference or payment['reference']
+        return [
+            status, line, reference,
+            _cents(amount) if amount is not None else '',
+            day.isoformat() if day else '',
+            payment['id'] if payment else '',
+            payment['transaction_id'] if payment else '',
+            note,
+        ]
+
+    def _partition(self, day):
+        return day.toordinal() // self.partition_days
+
+    def _partition_range(self, partition):
+        start = date.fromordinal(max(partition * self.partition_days, 1))
+        return start, start + timedelta(days=self.partition_days)
+
+    # 1. Partition pass -----------------------------------------------------
+
+    def _split(self, spill):
+        """Spills valid lines to their partitions, yielding 'invalid' rows, and records the first and last dates."""
+        reader = csv.reader(self.lines)
+        columns = _columns(next(reader, None))
+        first = last = None
+        for line, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            cells = {
+                column: row[index] if index is not None and index < len(row) else ''
+                for column, index in columns.items()
+            }
+            reference, amount, day = cells['reference'].strip(), parse_amount(cells['amount']), parse_date(cells['date'])
+            if amount is None or day is None:
+                yield self._result(INVALID, line, reference, note='Unreadable amount.' if amount is None else 'Unreadable date.')
+                continue
+            spill.write(self._partition(day), (line, reference, amount, day.isoformat()))
+            first = day if first is None or day < first else first
+            last = day if last is None or day > last else last
+        self.first, self.last = first, last
+
+    # 2. Join pass ------------------------------------------------------------
+
+    def _payments(self, start, end):
+        payments = Payment.objects.filter(payment_date__gte=start, payment_date__lt=end)
+        if self.method:
+            payments = payments.filter(method__iexact=self.method)
+        for payment in payments.values('id', 'transaction_id', 'amount_paid', 'payment_date', 'reference').iterator():
+            payment['cents'] = int(payment['amount_paid'] * 100)
+            yield payment
+
+    def _fits(self, payment, amount, day):
+        return (
+            abs(payment['cents'] - amount) <= self.amount_tolerance
+            and abs(payment['payment_date'] - day) <= self.date_tolerance
+        )
+
+    def _closest(self, candidates, amount, day):
+        # Payments without a reference first: one with a reference is better left to its own line.
+        return min(
+            candidates,
+            key=lambda payment: (
+                bool(payment['reference']), abs(payment['payment_date'] - day), abs(payment['cents'] - amount), payment['id'],
+            ),
+            default=None,
+        )
+
+    def _join(self, spill, partition, matched):
+        start, end = self._partition_range(partition)
+        by_reference = defaultdict(list)
+        by_amount = defaultdict(list)
+        window = list(self._payments(start - self.date_tolerance, end + self.date_tolerance))
+        for payment in window:
+            if payment['reference']:
+                by_reference[payment['reference']].append(payment)
+            by_amount[payment['cents'] // self.bucket_width].append(payment)
+
+        for line, reference, amount, day in spill.read(partition):
+            same_reference = [p for p in by_reference.get(reference, ()) if self._fits(p, amount, day)] if reference else []
+            if same_reference:
+                open_payments = [p for p in same_reference if p['id'] not in matched]
+                payment = self._closest(open_payments, amount, day)
+                if payment is None:
+                    yield self._result(DUPLICATE_SETTLEMENT, line, reference, amount, day, same_reference[0],
+                                       note='Reference already settled by an earlier line.')
+                    continue
+                matched[payment['id']] = payment['payment_date']
+                yield self._result(MATCHED, line, reference, amount, day, payment)
+                # The same reference recorded more than once: the other payments were never settled on their own.
+                for other in open_payments:
+                    if other is not payment:
+                        matched[other['id']] = other['payment_date']
+                        yield self._result(DUPLICATE_PAYMENT, payment=other, note=f"Same reference as payment {payment['id']}.")
+                continue
+
+            bucket = amount // self.bucket_width
+            candidates = [
+                p for key in (bucket - 1, bucket, bucket + 1) for p in by_amount.get(key, ())
+                if p['id'] not in matched and not (reference and p['reference']) and self._fits(p, amount, day)
+            ]
+            payment = self._closest(candidates, amount, day)
+            if payment is None:
+                yield self._result(MISSING_PAYMENT, line, reference, amount, day)
+                continue
+            matched[payment['id']] = payment['payment_date']
+            yield self._result(MATCHED, line, reference, amount, day, payment, note='Matched on amount and date.')
+
+        # Payments no later partition can still match (their date + tolerance is before the next
+        # partition starts) are reported now; the last partition reports everything left.
+        report_until = end - self.date_tolerance if partition < self._partition(self.last) else date.max
+        for payment in window:
+            if (payment['id'] not in matched and self.first <= payment['payment_date'] <= self.last
+                    and payment['payment_date'] < report_until):
+                matched[payment['id']] = payment['payment_date']
+                yield self._result(MISSING_SETTLEMENT, payment=payment)
+
+        # Only payments inside the next partition's window can come up again.
+        horizon = end - self.date_tolerance
+        for payment_id in [payment_id for payment_id, day in matched.items() if day < horizon]:
+            del matched[payment_id]
+
+    def rows(self):
+        with tempfile.TemporaryDirectory(prefix='reconcile-') as directory:
+            spill = _Spill(directory)
+            try:
+                yield from self._split(spill)
+                if self.first is None:
+                    return
+                # Payment ids already used, carried between neighbouring partitions.
+                matched = {}
+                for partition in range(self._partition(self.first), self._partition(self.last) + 1):
+                    yield from self._join(spill, partition, matched)
+            finally:
+                spill.close()
@@ -2,12 +2,32 @@ from rest_framework import serializers
 from .models import Car, Customer, RentalTransaction, Payment
 from django.db import transaction
 
+
+class LegacyStatusField(serializers.ChoiceField):
+    """Integer status code exposed as its legacy string ('Available', 'Ongoing', 'PENDING')."""
+
+    def __init__(self, status_class, **kwargs):
+        self.status_class = status_class
+        self.legacy_by_code = {member.value: member.legacy for member in status_class}
+        super().__init__(choices=[(legacy, legacy) for legacy in self.legacy_by_code.values()], **kwargs)
+
+    def to_representation(self, value):
+        return self.legacy_by_code[value]
+
+    def to_internal_value(self, data):
+        try:
+            return self.status_class.from_legacy(data)
+        except ValueError:
+            self.fail('invalid_choice', input=data)
+
 # --------------------------------------------------------------------------
 # CORE DATA SERIALIZERS (Standard CRUD and Staff Management)
 # --------------------------------------------------------------------------
 
 class CarSerializer(serializers.ModelSerializer):
     """Serializer for the Car model, used for inventory and API listings."""
+    status = LegacyStatusField(Car.Status, required=False)
+
     class Meta:
         model = Car
         fields = [
@@ -25,7 +45,8 @@ class CarSerializer(serializers.ModelSerializer):
             'transmission',
             'color',
             'engine_size',
-            'mileage'
+            'mileage',
+            'branch'
         ]
 
 
@@ -76,7 +97,7 @@ class CustomerSubmissionSerializer(serializers.ModelSerializer):
 class RentalRequestSubmissionSerializer(serializers.ModelSerializer):
     """
     Main serializer for handling mobile app requests. It includes nested customer data,
-    validates the car ID, and enforces the creation of a 'PENDING' transaction.
+    validates the car ID, and enforces the creation of an 'Ongoing' transaction.
     """
     customer = CustomerSubmissionSerializer() 
     car_id = serializers.IntegerField(write_only=True) 
@@ -111,7 +132,7 @@ class RentalRequestSubmissionSerializer(serializers.ModelSerializer):
             rental = RentalTransaction.objects.create(
                 car=car_instance,
                 customer=customer_instance,
-                status='PENDING',
+                status=RentalTransaction.Status.ONGOING,
                 **validated_data
             )
             return rental
@@ -126,6 +147,7 @@ class RentalTransactionSerializer(serializers.ModelSerializer):
     customer = CustomerSerializer(read_only=True)
     car_id = serializers.IntegerField(write_only=True)
     customer_id = serializers.IntegerField(write_only=True)
+    status = LegacyStatusField(RentalTransaction.Status, required=False)
     
     class Meta:
         model = RentalTransaction
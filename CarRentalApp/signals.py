@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .availability import invalidate_car
+from .changelog import CHANGE_LOGGED_MODELS, record_change
+from .models import Branch, Car, Notification, RentalRequest, RentalTransaction, TableVersion
+
+# Models whose list endpoints support conditional GET (and, for Branch, whose
+# in-memory search index in geo.py is rebuilt); every write bumps their TableVersion.
+VERSIONED_MODELS = (Branch, Car, Notification)
+
+
+def bump_table_version(sender, **kwargs):
+    TableVersion.bump(sender._meta.model_name)
+
+
+# Connected per model (not for every sender) so deletes of other models keep Django's fast-delete path.
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(bump_table_version, sender=versioned_model)
+    post_delete.connect(bump_table_version, sender=versioned_model)
+
+
+# --------------------------------------------------------------------------
+# CAR IMAGE REFERENCES
+# With content-addressed storage several cars can share one image file, so a
+# file is only removed once no Car row points at it any more. The check runs
+# after commit so a rolled-back delete never loses an image. A file an upload
+# stored or reused in the last MEDIA_RELEASE_GRACE_SECONDS is kept, since that
+# upload's Car row may not be committed yet; `manage.py dedupe_media` sweeps it
+# later if it stays unreferenced.
+# --------------------------------------------------------------------------
+
+def release_image(name):
+    """Deletes a stored image if no car references it."""
+    if not name or Car.objects.filter(image=name).exists():
+        return
+    delete_if_idle = getattr(default_storage, 'delete_if_idle', None)
+    if delete_if_idle is None:
+        default_storage.delete(name)
+    else:
+        delete_if_idle(name, getattr(settings, 'MEDIA_RELEASE_GRACE_SECONDS', 3600))
+
+
+@receiver(pre_save, sender=Car)
+def remember_previous_image(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._previous_image = None
+        return
+    instance._previous_image = (
+        Car.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Car)
+def release_replaced_image(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != instance.image.name:
+        transaction.on_commit(lambda: release_image(previous))
+
+
+@receiver(post_delete, sender=Car)
+def release_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: release_image(name))
+
+
+# --------------------------------------------------------------------------
+# AVAILABILITY CALENDAR
+# Any change to a car's requests or transactions drops that car's cached
+# blocked ranges, after commit so the next read recomputes from committed rows.
+# --------------------------------------------------------------------------
+
+def invalidate_car_calendar(sender, instance, **kwargs):
+    car_id = instance.car_id
+    transaction.on_commit(lambda: invalidate_car(car_id))
+
+
+for booking_model in (RentalRequest, RentalTransaction):
+    post_save.connect(invalidate_car_calendar, sender=booking_model)
+    post_delete.connect(invalidate_car_calendar, sender=booking_model)
+
+
+# --------------------------------------------------------------------------
+# CHANGE FEED
+# Runs inside the writing transaction: ChangeLoggedModel.save() opens one and
+# the deletion collector does the same for deletes and their cascades.
+# --------------------------------------------------------------------------
+
+def log_saved_change(sender, instance, created, **kwargs):
+    record_change(instance, 'create' if created else 'update')
+
+
+def log_deleted_change(sender, instance, **kwargs):
+    record_change(instance, 'delete')
+
+
+for logged_model in CHANGE_LOGGED_MODELS:
+    post_save.connect(log_saved_change, sender=logged_model)
+    post_delete.connect(log_deleted_change, sender=logged_model)
@@ -0,0 +1,109 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+
+# --------------------------------------------------------------------------
+# STATUS CODES AND STATE MACHINE
+# Statuses are stored as small integers (indexed, compared as integers in
+# every hot filter). The API and the archive tables keep the legacy strings:
+# the label for cars and transactions ('Available', 'Ongoing') and the
+# upper-case name for rental requests ('PENDING').
+#
+# Every status change goes through transition(), which only allows the moves
+# listed in TRANSITIONS.
+# --------------------------------------------------------------------------
+
+
+class StatusChoices(models.IntegerChoices):
+    """Integer status with conversions to and from the legacy string spellings."""
+
+    @property
+    def legacy(self):
+        return self.label
+
+    @classmethod
+    def from_legacy(cls, value):
+        """Accepts a member, its integer code, label or name in any case. Raises ValueError otherwise."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()):
+            return cls(int(value))
+        if isinstance(value, str):
+            wanted = value.strip().casefold()
+            for member in cls:
+                if wanted in (member.label.casefold(), member.name.casefold()):
+                    return member
+        raise ValueError(f"'{value}' is not a valid {cls.__name__}.")
+
+
+class CarStatus(StatusChoices):
+    AVAILABLE = 1, 'Available'
+    RENTED = 2, 'Rented'
+    MAINTENANCE = 3, 'Maintenance'
+
+
+class TransactionStatus(StatusChoices):
+    ONGOING = 1, 'Ongoing'
+    COMPLETED = 2, 'Completed'
+    CANCELLED = 3, 'Cancelled'
+
+
+class RequestStatus(StatusChoices):
+    PENDING = 1, 'Pending'
+    APPROVED = 2, 'Approved'
+    REJECTED = 3, 'Rejected'
+    CANCELLED = 4, 'Cancelled'
+    COMPLETED = 5, 'Completed'
+
+    @property
+    def legacy(self):
+        # Requests were always stored (and sent to the app) as the upper-case name.
+        return self.name
+
+
+TRANSITIONS = {
+    CarStatus: {
+        CarStatus.AVAILABLE: {CarStatus.RENTED, CarStatus.MAINTENANCE},
+        CarStatus.RENTED: {CarStatus.AVAILABLE, CarStatus.MAINTENANCE},
+        CarStatus.MAINTENANCE: {CarStatus.AVAILABLE},
+    },
+    TransactionStatus: {
+        TransactionStatus.ONGOING: {TransactionStatus.COMPLETED, TransactionStatus.CANCELLED},
+        TransactionStatus.COMPLETED: set(),
+        TransactionStatus.CANCELLED: set(),
+    },
+    RequestStatus: {
+        RequestStatus.PENDING: {RequestStatus.APPROVED, RequestStatus.REJECTED, RequestStatus.CANCELLED},
+        RequestStatus.APPROVED: {RequestStatus.COMPLETED, RequestStatus.CANCELLED},
+        RequestStatus.REJECTED: set(),
+        RequestStatus.CANCELLED: set(),
+        RequestStatus.COMPLETED: set(),
+    },
+}
+
+
+class InvalidTransition(ValidationError):
+    pass
+
+
+def can_transition(current, new):
+    """True if a status may move from current to new (staying put is always allowed)."""
+    return current == new or new in TRANSITIONS[type(new)].get(current, set())
+
+
+def transition(instance, new_status):
+    """
+    Moves instance.status to new_status (a member or any legacy spelling) without saving.
+    Raises InvalidTransition if the move is not allowed.
+    """
+    status_class = type(instance).Status
+    try:
+        new_status = status_class.from_legacy(new_status)
+    except ValueError as e:
+        raise InvalidTransition(str(e))
+    current = status_class(instance.status)
+    if not can_transition(current, new_status):
+        raise InvalidTransition(
+            f"{type(instance).__name__} {instance.pk} cannot go from {current.legacy} to {new_status.legacy}."
+        )
+    instance.status = new_status
+    return instance
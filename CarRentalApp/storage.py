@@ -0,0 +1,166 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import locks
+from django.core.files.storage import FileSystemStorage
+
+# --------------------------------------------------------------------------
+# MEDIA STORAGE
+# Car images are served with long-lived immutable caching, so every URL has to
+# change whenever the bytes behind it change. The storage appends a short
+# content fingerprint (?v=...) to each URL; the media view only sends the
+# immutable Cache-Control header when that fingerprint matches the file.
+# --------------------------------------------------------------------------
+
+FINGERPRINT_LENGTH = 16
+HASH_BLOCK_SIZE = 64 * 1024
+BLOB_LOCK_FILE = 'blobs.lock'
+
+
+def file_digest(file_obj):
+    """Returns the SHA-256 hex digest of an open binary file, read in blocks."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: file_obj.read(HASH_BLOCK_SIZE), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage whose URLs carry a content fingerprint for cache busting."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Fingerprints are memoized per name. Storage never reuses a name for
+        # different content (get_available_name() picks a fresh one), and
+        # _save()/delete() evict the entry for the rare delete-and-recreate case.
+        self._fingerprints = {}
+        self._fingerprint_lock = threading.Lock()
+
+    def fingerprint(self, name):
+        """Returns the content fingerprint for a stored file, or None if it does not exist."""
+        fingerprint = self._fingerprints.get(name)
+        if fingerprint is None:
+            try:
+                with self.open(name, 'rb') as stored:
+                    fingerprint = file_digest(stored)[:FINGERPRINT_LENGTH]
+            except (FileNotFoundError, IsADirectoryError):
+                return None
+            with self._fingerprint_lock:
+                self._fingerprints[name] = fingerprint
+        return fingerprint
+
+    def url(self, name):
+        url = super().url(name)
+        fingerprint = self.fingerprint(name) if name else None
+        if fingerprint is None:
+            return url
+        return f"{url}?v={fingerprint}"
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        with self._fingerprint_lock:
+            self._fingerprints.pop(name, None)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        with self._fingerprint_lock:
+            self._fingerprints.pop(name, None)
+
+
+content_address_re = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ContentAddressedStorage(HashedMediaStorage):
+    """
+    Stores every upload once, under the SHA-256 of its bytes.
+    The digest is computed while the upload is streamed to a temporary file;
+    if a blob with that digest already exists the copy is simply discarded.
+    Names look like 'cars/<sha256>.<ext>', so re-uploading the same photo for
+    another car (or the same car) points at the existing file.
+
+    Uploads are staged in MEDIA_STAGING_DIR, outside MEDIA_ROOT so a half-written
+    file is never served; it must be on the same filesystem for the final rename.
+    """
+
+    @property
+    def staging_dir(self):
+        return str(getattr(settings, 'MEDIA_STAGING_DIR', None) or self.location.rstrip(os.sep) + '-staging')
+
+    @contextmanager
+    def _blob_lock(self):
+        # Serializes reusing an existing blob against deleting an unused one, across workers.
+        os.makedirs(self.staging_dir, exist_ok=True)
+        with open(os.path.join(self.staging_dir, BLOB_LOCK_FILE), 'a') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock)
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        temp_dir = self.staging_dir
+        os.makedirs(temp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp_file:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            except BaseException:
+                temp_file.close()
+                os.unlink(temp_file.name)
+                raise
+
+        name = posixpath.join(directory, digest.hexdigest() + extension)
+        full_path = self.path(name)
+        with self._blob_lock():
+            if os.path.exists(full_path):
+                os.unlink(temp_file.name)
+                # The car that will reference the blob isn't committed yet; the new mtime keeps
+                # delete_if_idle() from removing the blob in the meantime.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_file.name, self.file_permissions_mode)
+                os.replace(temp_file.name, full_path)
+        return name
+
+    def delete_if_idle(self, name, idle_seconds):
+        """Deletes name unless an upload stored or reused it in the last idle_seconds. Returns whether it did."""
+        with self._blob_lock():
+            try:
+                if time.time() - os.path.getmtime(self.path(name)) < idle_seconds:
+                    return False
+            except FileNotFoundError:
+                return False
+            self.delete(name)
+        return True
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save(), so there is nothing to avoid here.
+        return name
+
+    @staticmethod
+    def is_content_addressed(name):
+        stem = os.path.splitext(os.path.basename(name))[0]
+        return bool(content_address_re.match(stem))
+
+    def fingerprint(self, name):
+        # The digest is already in the name, so there is no file to read.
+        if self.is_content_addressed(name):
+            return os.path.splitext(os.path.basename(name))[0][:FINGERPRINT_LENGTH]
+        return super().fingerprint(name)
@@ -1,3 +1,1264 @@
-from django.test import TestCase
+"""
+Query budgets for every URL in CarRental/urls.py and CarRentalApp/urls.py,
+then behaviour tests per subsystem.
 
-# Create your tests here.
+Each budget check sends the same request against a small data set, then grows
+every table and sends it again: both times the view must run exactly its
+budgeted number of queries, so a change that adds a query, or makes the count
+follow the number of rows (an N+1), fails here. The hottest read endpoints also
+get a response-time ceiling at the larger size.
+
+The behaviour tests don't use that data set: each case creates only the rows
+it needs.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from PIL import Image
+
+from . import audit
+from .admin import EstimatedCountPaginator, NotificationAdmin
+from .archive import archive_requests, prune_notifications
+from .availability import blocked_ranges, compute_blocked_ranges
+from .catalog import build_catalog_snapshot
+from .geo import available_cars
+from .live import current_cursor
+from .middleware import ApiCompressionMiddleware, brotli
+from .models import (
+    ArchivedPayment, ArchivedRentalRequest, ArchivedRentalTransaction, AuditLog, Branch, Car, Customer, ImageUpload,
+    Notification, Payment, RentalRequest, RentalTransaction,
+)
+from .signals import release_image
+from .throttling import IPRateThrottle, TokenBucketStore, get_store
+
+# Fixture units in the small data set, and after growing it.
+SMALL = 3
+LARGE = 15
+
+BASE_DATE = date(2025, 3, 3)
+MAIN_EMAIL = 'main@example.com'
+
+_serial = itertools.count(1)
+
+
+# --------------------------------------------------------------------------
+# FIXTURES
+# One "unit" is a branch with an available and a rented car, another customer
+# with a pending request and a completed, paid rental, and, for the main
+# customer, an approved request with its notification, a broadcast
+# notification, an ongoing paid rental and an archived rental. Growing by
+# units grows the main customer's own lists as well as the fleet.
+# --------------------------------------------------------------------------
+
+def create_main_customer():
+    return Customer.objects.create(
+        first_name='Maria', last_name='Santos', email=MAIN_EMAIL, phone='09171234567',
+        address='Makati', license_number='MAIN-LIC-0001',
+    )
+
+
+def add_units(main_customer, count):
+    for _ in range(count):
+        n = next(_serial)
+        day = BASE_DATE + timedelta(days=n % 3)
+        branch = Branch.objects.create(
+            name=f'Branch {n}', address=f'{n} Ayala Avenue', latitude=14.5 + n * 0.001, longitude=121.0 + n * 0.001,
+        )
+        available = create_car(n, 'A', branch=branch)
+        rented = create_car(n, 'R', branch=branch, status=Car.Status.RENTED)
+        customer = Customer.objects.create(
+            first_name='Juan', last_name=f'Dela Cruz {n}', email=f'customer{n}@example.com',
+            phone='09170000000', address='Manila', license_number=f'LIC-{n:06d}',
+        )
+
+        RentalRequest.objects.create(car=available, customer=customer, pickup_date=day, return_date=day + timedelta(days=3))
+        approved = RentalRequest.objects.create(
+            car=rented, customer=main_customer, pickup_date=day, return_date=day + timedelta(days=5),
+            status=RentalRequest.Status.APPROVED,
+        )
+        Notification.objects.create(
+            customer=main_customer, rental_request=approved, title='Rental Request Approved', message='Approved.',
+        )
+        Notification.objects.create(customer=main_customer, title='Weekend promo', message='10% off SUVs.')
+
+        ongoing = RentalTransaction.objects.create(
+            car=rented, customer=main_customer, start_date=day, end_date=day + timedelta(days=5),
+            total_cost=Decimal('7500.00'),
+        )
+        Payment.objects.create(transaction=ongoing, amount_paid=Decimal('7500.00'), method='Card')
+        completed = RentalTransaction.objects.create(
+            car=available, customer=customer, start_date=day - timedelta(days=10), end_date=day - timedelta(days=7),
+            total_cost=Decimal('4500.00'), status=RentalTransaction.Status.COMPLETED,
+        )
+        Payment.objects.create(transaction=completed, amount_paid=Decimal('4500.00'), method='Cash')
+
+        ArchivedRentalTransaction.objects.create(
+            id=10_000_000 + n, car_id=available.id, car_description=str(available), customer_id=main_customer.id,
+            start_date=day - timedelta(days=400), end_date=day - timedelta(days=397), total_cost=Decimal('3000.00'),
+            status='COMPLETED',
+        )
+        ArchivedPayment.objects.create(
+            id=10_000_000 + n, transaction_id=10_000_000 + n, amount_paid=Decimal('3000.00'),
+            payment_date=day - timedelta(days=397), method='GCash',
+        )
+        AuditLog.objects.create(
+            actor_type='staff', actor='staff', action='approve', object_type='rentalrequest', object_id=approved.id,
+        )
+
+
+def create_staff():
+    return User.objects.create_user('staff', 'staff@example.com', 'staff-pass', is_staff=True, is_superuser=True)
+
+
+def create_customer():
+    return Customer.objects.create(**customer_data(next(_serial)))
+
+
+def create_car(n, suffix, branch=None, status=Car.Status.AVAILABLE):
+    return Car.objects.create(
+        brand='Toyota', model=f'Vios {n}', year=2022, plate_number=f'PLT-{n:05d}{suffix}', type='Sedan',
+        status=status, rental_rate_per_day=Decimal('1500.00'), branch=branch,
+    )
+
+
+def customer_data(n):
+    return {
+        'first_name': 'Ana', 'last_name': f'Reyes {n}', 'email': f'new{n}@example.com',
+        'phone': '09181111111', 'address': 'Pasig', 'license_number': f'NEW-LIC-{n:06d}',
+        'password': 'secret-pass',
+    }
+
+
+def car_form(n, **extra):
+    return {
+        'brand': 'Honda', 'model': 'City', 'year': '2023', 'plate_number': f'FORM-{n:05d}', 'type': 'Sedan',
+        'rental_rate_per_day': '1800.00', 'status': 'Available', 'seats': '5', 'fuel_type': 'Gasoline',
+        'transmission': 'Automatic', 'color': 'White', 'engine_size': '1.5L', 'mileage': '1200', **extra,
+    }
+
+
+# --------------------------------------------------------------------------
+# BASE CASE
+# --------------------------------------------------------------------------
+
+@override_settings(
+    RATE_LIMIT_ENABLED=False,
+    # The file-based availability cache would outlive each test's rollback.
+    AVAILABILITY_CACHE_ALIAS='default',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class AppTestCase(TestCase):
+    """Settings and logging shared by every database test."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Stage timings (INFO) and the 4xx warnings of django.request would drown the test output.
+        logging.disable(logging.WARNING)
+        cls.addClassCleanup(logging.disable, logging.NOTSET)
+
+
+# Batched reads run inline, on the connection the budget counts.
+@override_settings(API_BATCH_MAX_WORKERS=1)
+class QueryBudgetTestCase(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.main_customer = create_main_customer()
+        add_units(cls.main_customer, SMALL)
+        cls.staff = create_staff()
+
+    def login_staff(self):
+        self.client.force_login(self.staff)
+
+    def assertQueryBudget(self, budget, send, prepare=None, status=200):
+        """
+        Sends a request before and after growing the data set and checks both query counts
+        against budget. send(*prepare()) makes the request and returns the response; prepare
+        (run outside the count) creates whatever a write needs. Each size is sent twice and
+        only the second request is counted, so per-process caches warmed by the first do not
+        skew the budget.
+        """
+        measured = []
+        for grow in (False, True):
+            if grow:
+                add_units(self.main_customer, LARGE - SMALL)
+            for _ in range(2):
+                args = prepare() if prepare else ()
+                with CaptureQueriesContext(connection) as queries:
+                    response = send(*args)
+                self.assertEqual(response.status_code, status, getattr(response, 'content', b'')[:500])
+            measured.append(queries)
+        counts = [len(queries) for queries in measured]
+        if counts != [budget, budget]:
+            self.fail(
+                f"{counts[0]} queries, then {counts[1]} after growing the data (budget {budget}):\n"
+                + '\n'.join(f"  {query['sql']}" for query in measured[-1].captured_queries)
+            )
+        return response
+
+    def assertFasterThan(self, seconds, send, repeat=3):
+        """Best of repeat runs of send() must finish within seconds."""
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = send()
+            best = min(best, time.perf_counter() - started)
+            self.assertEqual(response.status_code, 200)
+        self.assertLess(best, seconds, f"best of {repeat} took {best * 1000:.1f} ms")
+
+
+# --------------------------------------------------------------------------
+# PROJECT PAGES (CarRental/urls.py)
+# --------------------------------------------------------------------------
+
+class ProjectPageQueryTests(QueryBudgetTestCase):
+
+    def test_home(self):
+        self.assertQueryBudget(0, lambda: self.client.get('/'))
+
+    def test_login_page(self):
+        self.assertQueryBudget(0, lambda: self.client.get('/login/'))
+
+    def test_login_post(self):
+        self.assertQueryBudget(
+            6, lambda: self.client.post('/login/', {'username': 'staff', 'password': 'staff-pass'}), status=302,
+        )
+
+    def test_logout(self):
+        def login():
+            self.login_staff()
+            return ()
+
+        self.assertQueryBudget(4, lambda: self.client.get('/logout/'), prepare=login, status=302)
+
+
+# --------------------------------------------------------------------------
+# MOBILE API (CarRental/urls.py, and the copies under /cars/api/)
+# --------------------------------------------------------------------------
+
+class CarApiQueryTests(QueryBudgetTestCase):
+
+    def test_car_list(self):
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                # TableVersion for the validators, then the cars.
+                self.assertQueryBudget(2, lambda: self.client.get(f'{prefix}cars/'))
+
+    def test_car_list_projection(self):
+        self.assertQueryBudget(2, lambda: self.client.get('/api/cars/?fields=id,brand,status'))
+
+    def test_car_list_not_modified(self):
+        # A revalidation only reads the table version, however many cars there are.
+        self.assertQueryBudget(
+            1, lambda etag: self.client.get('/api/cars/', HTTP_IF_NONE_MATCH=etag),
+            prepare=lambda: (self.client.get('/api/cars/')['ETag'],), status=304,
+        )
+
+    def test_car_calendar(self):
+        car_id = RentalRequest.objects.filter(customer=self.main_customer).values_list('car_id', flat=True).first()
+        # The car; its blocked ranges come from the availability cache.
+        self.assertQueryBudget(
+            1, lambda: self.client.get(f'/api/cars/{car_id}/calendar/?from=2025-03-01&to=2025-04-30'),
+        )
+
+    def test_nearest_branches(self):
+        self.assertQueryBudget(1, lambda: self.client.get('/api/branches/nearest/?lat=14.5&lng=121.0&limit=3'))
+
+    def test_nearest_cars(self):
+        self.assertQueryBudget(
+            2, lambda: self.client.get(
+                '/api/cars/nearest/?lat=14.5&lng=121.0&limit=2&pickup_date=2025-03-10&return_date=2025-03-12'
+            ),
+        )
+
+    def test_catalog_version(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root):
+            build_catalog_snapshot()
+            # Served from latest.json alone.
+            self.assertQueryBudget(0, lambda: self.client.get('/api/catalog/version/'))
+
+    def test_changes(self):
+        self.assertQueryBudget(1, lambda: self.client.get('/api/changes/?after=0&limit=1000'))
+
+    def test_changes_staff(self):
+        self.login_staff()
+        self.assertQueryBudget(
+            3, lambda: self.client.get('/api/changes/?tables=car,rentalrequest,rentaltransaction,payment&limit=1000'),
+        )
+
+    def test_batch(self):
+        body = json.dumps({'requests': [
+            {'id': 'cars', 'method': 'GET', 'path': '/api/cars/?fields=id,brand'},
+            {'id': 'notifications', 'method': 'GET', 'path': f'/api/notifications/?email={MAIN_EMAIL}'},
+            {'id': 'history', 'method': 'GET', 'path': f'/api/rentals/history/?email={MAIN_EMAIL}'},
+        ]})
+        self.assertQueryBudget(11, lambda: self.client.post('/api/batch/', body, content_type='application/json'))
+
+
+class CustomerApiQueryTests(QueryBudgetTestCase):
+
+    def test_signup(self):
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                self.assertQueryBudget(
+                    3, lambda n: self.client.post(f'{prefix}customers/signup/', customer_data(n), content_type='application/json'),
+                    prepare=lambda: (next(_serial),), status=201,
+                )
+
+    def test_login(self):
+        body = json.dumps({'email': MAIN_EMAIL, 'password': 'changepassword123'})
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                self.assertQueryBudget(1, lambda: self.client.post(f'{prefix}customers/login/', body, content_type='application/json'))
+
+    def test_update(self):
+        body = json.dumps({'current_email': MAIN_EMAIL, 'phone': '09999999999'})
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                self.assertQueryBudget(
+                    4, lambda: self.client.patch(f'{prefix}customers/update/', body, content_type='application/json'),
+                )
+
+    def test_rental_history(self):
+        # Customer, rentals with their cars, their payments, archived rentals, archived payments.
+        self.assertQueryBudget(5, lambda: self.client.get(f'/api/rentals/history/?email={MAIN_EMAIL}'))
+
+    def test_rental_history_projection(self):
+        # Without car and payments: no join and no payment queries.
+        self.assertQueryBudget(3, lambda: self.client.get(f'/api/rentals/history/?email={MAIN_EMAIL}&fields=id,status'))
+
+
+class RentalApiQueryTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.car_id = Car.objects.filter(status=Car.Status.AVAILABLE).values_list('id', flat=True).first()
+
+    def rental_body(self, n):
+        return json.dumps({
+            'car_id': self.car_id, 'customer_data': customer_data(n),
+            'pickup_date': '2025-05-01', 'return_date': '2025-05-04',
+        })
+
+    def test_submit_rental_request(self):
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                self.assertQueryBudget(
+                    9, lambda n: self.client.post(f'{prefix}submit-rental-request/', self.rental_body(n), content_type='application/json'),
+                    prepare=lambda: (next(_serial),), status=201,
+                )
+
+    def test_create_rental_transaction(self):
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                self.assertQueryBudget(
+                    13, lambda n: self.client.post(f'{prefix}create-rental-transaction/', self.rental_body(n), content_type='application/json'),
+                    prepare=lambda: (next(_serial),), status=201,
+                )
+
+    def test_submit_payment(self):
+        transaction_id = RentalTransaction.objects.filter(customer=self.main_customer).values_list('id', flat=True).first()
+        body = json.dumps({'transaction_id': transaction_id, 'amount_paid': '500.00', 'method': 'GCash'})
+        for prefix in ('/api/', '/cars/api/'):
+            with self.subTest(prefix=prefix):
+                self.assertQueryBudget(
+                    7, lambda: self.client.post(f'{prefix}submit-payment/', body, content_type='application/json'), status=201,
+                )
+
+
+class NotificationApiQueryTests(QueryBudgetTestCase):
+
+    def new_notification(self):
+        return (Notification.objects.create(customer=self.main_customer, title='Reminder', message='Return tomorrow.').id,)
+
+    def test_notifications(self):
+        # Version, customer, notifications joined to their request and car, unread count.
+        self.assertQueryBudget(4, lambda: self.client.get(f'/api/notifications/?email={MAIN_EMAIL}'))
+
+    def test_mark_read(self):
+        self.assertQueryBudget(
+            3, lambda notification_id: self.client.post(
+                '/api/notifications/mark-read/', {'notification_id': notification_id}, content_type='application/json',
+            ),
+            prepare=self.new_notification,
+        )
+
+    def test_mark_all_read(self):
+        self.assertQueryBudget(
+            2, lambda notification_id: self.client.post(
+                '/api/notifications/mark-all-read/', {'email': MAIN_EMAIL}, content_type='application/json',
+            ),
+            prepare=self.new_notification,
+        )
+
+    def test_delete(self):
+        self.assertQueryBudget(
+            3, lambda notification_id: self.client.delete(
+                '/api/notifications/delete/', {'notification_id': notification_id}, content_type='application/json',
+            ),
+            prepare=self.new_notification,
+        )
+
+
+class MediaQueryTests(QueryBudgetTestCase):
+
+    def test_serve_media(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root):
+            name = default_storage.save('cars/photo.jpg', ContentFile(b'\xff\xd8\xff\xe0' + b'0' * 2048))
+            self.assertQueryBudget(0, lambda: self.client.get(default_storage.url(name)))
+
+
+# --------------------------------------------------------------------------
+# STAFF PAGES (CarRentalApp/urls.py)
+# Every request carries the session and user lookups of the login.
+# --------------------------------------------------------------------------
+
+class StaffPageQueryTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.login_staff()
+
+    def new_pending_request(self):
+        n = next(_serial)
+        car = create_car(n, 'P')
+        return (RentalRequest.objects.create(
+            car=car, customer=self.main_customer, pickup_date=BASE_DATE, return_date=BASE_DATE + timedelta(days=2),
+        ).id,)
+
+    def test_car_list(self):
+        self.assertQueryBudget(3, lambda: self.client.get('/cars/cars/'))
+
+    def test_car_create_form(self):
+        self.assertQueryBudget(3, lambda: self.client.get('/cars/cars/add/'))
+
+    def test_car_create(self):
+        branch_id = Branch.objects.values_list('id', flat=True).first()
+        self.assertQueryBudget(
+            8, lambda n: self.client.post('/cars/cars/add/', car_form(n, branch=branch_id)),
+            prepare=lambda: (next(_serial),), status=302,
+        )
+
+    def test_car_update_form(self):
+        car_id = Car.objects.values_list('id', flat=True).first()
+        self.assertQueryBudget(4, lambda: self.client.get(f'/cars/cars/{car_id}/edit/'))
+
+    def test_car_update(self):
+        car = Car.objects.filter(status=Car.Status.AVAILABLE).first()
+        self.assertQueryBudget(
+            9, lambda: self.client.post(
+                f'/cars/cars/{car.id}/edit/', car_form(0, plate_number=car.plate_number, status='Available'),
+            ),
+            status=302,
+        )
+
+    def test_car_delete_confirm(self):
+        car_id = Car.objects.values_list('id', flat=True).first()
+        self.assertQueryBudget(3, lambda: self.client.get(f'/cars/cars/{car_id}/delete/'))
+
+    def test_car_delete(self):
+        self.assertQueryBudget(
+            8, lambda car_id: self.client.post(f'/cars/cars/{car_id}/delete/'),
+            prepare=lambda: (create_car(next(_serial), 'D').id,), status=302,
+        )
+
+    def test_pending_requests(self):
+        # Session, user, change log cursor for the live stream, the requests.
+        self.assertQueryBudget(4, lambda: self.client.get('/cars/rentals/pending/'))
+
+    def test_approve(self):
+        self.assertQueryBudget(
+            21, lambda request_id: self.client.post(f'/cars/rentals/approve/{request_id}/'),
+            prepare=self.new_pending_request, status=302,
+        )
+
+    def test_reject(self):
+        self.assertQueryBudget(
+            9, lambda request_id: self.client.post(f'/cars/rentals/reject/{request_id}/'),
+            prepare=self.new_pending_request, status=302,
+        )
+
+    def test_active_rentals(self):
+        self.assertQueryBudget(4, lambda: self.client.get('/cars/rentals/active/'))
+
+    @override_settings(LIVE_STREAM_MAX_SECONDS=0, LIVE_POLL_SECONDS=0)
+    def test_queue_events(self):
+        def read_stream(queue):
+            response = self.client.get(f'/cars/rentals/events/?queue={queue}&after=0')
+            # The change log is read while the response streams.
+            b''.join(response.streaming_content)
+            return response
+
+        for queue in ('pending', 'active'):
+            with self.subTest(queue=queue):
+                # Session, user, the change log since the cursor, the changed rows.
+                self.assertQueryBudget(4, lambda: read_stream(queue))
+
+    def test_complete(self):
+        def new_rental():
+            car = create_car(next(_serial), 'C', status=Car.Status.RENTED)
+            return (RentalTransaction.objects.create(
+                car=car, customer=self.main_customer, end_date=BASE_DATE, total_cost=Decimal('1500.00'),
+            ).id,)
+
+        self.assertQueryBudget(
+            15, lambda transaction_id: self.client.post(f'/cars/rentals/complete/{transaction_id}/'),
+            prepare=new_rental, status=302,
+        )
+
+    def test_export(self):
+        def export():
+            response = self.client.get('/cars/rentals/export/')
+            # The rows are read while the response streams.
+            b''.join(response.streaming_content)
+            return response
+
+        self.assertQueryBudget(4, export)
+
+    def test_reconcile(self):
+        today = date.today()
+        settlement = f'Reference,Amount,Settlement Date\nPX-1,7500.00,{today}\n,99999.00,{today}\n'.encode()
+
+        def reconcile():
+            response = self.client.post('/cars/payments/reconcile/', {'file': SimpleUploadedFile('settlement.csv', settlement)})
+            # The payments are read while the response streams.
+            b''.join(response.streaming_content)
+            return response
+
+        # Session, user, the payments around the file's dates (one partition).
+        self.assertQueryBudget(3, reconcile)
+
+    def test_broadcast(self):
+        self.assertQueryBudget(
+            9, lambda: self.client.post('/cars/notifications/broadcast/', {'title': 'Holiday hours', 'message': 'Open 8-5.'}),
+            status=201,
+        )
+
+    def test_occupancy(self):
+        self.assertQueryBudget(5, lambda: self.client.get('/cars/analytics/occupancy/?from=2025-03-01&to=2025-03-31'))
+
+
+class ChunkedUploadMixin:
+    """Temporary media and upload directories, a photo several chunks long, and helpers to send it."""
+
+    CHUNK = 16 * 1024
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+        media_root, staging_dir, upload_dir = tempfile.mkdtemp(), tempfile.mkdtemp(), tempfile.mkdtemp()
+        for directory in (media_root, staging_dir, upload_dir):
+            self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=media_root, MEDIA_STAGING_DIR=staging_dir, CHUNKED_UPLOAD_DIR=upload_dir,
+            CHUNKED_UPLOAD_MAX_CHUNK_BYTES=self.CHUNK,
+        ))
+        # Noise does not compress, so the photo takes several chunks.
+        photo = io.BytesIO()
+        Image.effect_noise((200, 150), 64).convert('RGB').save(photo, format='PNG')
+        self.photo = photo.getvalue()
+
+    def post_start(self):
+        return self.client.post('/cars/uploads/', {
+            'filename': 'photo.png', 'size': len(self.photo), 'sha256': hashlib.sha256(self.photo).hexdigest(),
+        })
+
+    def start(self):
+        return self.post_start()['Location']
+
+    def send_chunk(self, url, offset, chunk=None):
+        chunk = self.photo[offset:offset + self.CHUNK] if chunk is None else chunk
+        return self.client.patch(
+            url, chunk, content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': str(offset), 'Chunk-SHA256': hashlib.sha256(chunk).hexdigest()},
+        )
+
+    def upload_all(self, url):
+        for offset in range(0, len(self.photo), self.CHUNK):
+            self.assertEqual(self.send_chunk(url, offset).status_code, 200)
+        return (url,)
+
+
+class UploadQueryTests(ChunkedUploadMixin, QueryBudgetTestCase):
+
+    def test_start(self):
+        # Session, user, the upload row.
+        self.assertQueryBudget(3, self.post_start, status=201)
+
+    def test_chunk(self):
+        url = self.start()
+        offsets = iter(range(0, len(self.photo) - self.CHUNK, self.CHUNK))
+        # Session, user, the upload; the chunk itself only touches the file.
+        self.assertQueryBudget(3, lambda offset: self.send_chunk(url, offset), prepare=lambda: (next(offsets),))
+
+    def test_last_chunk(self):
+        def almost_complete():
+            url = self.start()
+            for offset in range(0, len(self.photo) - self.CHUNK, self.CHUNK):
+                self.send_chunk(url, offset)
+            return url, len(self.photo) // self.CHUNK * self.CHUNK
+
+        # ... and marking the upload complete.
+        self.assertQueryBudget(4, self.send_chunk, prepare=almost_complete)
+
+    def test_attach(self):
+        car_id = Car.objects.values_list('id', flat=True).first()
+        # Session, user, upload, car, then one transaction saving the car (with its change log) and deleting the upload.
+        self.assertQueryBudget(
+            13, lambda url: self.client.post(f'{url}attach/', {'car_id': car_id}),
+            prepare=lambda: self.upload_all(self.start()),
+        )
+
+
+# Entries are only written when a test flushes; the background thread stays asleep.
+@override_settings(AUDIT_FLUSH_SIZE=10 ** 6, AUDIT_FLUSH_SECONDS=3600)
+class AuditQueryTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.login_staff()
+        audit.buffer.take()
+        self.addCleanup(audit.buffer.take)
+
+    def test_trail(self):
+        car = Car.objects.first()
+        AuditLog.objects.bulk_create(
+            AuditLog(actor_type='system', action='update', object_type='car', object_id=car.id) for _ in range(3)
+        )
+        # Session, user, the object's entries (nothing was buffered).
+        self.assertQueryBudget(3, lambda: self.client.get(f'/cars/audit/car/{car.id}/'))
+
+
+# --------------------------------------------------------------------------
+# ADMIN (CarRental/urls.py: admin/)
+# --------------------------------------------------------------------------
+
+ADMIN_MODELS = {
+    'branch': Branch, 'car': Car, 'customer': Customer, 'rentaltransaction': RentalTransaction,
+    'payment': Payment, 'rentalrequest': RentalRequest, 'notification': Notification,
+}
+
+
+class AdminQueryTests(QueryBudgetTestCase):
+
+    def setUp(self):
+        self.login_staff()
+
+    def test_index(self):
+        self.assertQueryBudget(3, lambda: self.client.get('/admin/'))
+
+    def test_change_lists(self):
+        budgets = {
+            'branch': 5, 'car': 8, 'customer': 6, 'rentaltransaction': 12,
+            'payment': 12, 'rentalrequest': 13, 'notification': 11, 'auditlog': 11,
+        }
+        for name, budget in budgets.items():
+            with self.subTest(model=name):
+                self.assertQueryBudget(budget, lambda: self.client.get(f'/admin/CarRentalApp/{name}/'))
+
+    def test_change_forms(self):
+        budgets = {
+            'branch': 3, 'car': 4, 'customer': 3, 'rentaltransaction': 5,
+            'payment': 4, 'rentalrequest': 5, 'notification': 5,
+        }
+        for name, budget in budgets.items():
+            object_id = ADMIN_MODELS[name].objects.order_by('id').values_list('id', flat=True).first()
+            with self.subTest(model=name):
+                self.assertQueryBudget(budget, lambda: self.client.get(f'/admin/CarRentalApp/{name}/{object_id}/change/'))
+
+    def test_add_forms(self):
+        for name in ADMIN_MODELS:
+            with self.subTest(model=name):
+                self.assertQueryBudget(2, lambda: self.client.get(f'/admin/CarRentalApp/{name}/add/'))
+
+
+# --------------------------------------------------------------------------
+# RESPONSE TIME CEILINGS
+# Generous limits (the suite runs on shared CI machines); they catch a view
+# that suddenly does far more work, not small regressions.
+# --------------------------------------------------------------------------
+
+class ResponseTimeTests(QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        add_units(cls.main_customer, LARGE - SMALL)
+
+    def test_hot_reads(self):
+        car_id = Car.objects.values_list('id', flat=True).first()
+        ceilings = {
+            '/api/cars/': 0.2,
+            f'/api/cars/{car_id}/calendar/': 0.1,
+            '/api/cars/nearest/?lat=14.5&lng=121.0': 0.1,
+            '/api/branches/nearest/?lat=14.5&lng=121.0': 0.1,
+            f'/api/notifications/?email={MAIN_EMAIL}': 0.1,
+            f'/api/rentals/history/?email={MAIN_EMAIL}': 0.1,
+            '/api/changes/': 0.2,
+        }
+        for path, seconds in ceilings.items():
+            with self.subTest(path=path):
+                self.assertFasterThan(seconds, lambda: self.client.get(path))
+
+    def test_staff_pages(self):
+        self.login_staff()
+        for path in ('/cars/cars/', '/cars/rentals/pending/', '/cars/rentals/active/'):
+            with self.subTest(path=path):
+                self.assertFasterThan(0.3, lambda: self.client.get(path))
+
+
+# --------------------------------------------------------------------------
+# STAFF REQUEST HANDLING (CarRentalApp/views.py)
+# --------------------------------------------------------------------------
+
+class RequestApprovalTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_staff()
+        cls.car = create_car(next(_serial), 'M')
+        cls.rental_request = RentalRequest.objects.create(
+            car=cls.car, customer=create_customer(), pickup_date=BASE_DATE, return_date=BASE_DATE + timedelta(days=2),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def approve(self):
+        response = self.client.post(f'/cars/rentals/approve/{self.rental_request.id}/')
+        self.assertRedirects(response, '/cars/rentals/pending/', fetch_redirect_response=False)
+        self.rental_request.refresh_from_db()
+        self.car.refresh_from_db()
+
+    def test_approve(self):
+        self.approve()
+        self.assertEqual((self.rental_request.status, self.car.status), (RentalRequest.Status.APPROVED, Car.Status.RENTED))
+        rental = RentalTransaction.objects.get(car=self.car)
+        self.assertEqual((rental.start_date, rental.end_date), (BASE_DATE, BASE_DATE + timedelta(days=2)))
+        self.assertTrue(Notification.objects.filter(rental_request=self.rental_request).exists())
+
+    def test_approve_car_in_maintenance(self):
+        Car.objects.filter(id=self.car.id).update(status=Car.Status.MAINTENANCE)
+        self.approve()
+        # Nothing from the half-done approval is kept.
+        self.assertEqual(self.rental_request.status, RentalRequest.Status.PENDING)
+        self.assertFalse(RentalTransaction.objects.filter(car=self.car).exists())
+        self.assertFalse(Notification.objects.exists())
+
+
+# --------------------------------------------------------------------------
+# LIVE STAFF QUEUES (CarRentalApp/live.py)
+# --------------------------------------------------------------------------
+
+# One poll per stream.
+@override_settings(LIVE_STREAM_MAX_SECONDS=0, LIVE_POLL_SECONDS=0)
+class LiveQueueTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_staff()
+        cls.customer = create_customer()
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def new_request(self):
+        return RentalRequest.objects.create(
+            car=create_car(next(_serial), 'L'), customer=self.customer,
+            pickup_date=BASE_DATE, return_date=BASE_DATE + timedelta(days=2),
+        )
+
+    def read_rows(self, queue, after):
+        response = self.client.get(f'/cars/rentals/events/?queue={queue}&after={after}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join(response.streaming_content).decode().split('\n\n')
+        return [json.loads(event.split('data: ')[1])['rows'] for event in events if event.startswith('event: rows')]
+
+    def test_new_request_is_pushed_with_its_card(self):
+        cursor = current_cursor()
+        rental_request = self.new_request()
+        ((row,),) = self.read_rows('pending', cursor)
+        self.assertEqual((row['dom_id'], row['sort']), (f'request-{rental_request.id}', BASE_DATE.isoformat()))
+        self.assertIn(rental_request.car.plate_number, row['html'])
+
+    def test_handled_request_is_pushed_as_a_removal(self):
+        rental_request = self.new_request()
+        cursor = current_cursor()
+        self.client.post(f'/cars/rentals/reject/{rental_request.id}/')
+        self.assertEqual(
+            self.read_rows('pending', cursor), [[{'dom_id': f'request-{rental_request.id}', 'sort': None, 'html': None}]],
+        )
+
+    def test_other_queues_stay_quiet(self):
+        cursor = current_cursor()
+        self.new_request()
+        self.assertEqual(self.read_rows('active', cursor), [])
+
+
+# --------------------------------------------------------------------------
+# PAYMENT RECONCILIATION (CarRentalApp/reconciliation.py)
+# --------------------------------------------------------------------------
+
+class ReconciliationTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_staff()
+        rental = RentalTransaction.objects.create(
+            car=create_car(next(_serial), 'S', status=Car.Status.RENTED), customer=create_customer(),
+            start_date=BASE_DATE, end_date=BASE_DATE + timedelta(days=3), total_cost=Decimal('4500.00'),
+        )
+        payment = lambda amount, **extra: Payment.objects.create(
+            transaction=rental, amount_paid=Decimal(amount), payment_date=BASE_DATE, method='Card', **extra,
+        )
+        cls.by_reference = payment('1234.50', reference='PX-1')
+        cls.by_amount = payment('500.00')
+        cls.unsettled = payment('75.00')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def reconcile(self, settlement, **options):
+        return self.client.post(
+            '/cars/payments/reconcile/', {'file': SimpleUploadedFile('settlement.csv', settlement.encode()), **options},
+        )
+
+    def test_statuses(self):
+        response = self.reconcile(
+            'Reference,Amount,Settlement Date\n'
+            f'PX-1,"1,234.50",{BASE_DATE}\n'
+            f'PX-1,1234.50,{BASE_DATE}\n'
+            f',500.00,{BASE_DATE + timedelta(days=1)}\n'
+            f',99999.00,{BASE_DATE}\n'
+            'PX-2,abc,2025-01-01\n'
+            f'PX-3,1e30,{BASE_DATE}\n'
+        )
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(
+            [(row['status'], row['line'], row['payment_id']) for row in rows],
+            [
+                ('invalid', '6', ''),
+                ('invalid', '7', ''),
+                ('matched', '2', str(self.by_reference.id)),
+                ('duplicate_settlement', '3', str(self.by_reference.id)),
+                ('matched', '4', str(self.by_amount.id)),
+                ('missing_payment', '5', ''),
+                ('missing_settlement', '', str(self.unsettled.id)),
+            ],
+        )
+
+    def test_missing_columns(self):
+        response = self.reconcile('Reference,Amount\nPX-1,1234.50\n')
+        self.assertEqual(response.status_code, 400)
+
+    def test_amount_tolerance_out_of_range(self):
+        response = self.reconcile('Amount,Date\n1.00,2025-03-03\n', amount_tolerance='1e30')
+        self.assertEqual(response.status_code, 400)
+
+
+# --------------------------------------------------------------------------
+# CHUNKED UPLOADS (CarRentalApp/uploads.py)
+# --------------------------------------------------------------------------
+
+class ChunkedUploadTests(ChunkedUploadMixin, AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_staff()
+        cls.car = create_car(next(_serial), 'U')
+
+    def test_resume(self):
+        url = self.start()
+        self.send_chunk(url, 0)
+        chunk = self.photo[self.CHUNK:2 * self.CHUNK]
+        # A chunk damaged on the way is dropped ...
+        response = self.client.patch(
+            url, b'x' + chunk[1:], content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': str(self.CHUNK), 'Chunk-SHA256': hashlib.sha256(chunk).hexdigest()},
+        )
+        self.assertEqual((response.status_code, response['Upload-Offset']), (400, str(self.CHUNK)))
+        # ... one at the wrong offset is refused with where to resume ...
+        response = self.send_chunk(url, 2 * self.CHUNK)
+        self.assertEqual((response.status_code, response['Upload-Offset']), (409, str(self.CHUNK)))
+        self.assertEqual(json.loads(self.client.get(url).content)['offset'], self.CHUNK)
+        # ... and an unfinished upload can't be attached.
+        self.assertEqual(self.client.post(f'{url}attach/', {'car_id': self.car.id}).status_code, 400)
+        self.assertEqual(self.send_chunk(url, self.CHUNK).status_code, 200)
+
+    def test_attach(self):
+        (url,) = self.upload_all(self.start())
+        response = self.client.post(f'{url}attach/', {'car_id': self.car.id})
+        self.car.refresh_from_db()
+        self.assertEqual(json.loads(response.content)['image'], self.car.image.url)
+        with self.car.image.open('rb') as image:
+            self.assertEqual(image.read(), self.photo)
+        self.assertFalse(ImageUpload.objects.exists())
+
+
+# --------------------------------------------------------------------------
+# AUDIT TRAIL (CarRentalApp/audit.py)
+# --------------------------------------------------------------------------
+
+# Entries are only written when a test flushes; the background thread stays asleep.
+@override_settings(AUDIT_FLUSH_SIZE=10 ** 6, AUDIT_FLUSH_SECONDS=3600)
+class AuditTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_staff()
+        cls.customer = create_customer()
+        cls.car = create_car(next(_serial), 'T')
+        cls.rental_request = RentalRequest.objects.create(
+            car=create_car(next(_serial), 'Q'), customer=cls.customer,
+            pickup_date=BASE_DATE, return_date=BASE_DATE + timedelta(days=2),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        audit.buffer.take()
+        self.addCleanup(audit.buffer.take)
+
+    def trail(self, object_type, object_id):
+        return json.loads(self.client.get(f'/cars/audit/{object_type}/{object_id}/').content)['entries']
+
+    def test_actions_are_buffered(self):
+        car = self.car
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            self.client.post(f'/cars/rentals/approve/{self.rental_request.id}/')
+            self.client.post(f'/cars/cars/{car.id}/edit/', car_form(0, plate_number=car.plate_number, status='Available'))
+        # No request inserted its own entry ...
+        self.assertFalse([query for query in queries if 'auditlog' in query['sql']])
+        # ... the flush writes them in one statement.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(audit.buffer.flush(), 2)
+        self.assertEqual(len(queries), 1)
+
+        (approved,) = self.trail('rentalrequest', self.rental_request.id)
+        self.assertEqual((approved['action'], approved['actor_type'], approved['actor']), ('approve', 'staff', 'staff'))
+        (updated,) = self.trail('car', car.id)
+        self.assertEqual(updated['changes']['mileage'], [0, 1200])
+        self.assertNotIn('updated_at', updated['changes'])
+
+    def test_rolled_back_action_is_not_recorded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                audit.record('reject', self.rental_request, self.staff)
+                transaction.set_rollback(True)
+        self.assertEqual(audit.buffer.take(), [])
+
+    def test_deleted_object_keeps_its_trail(self):
+        car = create_car(next(_serial), 'X')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/cars/cars/{car.id}/delete/')
+        (deleted,) = self.trail('car', car.id)
+        self.assertEqual((deleted['action'], deleted['changes']['plate_number']), ('delete', car.plate_number))
+
+    def test_customer_update_redacts_password(self):
+        body = {'current_email': self.customer.email, 'phone': '09999999999', 'password': 'new-secret'}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/customers/update/', body, content_type='application/json')
+        (updated,) = self.trail('customer', self.customer.id)
+        self.assertEqual((updated['actor_type'], updated['actor']), ('customer', self.customer.email))
+        self.assertEqual(updated['changes']['password'], ['***', '***'])
+        self.assertNotIn('new-secret', json.dumps(updated))
+
+    def test_jsonl_backend_rotates(self):
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        path = f'{log_dir}/audit.jsonl'
+        with self.settings(AUDIT_LOG_BACKEND='jsonl', AUDIT_LOG_FILE=path, AUDIT_LOG_MAX_BYTES=600, AUDIT_LOG_BACKUPS=2):
+            for batch in range(6):
+                with self.captureOnCommitCallbacks(execute=True):
+                    audit.record('update', self.car, self.staff, {'batch': batch})
+                    audit.record('update', self.rental_request, self.staff)
+                audit.buffer.flush()
+            entries = audit.trail('car', self.car.id)
+
+        self.assertEqual(sorted(os.listdir(log_dir)), ['audit.jsonl', 'audit.jsonl.1', 'audit.jsonl.2', 'audit.jsonl.lock'])
+        # Newest first; the oldest batches went with the dropped file.
+        batches = [entry['changes']['batch'] for entry in entries]
+        self.assertEqual(batches, sorted(batches, reverse=True))
+        self.assertEqual(batches[0], 5)
+        self.assertNotIn(0, batches)
+        self.assertFalse(AuditLog.objects.exists())
+
+
+# --------------------------------------------------------------------------
+# ARCHIVAL AND RETENTION (CarRentalApp/archive.py)
+# --------------------------------------------------------------------------
+
+class ArchiveTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = create_customer()
+        cls.rental_request = RentalRequest.objects.create(
+            car=create_car(next(_serial), 'V'), customer=customer, pickup_date=BASE_DATE,
+            return_date=BASE_DATE + timedelta(days=3), status=RentalRequest.Status.APPROVED,
+        )
+        cls.notification = Notification.objects.create(
+            customer=customer, rental_request=cls.rental_request, title='Rental Request Approved', message='Approved.',
+        )
+
+    def test_archived_request_keeps_unread_notification(self):
+        self.assertEqual(sum(archive_requests(BASE_DATE + timedelta(days=30), batch_size=100)), 1)
+        self.assertTrue(ArchivedRentalRequest.objects.filter(id=self.rental_request.id).exists())
+        notification = Notification.objects.get(id=self.notification.id)
+        self.assertEqual((notification.rental_request_id, notification.is_read), (None, False))
+        # Retention only ever removes read notifications.
+        self.assertEqual(sum(prune_notifications(timezone.now() + timedelta(days=1), batch_size=100)), 0)
+        self.assertTrue(Notification.objects.filter(id=self.notification.id).exists())
+
+
+# --------------------------------------------------------------------------
+# AVAILABILITY (CarRentalApp/availability.py, geo.py)
+# --------------------------------------------------------------------------
+
+class AvailabilityTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = create_customer()
+        cls.car = create_car(next(_serial), 'B')
+
+    def setUp(self):
+        # Car ids come back after each test's rollback; their cached ranges must not.
+        caches['default'].clear()
+
+    def book(self, start, days):
+        with self.captureOnCommitCallbacks(execute=True):
+            return RentalRequest.objects.create(
+                car=self.car, customer=self.customer, pickup_date=start, return_date=start + timedelta(days=days),
+                status=RentalRequest.Status.APPROVED,
+            )
+
+    def test_late_fill_does_not_overwrite_invalidation(self):
+        self.book(BASE_DATE, 2)
+
+        def slow_read(car_id):
+            ranges = compute_blocked_ranges(car_id)
+            # A booking commits (and invalidates) before this reader stores what it read.
+            self.book(BASE_DATE + timedelta(days=10), 2)
+            return ranges
+
+        with mock.patch('CarRentalApp.availability.compute_blocked_ranges', side_effect=slow_read):
+            self.assertEqual(len(blocked_ranges(self.car.id)), 1)
+        self.assertEqual(len(blocked_ranges(self.car.id)), 2)
+
+    def test_car_returned_early_is_free_again(self):
+        request = self.book(BASE_DATE, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            rental = RentalTransaction.objects.create(
+                car=self.car, customer=self.customer, start_date=request.pickup_date, end_date=request.return_date,
+                total_cost=Decimal('15000.00'),
+            )
+        window = (BASE_DATE + timedelta(days=5), BASE_DATE + timedelta(days=7))
+        self.assertTrue(blocked_ranges(self.car.id))
+        self.assertNotIn(self.car, available_cars(*window))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rental.status = RentalTransaction.Status.COMPLETED
+            rental.save()
+        # The request is still APPROVED, but its rental is over.
+        self.assertEqual(blocked_ranges(self.car.id), [])
+        self.assertIn(self.car, available_cars(*window))
+
+
+# --------------------------------------------------------------------------
+# API COMPRESSION (CarRentalApp/middleware.py)
+# --------------------------------------------------------------------------
+
+class CompressionTests(SimpleTestCase):
+
+    body = json.dumps([{'id': n, 'brand': 'Toyota', 'model': f'Vios {n}'} for n in range(100)]).encode()
+
+    def compress(self, accept_encoding, path='/api/cars/'):
+        response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = '"catalog-1"'
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+        return ApiCompressionMiddleware(lambda request: response)(request)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli(self):
+        response = self.compress('gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"catalog-1"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli_length_is_padded(self):
+        lengths = {len(self.compress('br').content) for _ in range(20)}
+        self.assertGreater(len(lengths), 1)
+
+    def test_gzip(self):
+        response = self.compress('gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['ETag'], 'W/"catalog-1"')
+
+    def test_other_paths_untouched(self):
+        response = self.compress('gzip, br', path='/cars/cars/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['ETag'], '"catalog-1"')
+
+
+# --------------------------------------------------------------------------
+# CONTENT-ADDRESSED MEDIA (CarRentalApp/storage.py, signals.py)
+# --------------------------------------------------------------------------
+
+class MediaStorageTests(AppTestCase):
+
+    def setUp(self):
+        media_root, staging_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, staging_dir, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, MEDIA_STAGING_DIR=staging_dir))
+        self.car = create_car(next(_serial), 'I')
+
+    def save_photo(self):
+        return default_storage.save('cars/photo.jpg', ContentFile(b'\xff\xd8\xff\xe0' + b'1' * 2048))
+
+    def age(self, name, seconds):
+        past = time.time() - seconds
+        os.utime(default_storage.path(name), (past, past))
+
+    def test_staging_is_outside_media_root(self):
+        name = self.save_photo()
+        self.assertEqual(os.listdir(default_storage.location), ['cars'])
+        self.assertEqual(self.client.get(f'/media/{name}').status_code, 200)
+
+    def test_released_image_reused_by_an_upload_is_kept(self):
+        name = self.save_photo()
+        Car.objects.filter(id=self.car.id).update(image=name)
+        self.age(name, 7200)
+        # Another upload of the same photo, whose car isn't committed yet, reuses the file ...
+        self.assertEqual(self.save_photo(), name)
+        # ... so releasing it from the deleted car leaves it in place.
+        with self.captureOnCommitCallbacks(execute=True):
+            Car.objects.get(id=self.car.id).delete()
+        self.assertTrue(default_storage.exists(name))
+
+        # Unused for longer than the grace period: removed.
+        self.age(name, 7200)
+        release_image(name)
+        self.assertFalse(default_storage.exists(name))
+
+
+# --------------------------------------------------------------------------
+# ADMIN PAGINATION (CarRentalApp/admin.py)
+# --------------------------------------------------------------------------
+
+@mock.patch.object(EstimatedCountPaginator, 'EXACT_COUNT_LIMIT', 4)
+@mock.patch.object(NotificationAdmin, 'list_per_page', 2)
+class AdminPaginationTests(AppTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = create_customer()
+        Notification.objects.bulk_create(
+            Notification(customer=customer, title=f'Reminder {n}', message='Return tomorrow.') for n in range(9)
+        )
+        cls.staff = create_staff()
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def get_page(self, page):
+        return self.client.get(f'/admin/CarRentalApp/notification/?is_read__exact=0&p={page}')
+
+    def test_capped_count_is_shown_as_a_lower_bound(self):
+        self.assertContains(self.get_page(1), '4+ notifications')
+
+    def test_pages_past_the_cap_stay_reachable(self):
+        # Each page links the one after it until the real end.
+        self.assertContains(self.get_page(3), '8+ notifications')
+        response = self.get_page(5)
+        self.assertContains(response, '9 notifications')
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+
+# --------------------------------------------------------------------------
+# RATE LIMITING (CarRentalApp/throttling.py)
+# --------------------------------------------------------------------------
+
+class TokenBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        self.store = TokenBucketStore(':memory:')
+
+    def test_bucket_empties_then_refills(self):
+        # 3/min: a burst of 3, then one token every 20 seconds.
+        consume = lambda now: self.store.consume('login:email:a@example.com', 3, 3 / 60, now=now)
+        self.assertEqual([consume(1000.0) for _ in range(3)], [(True, 0)] * 3)
+        allowed, retry_after = consume(1000.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 20.0)
+        # Half a token later, still refused, and told to wait the other half.
+        allowed, retry_after = consume(1010.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 10.0)
+        self.assertEqual(consume(1020.0), (True, 0))
+
+    def test_buckets_are_separate(self):
+        self.store.consume('login:email:a@example.com', 1, 1 / 60, now=1000.0)
+        self.assertEqual(self.store.consume('login:email:b@example.com', 1, 1 / 60, now=1000.0), (True, 0))
+
+    def test_ip_key_ignores_client_forwarded_for(self):
+        factory = RequestFactory()
+        keys = {
+            IPRateThrottle().get_ident_key(factory.post('/api/customers/login/', HTTP_X_FORWARDED_FOR=forwarded))
+            for forwarded in ('10.0.0.1', '10.0.0.2', '')
+        }
+        self.assertEqual(keys, {'127.0.0.1'})
+
+
+@override_settings(
+    RATE_LIMIT_ENABLED=True, RATE_LIMIT_DB=':memory:',
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'api_customer_login.email': '2/min'}},
+)
+class RateLimitTests(AppTestCase):
+
+    def setUp(self):
+        get_store().reset()
+
+    def login(self, email):
+        body = json.dumps({'email': email, 'password': 'wrong-password'})
+        return self.client.post('/api/customers/login/', body, content_type='application/json')
+
+    def test_empty_bucket_answers_429_with_retry_after(self):
+        self.assertNotEqual(self.login('a@example.com').status_code, 429)
+        self.assertNotEqual(self.login('A@example.com ').status_code, 429)
+        response = self.login('a@example.com')
+        self.assertEqual(response.status_code, 429)
+        # One token every 30 seconds.
+        self.assertEqual(response['Retry-After'], '30')
+        # Another account still gets through.
+        self.assertNotEqual(self.login('b@example.com').status_code, 429)
@@ -0,0 +1,176 @@
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+# --------------------------------------------------------------------------
+# TOKEN-BUCKET RATE LIMITING
+# Buckets live in a small SQLite file shared by every worker process on the
+# host. Each check is a single UPSERT ... RETURNING on the bucket's primary
+# key, so allowing or rejecting a request is O(1) and atomic across workers.
+# Rates use DRF's DEFAULT_THROTTLE_RATES ('10/min' style): the number is the
+# bucket capacity (burst) and refills evenly over the period.
+# --------------------------------------------------------------------------
+
+# SQLite evaluates every SET expression against the old row, so 'allowed' and
+# 'tokens' are both computed from the refilled level before this request.
+CONSUME_SQL = """
+INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :capacity - 1, :now, 1)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = CASE
+        WHEN MIN(:capacity, tokens + (:now - updated) * :refill) >= 1
+        THEN MIN(:capacity, tokens + (:now - updated) * :refill) - 1
+        ELSE MIN(:capacity, tokens + (:now - updated) * :refill)
+    END,
+    allowed = MIN(:capacity, tokens + (:now - updated) * :refill) >= 1,
+    updated = :now
+RETURNING tokens, allowed
+"""
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    allowed INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+# Roughly one check in this many also deletes buckets idle for a day (they are full again anyway).
+CLEANUP_EVERY = 5000
+IDLE_BUCKET_SECONDS = 24 * 60 * 60
+
+
+class TokenBucketStore:
+    """Token buckets kept in a SQLite file, with one connection per thread."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(CREATE_SQL)
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, refill_per_second, now=None):
+        """
+        Takes one token from the bucket for key.
+        Returns (allowed, retry_after_seconds); retry_after is 0 when allowed.
+        """
+        now = time.time() if now is None else now
+        connection = self._connection()
+        tokens, allowed = connection.execute(
+            CONSUME_SQL, {'key': key, 'capacity': capacity, 'refill': refill_per_second, 'now': now}
+        ).fetchone()
+        if random.randrange(CLEANUP_EVERY) == 0:
+            connection.execute('DELETE FROM buckets WHERE updated < ?', (now - IDLE_BUCKET_SECONDS,))
+        if allowed:
+            return True, 0
+        return False, (1 - tokens) / refill_per_second
+
+    def reset(self):
+        self._connection().execute('DELETE FROM buckets')
+
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Parses a DRF-style rate such as '10/min' into (requests, seconds)."""
+    num, period = rate.split('/')
+    return int(num), RATE_PERIODS[period[0]]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        path = getattr(settings, 'RATE_LIMIT_DB', ':memory:')
+        if _store is None or _store.path != str(path):
+            _store = TokenBucketStore(path)
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class for the throttles below. Subclasses set `kind` and implement
+    get_ident_key(). The rate is looked up in DEFAULT_THROTTLE_RATES as
+    '<url_name>.<kind>' first, then '<kind>'; no rate means no limit.
+    """
+    kind = None
+
+    def get_ident_key(self, request):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def get_rate(self, endpoint):
+        rates = api_settings.DEFAULT_THROTTLE_RATES or {}
+        return rates.get(f'{endpoint}.{self.kind}', rates.get(self.kind))
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return True
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        endpoint = resolver_match.url_name if resolver_match else view.__class__.__name__
+        rate = self.get_rate(endpoint)
+        ident = self.get_ident_key(request)
+        if rate is None or ident is None:
+            return True
+
+        num_requests, duration = parse_rate(rate)
+        allowed, retry_after = get_store().consume(
+            f'{endpoint}:{self.kind}:{ident}', num_requests, num_requests / duration
+        )
+        self.retry_after = retry_after
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class EndpointRateThrottle(TokenBucketThrottle):
+    """One bucket per endpoint for all clients together; caps the load a single endpoint can put on the workers."""
+    kind = 'endpoint'
+
+    def get_ident_key(self, request):
+        return 'all'
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """One bucket per endpoint and client IP."""
+    kind = 'ip'
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(TokenBucketThrottle):
+    """One bucket per endpoint and account email (login, signup and rental submissions)."""
+    kind = 'email'
+
+    def get_ident_key(self, request):
+        data = request.data if hasattr(request.data, 'get') else {}
+        email = data.get('email') or data.get('current_email')
+        customer_data = data.get('customer_data')
+        if not email and hasattr(customer_data, 'get'):
+            email = customer_data.get('email')
+        return str(email).strip().lower() if email else None
+
+
+RATE_LIMIT_THROTTLES = [EndpointRateThrottle, IPRateThrottle, EmailRateThrottle]
+# For endpoints whose body carries no account email (e.g. payments).
+ANONYMOUS_RATE_LIMIT_THROTTLES = [EndpointRateThrottle, IPRateThrottle]
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File, locks
+from django.db import transaction
+from django.utils import timezone
+
+from .images import prepare_car_image
+from .models import ImageUpload
+from .storage import file_digest
+
+# --------------------------------------------------------------------------
+# RESUMABLE CHUNKED UPLOADS
+# Staff upload large car photos in pieces instead of one multipart POST:
+#
+#   POST   /cars/uploads/                 filename, size (and optional sha256)
+#   PATCH  /cars/uploads/<id>/            raw bytes; Upload-Offset, Chunk-SHA256
+#   GET    /cars/uploads/<id>/            where to resume (also the Upload-Offset header)
+#   POST   /cars/uploads/<id>/attach/     car_id, once every byte has arrived
+#
+# Each chunk is streamed from the request straight into the upload's file
+# under CHUNKED_UPLOAD_DIR (not through Django's upload handlers) and kept only
+# if its SHA-256 matches; a failed chunk is cut off again, so the file size is
+# always the offset to resume from and chunks never write to the database.
+# Only attaching, after the upload is complete, validates the image and
+# touches the Car row, in one short transaction.
+# --------------------------------------------------------------------------
+
+BLOCK_SIZE = 64 * 1024
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(ValidationError):
+    """A chunk or upload that was rejected; nothing was kept."""
+
+
+class OffsetMismatch(UploadError):
+    """The chunk does not start where the file ends (or another chunk is being written)."""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+def upload_directory():
+    return Path(getattr(settings, 'CHUNKED_UPLOAD_DIR', settings.BASE_DIR / 'uploads'))
+
+
+def upload_path(upload):
+    return upload_directory() / f'{upload.id.hex}.part'
+
+
+def max_chunk_bytes():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK_BYTES', 1024 * 1024)
+
+
+def received_bytes(upload):
+    try:
+        return upload_path(upload).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def start_upload(user, filename, size, sha256=''):
+    """Validates what the client declared and creates the upload with an empty file."""
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError('A filename is required.')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be the file size in bytes.')
+    max_bytes = getattr(settings, 'CAR_IMAGE_MAX_BYTES', 10 * 1024 * 1024)
+    if not 0 < size <= max_bytes:
+        raise UploadError(f'size must be between 1 byte and {max_bytes // (1024 * 1024)} MB.')
+    sha256 = (sha256 or '').strip().lower()
+    if sha256 and not SHA256_PATTERN.match(sha256):
+        raise UploadError('sha256 must be 64 hexadecimal characters.')
+
+    upload = ImageUpload.objects.create(filename=filename[:255], size=size, sha256=sha256, created_by=user)
+    upload_directory().mkdir(parents=True, exist_ok=True)
+    upload_path(upload).touch()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length, checksum):
+    """
+    Appends length bytes read from stream at offset and returns the new offset.
+    The chunk is kept only if its SHA-256 (hex) equals checksum; the last chunk also
+    checks the whole file against upload.sha256 and marks the upload complete.
+    """
+    checksum = (checksum or '').strip().lower()
+    if not SHA256_PATTERN.match(checksum):
+        raise UploadError('Chunk-SHA256 must be the chunk\'s SHA-256 in hex.')
+    if length is None or not 0 < length <= max_chunk_bytes():
+        raise UploadError(f'Chunks must send a Content-Length of 1 to {max_chunk_bytes()} bytes.')
+
+    with open(upload_path(upload), 'r+b') as part:
+        if not locks.lock(part, locks.LOCK_EX | locks.LOCK_NB):
+            raise OffsetMismatch('Another chunk of this upload is being written.', received_bytes(upload))
+        try:
+            current = os.fstat(part.fileno()).st_size
+            if offset != current:
+                raise OffsetMismatch(f'Upload is at offset {current}, not {offset}.', current)
+            if offset + length > upload.size:
+                raise UploadError(f'Chunk runs past the declared size of {upload.size} bytes.')
+
+            # 1. Stream the chunk to disk, hashing as it goes.
+            part.seek(offset)
+            digest = hashlib.sha256()
+            remaining = length
+            while remaining:
+                block = stream.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                part.write(block)
+                digest.update(block)
+                remaining -= len(block)
+            if remaining or digest.hexdigest() != checksum:
+                part.truncate(offset)
+                raise UploadError('Chunk was incomplete.' if remaining else 'Chunk checksum does not match; resend it.')
+            part.flush()
+            offset += length
+
+            # 2. Last chunk: check the whole file before calling the upload complete.
+            if offset == upload.size:
+                part.seek(0)
+                if upload.sha256 and file_digest(part) != upload.sha256:
+                    part.truncate(0)
+                    raise UploadError('File checksum does not match; the upload was reset to offset 0.')
+                upload.completed_at = timezone.now()
+                ImageUpload.objects.filter(id=upload.id).update(completed_at=upload.completed_at)
+            return offset
+        finally:
+            locks.unlock(part)
+
+
+def attach_upload(upload, car):
+    """Validates a completed upload, sets it as car's image and removes the upload."""
+    if upload.completed_at is None:
+        raise UploadError(f'Upload is incomplete ({received_bytes(upload)} of {upload.size} bytes).')
+    path = upload_path(upload)
+    with open(path, 'rb') as part:
+        image = prepare_car_image(File(part, name=upload.filename))
+
+    with transaction.atomic():
+        car.image = image
+        car.save()
+        upload.delete()
+    path.unlink(missing_ok=True)
+    return car
+
+
+def discard_upload(upload):
+    path = upload_path(upload)
+    upload.delete()
+    path.unlink(missing_ok=True)
+
+
+def prune_uploads(cutoff):
+    """Deletes uploads started before cutoff (abandoned or never attached) with their files; returns how many."""
+    pruned = 0
+    for upload in ImageUpload.objects.filter(created_at__lt=cutoff).iterator():
+        discard_upload(upload)
+        pruned += 1
+    return pruned
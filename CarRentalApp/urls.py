@@ -8,6 +8,9 @@ urlpatterns = [
     path('cars/add/', views.car_create, name='car_create'),
     path('cars/<int:id>/edit/', views.car_update, name='car_update'),
     path('cars/<int:id>/delete/', views.car_delete, name='car_delete'),
+    path('uploads/', views.upload_create, name='upload_create'),
+    path('uploads/<uuid:upload_id>/', views.upload_detail, name='upload_detail'),
+    path('uploads/<uuid:upload_id>/attach/', views.upload_attach, name='upload_attach'),
     
     # Staff Request Management
     path('rentals/pending/', views.pending_requests_view, name='pending_requests'),
@@ -17,6 +20,12 @@ urlpatterns = [
     # NEW STAFF ACTIVE RENTALS MANAGEMENT 
     path('rentals/active/', views.active_rentals_view, name='active_rentals'), 
     path('rentals/complete/<int:transaction_id>/', views.request_complete, name='request_complete'),
+    path('rentals/events/', views.staff_queue_events, name='staff_queue_events'),
+    path('rentals/export/', views.rentals_export, name='rentals_export'),
+    path('payments/reconcile/', views.payments_reconcile, name='payments_reconcile'),
+    path('audit/<str:object_type>/<int:object_id>/', views.audit_trail, name='audit_trail'),
+    path('notifications/broadcast/', views.broadcast_create, name='broadcast_create'),
+    path('analytics/occupancy/', views.occupancy_analytics, name='occupancy_analytics'),
     
     # API ENDPOINTS FOR MOBILE APP
     path('api/cars/', views.api_car_list, name='api_car_list'),
@@ -1,13 +1,46 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib import messages
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction 
-from rest_framework.decorators import api_view
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.decorators import api_view, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Car, Customer, RentalTransaction, RentalRequest, Payment, Notification
-from .serializers import CarSerializer, CustomerSerializer, CustomerUpdateSerializer 
+from .models import Branch, Car, Customer, ImageUpload, RentalTransaction, RentalRequest, Payment, Notification, TableVersion, Broadcast
+from .serializers import CustomerSerializer, CustomerUpdateSerializer 
+from .fast_serializers import car_list_serializer
+from .projection import requested_fields
+from .batch import READ_METHODS, BatchError, parse_batch, run_batch
+from .availability import MAX_WINDOW_DAYS as CALENDAR_MAX_WINDOW_DAYS, blocked_ranges_between
+from .profiling import StageTimer
+from .statuses import InvalidTransition, transition
+from .images import prepare_car_image
+from .uploads import OffsetMismatch, UploadError, attach_upload, discard_upload, max_chunk_bytes, received_bytes, start_upload, write_chunk
+from .db_router import read_from_replica
+from .archive import EXPORT_HEADER, HISTORY_FIELDS, export_rows, rental_history
+from .broadcasts import send_broadcast
+from .changelog import FEED_TABLES, PUBLIC_FEED_TABLES, changes_after
+from .catalog import current_snapshot
+from .geo import nearest_available_cars, nearest_branches
+from . import audit
+from .live import LIVE_QUEUES, QueueStream, current_cursor
+from .reconciliation import RESULT_HEADER, Reconciliation, ReconciliationError
+from .throttling import ANONYMOUS_RATE_LIMIT_THROTTLES, RATE_LIMIT_THROTTLES
 from decimal import Decimal 
-from datetime import date 
+from datetime import date, datetime, timedelta
+import hashlib
+import csv
+import logging
+import io
+from itertools import chain, islice
+
+logger = logging.getLogger(__name__)
 
 # Simple check to see if the logged-in user is staff (required for admin views)
 def is_staff_user(user):
@@ -25,10 +58,12 @@ def pending_requests_view(request):
     Shows the staff a list of all rental requests waiting for approval.
     """
     # Grab all requests currently marked as 'PENDING'.
-    pending_requests = RentalRequest.objects.filter(status='PENDING').select_related('car', 'customer').order_by('pickup_date')
+    pending_requests = RentalRequest.objects.filter(status=RentalRequest.Status.PENDING).select_related('car', 'customer').order_by('pickup_date')
         
     context = {
-        'pending_requests': pending_requests
+        'pending_requests': pending_requests,
+        # The page's live stream picks up from here.
+        'change_cursor': current_cursor(),
     }
     
     return render(request, 'cars/car_pending.html', context)
@@ -42,54 +77,80 @@ def request_approve(request, request_id):
     and updates the car's status to 'RENTED'.
     """
     if request.method == "POST": 
-        # 1. Find the specific pending request.
-        rental_request = get_object_or_404(RentalRequest, id=request_id, status='PENDING')
-        car = rental_request.car 
-        
-        try:
-            # Calculate the total duration in days.
-            time_difference = rental_request.return_date - rental_request.pickup_date
-            days = time_difference.days
+        with StageTimer('request_approve', request_id=request_id) as timer:
+            # 1. Find the specific pending request.
+            with timer.stage('load_request'):
+                rental_request = get_object_or_404(
+                    RentalRequest.objects.select_related('car', 'customer'), id=request_id, status=RentalRequest.Status.PENDING
+                )
+                car = rental_request.car 
             
-            # Don't proceed if the dates are illogical (e.g., return before pickup).
-            if days <= 0:
-                print(f"Error: Invalid date range for Request ID {request_id}. Days: {days}")
-                return redirect('pending_requests')
-            
-            # Safely calculate the total cost using Decimal to avoid floating point errors.
-            rate = rental_request.car.rental_rate_per_day
-            total_cost = Decimal(days) * Decimal(rate)
+            with timer.stage('compute_cost'):
+                try:
+                    # Calculate the total duration in days.
+                    time_difference = rental_request.return_date - rental_request.pickup_date
+                    days = time_difference.days
+                    
+                    # Don't proceed if the dates are illogical (e.g., return before pickup).
+                    if days <= 0:
+                        logger.warning("Invalid date range for rental request %s (%s days); not approved.", request_id, days)
+                        timer.outcome = 'invalid_dates'
+                        return redirect('pending_requests')
+                    
+                    # Safely calculate the total cost using Decimal to avoid floating point errors.
+                    rate = rental_request.car.rental_rate_per_day
+                    total_cost = Decimal(days) * Decimal(rate)
+                    
+                except Exception:
+                    # If the calculation fails (e.g., rate is missing or badly formatted), log it and stop.
+                    logger.exception("Could not calculate the total cost for rental request %s.", request_id)
+                    timer.outcome = 'cost_error'
+                    return redirect('pending_requests')
+
+            # 2. Mark the original request as done/approved.
+            with timer.stage('approve_request'):
+                try:
+                    transition(rental_request, RentalRequest.Status.APPROVED)
+                except InvalidTransition as e:
+                    messages.error(request, e.messages[0])
+                    timer.outcome = 'invalid_transition'
+                    return redirect('pending_requests')
+                rental_request.save()
             
-        except Exception as e:
-            # If the calculation fails (e.g., rate is missing or badly formatted), log it and stop.
-            print(f"Transaction Calculation Error for Request ID {request_id}: {e}")
-            return redirect('pending_requests')
+            # 3. Create the official RentalTransaction record.
+            with timer.stage('create_transaction'):
+                rental = RentalTransaction.objects.create(
+                    car=car,
+                    customer=rental_request.customer,
+                    start_date=rental_request.pickup_date,
+                    end_date=rental_request.return_date,
+                    total_cost=total_cost, 
+                    status=RentalTransaction.Status.ONGOING
+                )
 
-        # 2. Mark the original request as done/approved.
-        rental_request.status = 'APPROVED'
-        rental_request.save()
-        
-        # 3. Create the official RentalTransaction record.
-        RentalTransaction.objects.create(
-            car=car,
-            customer=rental_request.customer,
-            start_date=rental_request.pickup_date,
-            end_date=rental_request.return_date,
-            total_cost=total_cost, 
-            status='Ongoing'
-        )
+            # 4. Take the car off the market by setting its status to Rented.
+            with timer.stage('update_car'):
+                try:
+                    transition(car, Car.Status.RENTED)
+                except InvalidTransition as e:
+                    # e.g. the car went into Maintenance after the request was made; undo steps 2 and 3.
+                    transaction.set_rollback(True)
+                    messages.error(request, e.messages[0])
+                    timer.outcome = 'invalid_transition'
+                    return redirect('pending_requests')
+                car.save()
+            
+            # 5. Create notification for customer
+            with timer.stage('notify'):
+                Notification.objects.create(
+                    customer=rental_request.customer,
+                    rental_request=rental_request,
+                    title='Rental Request Approved',
+                    message=f'Your rental request for {car.brand} {car.model} has been approved! Pickup date: {rental_request.pickup_date}.'
+                )
 
-        # 4. Take the car off the market by setting its status to Rented.
-        car.status = 'Rented' 
-        car.save()
-        
-        # 5. Create notification for customer
-        Notification.objects.create(
-            customer=rental_request.customer,
-            rental_request=rental_request,
-            title='Rental Request Approved',
-            message=f'Your rental request for {car.brand} {car.model} has been approved! Pickup date: {rental_request.pickup_date}.'
-        )
+            # 6. Audit trail (written in the background once the transaction commits).
+            audit.record('approve', rental_request, request.user, {'transaction_id': rental.id, 'total_cost': total_cost})
         
         return redirect('pending_requests') 
         
@@ -104,10 +165,12 @@ def request_reject(request, request_id):
     """
     if request.method == "POST":
         # 1. Get the pending request.
-        rental_request = get_object_or_404(RentalRequest, id=request_id, status='PENDING')
+        rental_request = get_object_or_404(
+            RentalRequest.objects.select_related('car', 'customer'), id=request_id, status=RentalRequest.Status.PENDING
+        )
         
         # 2. Mark the request as rejected.
-        rental_request.status = 'REJECTED'
+        transition(rental_request, RentalRequest.Status.REJECTED)
         rental_request.save()
         
         # 3. Create notification for customer
@@ -117,6 +180,7 @@ def request_reject(request, request_id):
             title='Rental Request Rejected',
             message=f'Your rental request for {rental_request.car.brand} {rental_request.car.model} has been rejected.'
         )
+        audit.record('reject', rental_request, request.user)
         
         return redirect('pending_requests')
         
@@ -132,16 +196,17 @@ def request_complete(request, transaction_id):
     """
     if request.method == "POST": 
         # Find the active transaction record.
-        rental = get_object_or_404(RentalTransaction, id=transaction_id, status='Ongoing')
+        rental = get_object_or_404(RentalTransaction.objects.select_related('car'), id=transaction_id, status=RentalTransaction.Status.ONGOING)
         
         # 1. Update the transaction status to Completed.
-        rental.status = 'Completed'
+        transition(rental, RentalTransaction.Status.COMPLETED)
         rental.save()
         
         # 2. Put the car back into the available pool.
         car = rental.car 
-        car.status = 'AVAILABLE' 
+        transition(car, Car.Status.AVAILABLE)
         car.save()
+        audit.record('complete', rental, request.user)
         
         return redirect('car_list') 
         
@@ -153,14 +218,148 @@ def active_rentals_view(request):
     """
     Staff view to list all current rentals (transactions marked 'ONGOING').
     """
-    active_rentals = RentalTransaction.objects.filter(status='Ongoing').select_related('car', 'customer').order_by('end_date')
+    active_rentals = RentalTransaction.objects.filter(status=RentalTransaction.Status.ONGOING).select_related('car', 'customer').order_by('end_date')
         
     context = {
-        'active_rentals': active_rentals
+        'active_rentals': active_rentals,
+        'change_cursor': current_cursor(),
     }
     
     return render(request, 'cars/car_active.html', context)
 
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+def staff_queue_events(request):
+    """
+    Server-Sent Events stream of changed cards for the pending or active page (?queue=pending|active),
+    starting after ?after= or, when the browser reconnects, after its Last-Event-ID.
+    """
+    queue = LIVE_QUEUES.get(request.GET.get('queue'))
+    if queue is None:
+        return JsonResponse({'error': f"'queue' must be one of: {', '.join(LIVE_QUEUES)}."}, status=400)
+    try:
+        cursor = int(request.headers.get('Last-Event-ID') or request.GET.get('after', 0))
+    except ValueError:
+        return JsonResponse({'error': "'after' must be an integer."}, status=400)
+
+    stream = QueueStream(queue, cursor, request)
+    # Under ASGI the stream sleeps between polls without tying up a thread.
+    events = stream.aevents() if isinstance(request, ASGIRequest) else stream.events()
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tells nginx not to buffer the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class _Echo:
+    # File-like object for csv.writer that hands each row back instead of buffering it.
+    def write(self, value):
+        return value
+
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+def rentals_export(request):
+    """
+    Streams every rental transaction, live and archived, as a CSV download.
+    """
+    writer = csv.writer(_Echo())
+    rows = (writer.writerow(row) for row in chain([EXPORT_HEADER], export_rows()))
+    response = StreamingHttpResponse(rows, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="rentals-{date.today().isoformat()}.csv"'
+    return response
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+@require_POST
+def payments_reconcile(request):
+    """
+    Reconciles an uploaded settlement CSV ('file', optional 'method', 'date_tolerance_days',
+    'amount_tolerance') against recorded payments and streams the result CSV back.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': "Upload the settlement CSV as 'file'."}, status=400)
+
+    # 1. Tolerances default to the RECONCILE_* settings.
+    try:
+        reconciliation = Reconciliation(
+            io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''),
+            method=request.POST.get('method') or None,
+            date_tolerance_days=request.POST.get('date_tolerance_days') or None,
+            amount_tolerance=request.POST.get('amount_tolerance') or None,
+        )
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc) if isinstance(exc, ReconciliationError) else 'Tolerances must be numbers.'}, status=400)
+
+    # 2. Read up to the first result so a file without the needed columns is a 400, not a broken download.
+    rows = reconciliation.rows()
+    try:
+        first = list(islice(rows, 1))
+    except (ReconciliationError, UnicodeDecodeError) as exc:
+        error = str(exc) if isinstance(exc, ReconciliationError) else 'Settlement file must be UTF-8 text.'
+        return JsonResponse({'error': error}, status=400)
+
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(row) for row in chain([RESULT_HEADER], first, rows))
+    response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="reconciliation-{date.today().isoformat()}.csv"'
+    return response
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+def audit_trail(request, object_type, object_id):
+    """
+    Who did what to one object (e.g. /cars/audit/car/12/), newest first; ?limit= caps the entries (default 100).
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return JsonResponse({'error': "'limit' must be an integer."}, status=400)
+    entries = audit.trail(object_type, object_id, limit)
+    return JsonResponse({'object_type': object_type, 'object_id': object_id, 'entries': entries})
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+@require_POST
+def broadcast_create(request):
+    """
+    Sends a fleet-wide announcement (title, message, segment) to every matching customer.
+    """
+    title = request.POST.get('title')
+    message = request.POST.get('message')
+    segment = request.POST.get('segment', 'all')
+
+    if not title or not message:
+        return JsonResponse({'error': 'title and message are required.'}, status=400)
+    if segment not in dict(Broadcast.SEGMENT_CHOICES):
+        return JsonResponse({'error': f"Unknown segment '{segment}'."}, status=400)
+
+    broadcast = send_broadcast(title, message, segment)
+    return JsonResponse({
+        'message': 'Broadcast sent.',
+        'broadcast_id': broadcast.id,
+        'recipient_count': broadcast.recipient_count
+    }, status=201)
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+def occupancy_analytics(request):
+    """
+    Fleet utilization (rented / maintenance / idle days) per car, per car type and per day.
+    Takes ?from=YYYY-MM-DD&to=YYYY-MM-DD; defaults to the last 30 days.
+    """
+    try:
+        end = datetime.strptime(request.GET['to'], '%Y-%m-%d').date() if request.GET.get('to') else date.today()
+        start = datetime.strptime(request.GET['from'], '%Y-%m-%d').date() if request.GET.get('from') else end - timedelta(days=29)
+        # Imported here so NumPy only loads for this staff report, not on every worker start.
+        from .analytics import fleet_occupancy
+        return JsonResponse(fleet_occupancy(start, end))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
 # --------------------------------------------------------------------------
 # CAR CRUD VIEWS (CREATE, READ, UPDATE, DELETE)
 # --------------------------------------------------------------------------
@@ -178,6 +377,7 @@ def car_list(request):
 def car_create(request):
     if not request.user.is_staff:
         return redirect('home')
+    branches = Branch.objects.order_by('name')
     
     # Process the form submission to add a new car.
     if request.method == "POST":
@@ -187,10 +387,24 @@ def car_create(request):
         year = request.POST.get("year")
         plate = request.POST.get("plate_number")
         type = request.POST.get("type")
-        status = request.POST.get("status")
         rate = request.POST.get("rental_rate_per_day")
         image = request.FILES.get("image")
 
+        # The form posts the status label; it is stored as its integer code.
+        try:
+            status = Car.Status.from_legacy(request.POST.get("status") or Car.Status.AVAILABLE)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return render(request, "cars/car_create.html", {"branches": branches}, status=400)
+
+        # Validate the photo and strip its metadata before anything is saved.
+        if image:
+            try:
+                image = prepare_car_image(image)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return render(request, "cars/car_create.html", {"branches": branches}, status=400)
+
         # New Car detail fields.
         seats = request.POST.get("seats")
         fuel_type = request.POST.get("fuel_type")
@@ -199,8 +413,17 @@ def car_create(request):
         engine_size = request.POST.get("engine_size")
         mileage = request.POST.get("mileage")
 
+        # Branch the car is kept at (optional).
+        branch = None
+        branch_id = request.POST.get("branch", "")
+        if branch_id:
+            branch = Branch.objects.filter(id=branch_id).first() if branch_id.isdigit() else None
+            if branch is None:
+                messages.error(request, "Unknown branch.")
+                return render(request, "cars/car_create.html", {"branches": branches}, status=400)
+
         # Create and save the new Car object in one step.
-        Car.objects.create(
+        car = Car.objects.create(
             brand=brand,
             model=model,
             year=year,
@@ -214,12 +437,14 @@ def car_create(request):
             transmission=transmission,
             color=color,
             engine_size=engine_size,
-            mileage=mileage
+            mileage=mileage,
+            branch=branch
         )
+        audit.record('create', car, request.user, audit.row(car))
 
         return redirect("car_list")
 
-    return render(request, "cars/car_create.html")
+    return render(request, "cars/car_create.html", {"branches": branches})
 
 
 @login_required(login_url='login')
@@ -228,18 +453,41 @@ def car_update(request, id):
     car = get_object_or_404(Car, id=id)
     if not request.user.is_staff:
         return redirect('home')
+    branches = Branch.objects.order_by('name')
 
     if request.method == "POST":
+        before = audit.snapshot(car)
+
+        # Validate a new photo (if any) before touching the car, so a rejected upload changes nothing.
+        image = request.FILES.get("image")
+        if image:
+            try:
+                image = prepare_car_image(image)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return render(request, "cars/car_update.html", {"car": car, "branches": branches}, status=400)
+
+        # Status changes go through the state machine (e.g. Maintenance can't jump straight to Rented).
+        try:
+            transition(car, request.POST.get("status") or car.status)
+        except InvalidTransition as e:
+            messages.error(request, e.messages[0])
+            return render(request, "cars/car_update.html", {"car": car, "branches": branches}, status=400)
+
+        branch = None
+        branch_id = request.POST.get("branch", "")
+        if branch_id:
+            branch = Branch.objects.filter(id=branch_id).first() if branch_id.isdigit() else None
+            if branch is None:
+                messages.error(request, "Unknown branch.")
+                return render(request, "cars/car_update.html", {"car": car, "branches": branches}, status=400)
+
         # Update fields with data from the submitted form.
         car.brand = request.POST.get("brand")
         car.model = request.POST.get("model")
         car.year = request.POST.get("year")
         car.plate_number = request.POST.get("plate_number")
         car.type = request.POST.get("type")
-        
-        # This line captures the new/current status from the form and fixes the defaulting issue.
-        car.status = request.POST.get("status") 
-        
         car.rental_rate_per_day = request.POST.get("rental_rate_per_day")
         
         # Update new detail fields.
@@ -249,18 +497,106 @@ def car_update(request, id):
         car.color = request.POST.get("color")
         car.engine_size = request.POST.get("engine_size")
         car.mileage = request.POST.get("mileage")
+        car.branch = branch
         
         # Handle image upload, if a new file was provided.
-        image = request.FILES.get("image")
         if image:
             car.image = image
         
         car.save()
+        audit.record('update', car, request.user, audit.diff(before, audit.snapshot(car)))
 
         return redirect("car_list")
 
     # Display the form pre-filled with the current car data.
-    return render(request, "cars/car_update.html", {"car": car})
+    return render(request, "cars/car_update.html", {"car": car, "branches": branches})
+
+
+def _upload_response(upload, offset, status=200):
+    response = JsonResponse({
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': offset,
+        'complete': upload.completed_at is not None,
+        'max_chunk_bytes': max_chunk_bytes(),
+    }, status=status)
+    response['Upload-Offset'] = str(offset)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+@require_POST
+def upload_create(request):
+    """
+    Starts a resumable car photo upload (filename, size and optionally sha256 of the whole file).
+    The chunks are then sent with PATCH to the returned upload's URL.
+    """
+    try:
+        upload = start_upload(request.user, request.POST.get('filename'), request.POST.get('size'), request.POST.get('sha256'))
+    except UploadError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    response = _upload_response(upload, 0, status=201)
+    response['Location'] = reverse('upload_detail', args=[upload.id])
+    return response
+
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def upload_detail(request, upload_id):
+    """
+    GET: how far the upload got. PATCH: the next chunk as the raw request body, with
+    Upload-Offset (where it starts) and Chunk-SHA256 headers. DELETE: abandons the upload.
+    """
+    upload = get_object_or_404(ImageUpload, id=upload_id, created_by=request.user)
+
+    if request.method == 'DELETE':
+        discard_upload(upload)
+        return JsonResponse({'message': 'Upload deleted.'})
+    if request.method != 'PATCH':
+        return _upload_response(upload, received_bytes(upload))
+
+    # The body is read from the request stream here, never buffered by Django's upload handlers.
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.headers.get('Content-Length', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Upload-Offset and Content-Length headers are required.'}, status=400)
+    try:
+        offset = write_chunk(upload, offset, request, length, request.headers.get('Chunk-SHA256'))
+    except OffsetMismatch as e:
+        response = JsonResponse({'error': e.messages[0], 'offset': e.offset}, status=409)
+        response['Upload-Offset'] = str(e.offset)
+        return response
+    except UploadError as e:
+        response = JsonResponse({'error': e.messages[0], 'offset': received_bytes(upload)}, status=400)
+        response['Upload-Offset'] = str(received_bytes(upload))
+        return response
+    return _upload_response(upload, offset)
+
+
+@login_required(login_url='login')
+@user_passes_test(is_staff_user)
+@require_POST
+def upload_attach(request, upload_id):
+    """
+    Sets a completed upload as a car's photo (car_id) after the usual image validation.
+    """
+    upload = get_object_or_404(ImageUpload, id=upload_id, created_by=request.user)
+    car_id = request.POST.get('car_id', '')
+    car = get_object_or_404(Car, id=car_id) if car_id.isdigit() else None
+    if car is None:
+        return JsonResponse({'error': 'car_id is required.'}, status=400)
+    before = audit.snapshot(car)
+    try:
+        attach_upload(upload, car)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    audit.record('update', car, request.user, audit.diff(before, audit.snapshot(car)))
+    return JsonResponse({'car_id': car.id, 'image': car.image.url})
 
 
 @login_required(login_url='login')
@@ -272,25 +608,248 @@ def car_delete(request, id):
 
     # Delete the car after confirmation.
     if request.method == "POST":
+        car_id, values = car.id, audit.row(car)
         car.delete()
+        audit.record('delete', car, request.user, values, object_id=car_id)
         return redirect("car_list")
 
     return render(request, "cars/car_delete.html", {"car": car})
 
 
+# --------------------------------------------------------------------------
+# CONDITIONAL GET HELPERS
+# List endpoints are validated against the TableVersion counter of their table,
+# so a 304 Not Modified costs one primary-key lookup and never reads the rows.
+# --------------------------------------------------------------------------
+
+def _table_state(request, table):
+    # Both validators need the same row, so it is read once per request.
+    cache = request.__dict__.setdefault('_table_versions', {})
+    if table not in cache:
+        cache[table] = TableVersion.current(table)
+    return cache[table]
+
+
+def _table_etag(table):
+    def etag_func(request, *args, **kwargs):
+        version, _ = _table_state(request, table)
+        # The query string is part of the ETag so different filters never share a validator.
+        query = hashlib.md5(request.META.get('QUERY_STRING', '').encode(), usedforsecurity=False).hexdigest()[:12]
+        return f"{table}-{version}-{query}"
+    return etag_func
+
+
+def _table_last_modified(table):
+    def last_modified_func(request, *args, **kwargs):
+        _, updated_at = _table_state(request, table)
+        return updated_at
+    return last_modified_func
+
+
 # --------------------------------------------------------------------------
 # MOBILE API VIEWS (Used by the mobile application)
 # --------------------------------------------------------------------------
 
+@read_from_replica
+@condition(etag_func=_table_etag('car'), last_modified_func=_table_last_modified('car'))
 @api_view(['GET'])
 def api_car_list(request):
     # Returns a list of all cars for the mobile app.
+    # Read-only list, so it skips the ModelSerializer and builds the same output from values_list() rows.
+    # ?fields= / ?exclude= narrow both the SELECT and the response.
+    try:
+        fields = requested_fields(request, car_list_serializer.field_names)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     cars = Car.objects.all()
-    serializer = CarSerializer(cars, many=True)
-    return Response(serializer.data)
+    return Response(car_list_serializer.serialize(cars, fields=fields))
+
+
+@api_view(['GET'])
+def api_car_calendar(request, car_id):
+    """
+    Blocked date ranges (inclusive) for one car, for the mobile date picker.
+    Takes ?from=YYYY-MM-DD&to=YYYY-MM-DD; defaults to today and the next 180 days.
+    """
+    car = Car.objects.filter(id=car_id).values('id', 'status').first()
+    if car is None:
+        return Response({'error': 'Car not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        start = datetime.strptime(request.GET['from'], '%Y-%m-%d').date() if request.GET.get('from') else timezone.localdate()
+        end = datetime.strptime(request.GET['to'], '%Y-%m-%d').date() if request.GET.get('to') else start + timedelta(days=180)
+    except ValueError:
+        return Response({'error': 'Dates must be in YYYY-MM-DD format.'}, status=status.HTTP_400_BAD_REQUEST)
+    if end < start:
+        return Response({'error': "'to' must be on or after 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= CALENDAR_MAX_WINDOW_DAYS:
+        return Response({
+            'error': f'The window can be at most {CALENDAR_MAX_WINDOW_DAYS} days.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Served from the per-car cache; bookings are only read after one of them changed.
+    blocked = blocked_ranges_between(car['id'], start, end)
+    return Response({
+        'car_id': car['id'],
+        'car_status': Car.Status(car['status']).legacy,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'blocked': [{'start': s.isoformat(), 'end': e.isoformat()} for s, e in blocked],
+    }, status=status.HTTP_200_OK)
+
+
+def _location_params(request, default_limit):
+    """Parses ?lat=&lng=&limit=&radius_km= for the nearest-* searches. Raises ValueError with a client-facing message."""
+    try:
+        lat = float(request.GET['lat'])
+        lng = float(request.GET['lng'])
+    except (KeyError, ValueError):
+        raise ValueError("'lat' and 'lng' are required and must be numbers.")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("'lat' must be within -90..90 and 'lng' within -180..180.")
+    try:
+        limit = int(request.GET.get('limit', default_limit))
+        radius_km = float(request.GET['radius_km']) if request.GET.get('radius_km') else None
+    except ValueError:
+        raise ValueError("'limit' must be an integer and 'radius_km' a number.")
+    max_results = getattr(settings, 'NEAREST_SEARCH_MAX_RESULTS', 50)
+    if not 1 <= limit <= max_results:
+        raise ValueError(f"'limit' must be between 1 and {max_results}.")
+    return lat, lng, limit, radius_km
+
+
+@api_view(['GET'])
+def api_nearest_branches(request):
+    """
+    Active branches closest to ?lat=&lng=, nearest first, each with distance_km.
+    Optional ?limit= (default 5) and ?radius_km=.
+    """
+    try:
+        lat, lng, limit, radius_km = _location_params(request, default_limit=5)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'branches': nearest_branches(lat, lng, limit, radius_km)}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def api_nearest_cars(request):
+    """
+    Available cars closest to ?lat=&lng=, nearest branch first; each car is shaped like
+    /api/cars/ plus distance_km and branch_name. Optional ?limit= (default 10), ?radius_km=,
+    ?type= and ?pickup_date=&return_date= (YYYY-MM-DD) to skip cars booked in that window.
+    """
+    # 1. Location and result size
+    try:
+        lat, lng, limit, radius_km = _location_params(request, default_limit=10)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # 2. Optional rental window
+    pickup = request.GET.get('pickup_date')
+    return_ = request.GET.get('return_date')
+    if bool(pickup) != bool(return_):
+        return Response({'error': "Send both 'pickup_date' and 'return_date', or neither."}, status=status.HTTP_400_BAD_REQUEST)
+    if pickup:
+        try:
+            pickup = datetime.strptime(pickup, '%Y-%m-%d').date()
+            return_ = datetime.strptime(return_, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'Dates must be in YYYY-MM-DD format.'}, status=status.HTTP_400_BAD_REQUEST)
+        if return_ < pickup:
+            return Response({'error': "'return_date' must be on or after 'pickup_date'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # 3. Search outwards from the customer
+    cars = nearest_available_cars(
+        lat, lng, limit, radius_km,
+        start=pickup or None, end=return_ or None, car_type=request.GET.get('type'), request=request,
+    )
+    return Response({'cars': cars}, status=status.HTTP_200_OK)
+
+
+def _catalog_etag(request, *args, **kwargs):
+    snapshot = current_snapshot()
+    return snapshot['version'] if snapshot else None
+
+
+CATALOG_VERSION_FIELDS = (
+    'version', 'url', 'sha256', 'bytes', 'car_count', 'thumbnail_count', 'change_cursor', 'built_at',
+)
+
+
+@condition(etag_func=_catalog_etag)
+@api_view(['GET'])
+def api_catalog_version(request):
+    """
+    Version and URL of the offline catalog bundle (see catalog.py). Only reads
+    latest.json, never the database; the app downloads the bundle when the version
+    differs from the one it has, then follows /api/changes/ from change_cursor.
+    """
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return Response({'error': 'No catalog snapshot has been built yet.'}, status=status.HTTP_404_NOT_FOUND)
+    response = Response({field: snapshot[field] for field in CATALOG_VERSION_FIELDS}, status=status.HTTP_200_OK)
+    response['Cache-Control'] = f"public, max-age={getattr(settings, 'CATALOG_VERSION_MAX_AGE', 60)}"
+    return response
+
+
+@read_from_replica
+@api_view(['GET'])
+def api_changes(request):
+    """
+    Change feed for cars, rental requests, rental transactions and payments, oldest first.
+    Takes ?after=<cursor> (0, the default, for everything still retained), ?tables=car,payment
+    and ?limit=. Pass the returned cursor as the next ?after= until has_more is false.
+    Only staff may read tables other than car.
+    """
+    # 1. Cursor and page size
+    try:
+        cursor = int(request.GET.get('after', 0))
+        limit = int(request.GET.get('limit', getattr(settings, 'CHANGE_FEED_PAGE_SIZE', 500)))
+    except ValueError:
+        return Response({'error': "'after' and 'limit' must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+    if cursor < 0 or limit < 1:
+        return Response({'error': "'after' must be 0 or more and 'limit' at least 1."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(limit, getattr(settings, 'CHANGE_FEED_MAX_PAGE_SIZE', 2000))
+
+    # 2. Tables the caller asked for and may read
+    allowed = FEED_TABLES if request.user.is_staff else PUBLIC_FEED_TABLES
+    tables = [name for name in request.GET.get('tables', '').split(',') if name] or list(allowed)
+    unknown = [name for name in tables if name not in FEED_TABLES]
+    if unknown:
+        return Response({
+            'error': f"Unknown tables: {', '.join(unknown)}. Available: {', '.join(FEED_TABLES)}."
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if any(name not in allowed for name in tables):
+        return Response({'error': 'Only staff can read these tables.'}, status=status.HTTP_403_FORBIDDEN)
+
+    # 3. One page of entries
+    changes, has_more = changes_after(cursor, tables, limit)
+    return Response({
+        'changes': changes,
+        'cursor': changes[-1]['cursor'] if changes else cursor,
+        'has_more': has_more,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+def api_batch(request):
+    """
+    Runs several API calls in one round trip (used by the mobile app at start-up).
+    Body: {"requests": [{"id": ..., "method": "GET", "path": "/api/cars/?fields=id,brand",
+    "body": {...}, "headers": {...}}, ...]}. Each result carries its own status code.
+    """
+    try:
+        items = parse_batch(request.data)
+    except BatchError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # A batch of reads must not pin the client to the primary database.
+    request._request.replica_pin_exempt = all(item['method'] in READ_METHODS for item in items)
+    return Response({'responses': run_batch(request._request, items)}, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
+@throttle_classes(RATE_LIMIT_THROTTLES)
 @transaction.atomic
 def api_submit_rental_request(request):
     """
@@ -346,7 +905,7 @@ def api_submit_rental_request(request):
             customer=customer,
             pickup_date=pickup_date,
             return_date=return_date,
-            status='PENDING' 
+            status=RentalRequest.Status.PENDING
         )
         
         return Response({
@@ -358,11 +917,12 @@ def api_submit_rental_request(request):
         return Response({'error': 'Car not found.'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         # Catch any other unexpected issues (e.g., date parsing errors).
-        print(f"Error submitting rental request: {e}")
+        logger.exception("Error submitting rental request.")
         return Response({'error': f'A server error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['POST'])
+@throttle_classes(RATE_LIMIT_THROTTLES)
 def api_customer_signup(request):
     """
     Handles creating a new customer account from the mobile app.
@@ -379,6 +939,7 @@ def api_customer_signup(request):
 
 
 @api_view(['POST'])
+@throttle_classes(RATE_LIMIT_THROTTLES)
 def api_customer_login(request):
     """
     Validates a customer's login using email and password.
@@ -430,9 +991,11 @@ def api_customer_update(request):
     except Customer.DoesNotExist:
         return Response({'error': 'Customer not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    before = audit.snapshot(customer)
     serializer = CustomerUpdateSerializer(customer, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
+        audit.record('update', customer, customer, audit.diff(before, audit.snapshot(customer)))
         return Response({'message': 'Profile updated successfully', 'customer': serializer.data}, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -443,6 +1006,7 @@ def api_customer_update(request):
 # --------------------------------------------------------------------------
 
 @api_view(['POST'])
+@throttle_classes(ANONYMOUS_RATE_LIMIT_THROTTLES)
 @transaction.atomic
 def api_submit_payment(request):
     """
@@ -453,6 +1017,7 @@ def api_submit_payment(request):
     transaction_id = data.get('transaction_id')
     amount_paid = data.get('amount_paid')
     method = data.get('method')  # Cash, GCash, Card, Check, etc.
+    reference = str(data.get('reference') or '')[:100]  # Processor reference, used by reconciliation.
     
     # Validate required fields
     if not all([transaction_id, amount_paid, method]):
@@ -480,7 +1045,8 @@ def api_submit_payment(request):
         payment = Payment.objects.create(
             transaction=rental_transaction,
             amount_paid=amount_decimal,
-            method=method
+            method=method,
+            reference=reference
         )
         
         return Response({
@@ -488,6 +1054,7 @@ def api_submit_payment(request):
             'payment_id': payment.id,
             'amount_paid': str(payment.amount_paid),
             'method': payment.method,
+            'reference': payment.reference,
             'payment_date': payment.payment_date.isoformat()
         }, status=status.HTTP_201_CREATED)
         
@@ -496,7 +1063,7 @@ def api_submit_payment(request):
             'error': 'Rental transaction not found.'
         }, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        print(f"Error processing payment: {e}")
+        logger.exception("Error processing payment.")
         return Response({
             'error': f'A server error occurred: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -515,104 +1082,163 @@ def api_create_rental_transaction(request):
     pickup_date = data.get('pickup_date')
     return_date = data.get('return_date')
     
-    print(f"DEBUG: Received data: car_id={car_id}, customer_data={customer_data}, pickup={pickup_date}, return={return_date}")
-    
-    # Validate required fields
-    if not all([car_id, customer_data, pickup_date, return_date, 
-                customer_data.get('license_number'), customer_data.get('email')]):
-        print(f"DEBUG: Validation failed - car_id: {car_id}, license: {customer_data.get('license_number')}, email: {customer_data.get('email')}")
-        return Response({
-            'error': 'Missing required fields for rental transaction.'
-        }, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        # Get the car
-        car = Car.objects.get(id=car_id)
+    with StageTimer('api_create_rental_transaction', car_id=car_id) as timer:
+        # Customer details stay out of the logs; only which fields arrived is recorded.
+        logger.debug(
+            "Rental transaction data: car_id=%s pickup=%s return=%s customer_fields=%s",
+            car_id, pickup_date, return_date, sorted(customer_data),
+        )
         
-        email = customer_data.get('email')
-        license_number = customer_data.get('license_number')
-
-        # Find or Create the Customer
-        try:
-            customer = Customer.objects.get(email=email)
-            customer.license_number = license_number
-            customer.first_name = customer_data.get('first_name', customer.first_name)
-            customer.last_name = customer_data.get('last_name', customer.last_name)
-            customer.phone = customer_data.get('phone', customer.phone)
-            customer.address = customer_data.get('address', customer.address)
-            customer.save()
-        except Customer.DoesNotExist:
-            customer = Customer.objects.create(
-                license_number=license_number,
-                first_name=customer_data.get('first_name'),
-                last_name=customer_data.get('last_name'),
-                email=customer_data.get('email'),
-                phone=customer_data.get('phone'),
-                address=customer_data.get('address'),
-                password='changepassword123',
-            )
+        # Validate required fields
+        if not all([car_id, customer_data, pickup_date, return_date, 
+                    customer_data.get('license_number'), customer_data.get('email')]):
+            logger.debug("Rental transaction validation failed: missing required fields.")
+            timer.outcome = 'invalid'
+            return Response({
+                'error': 'Missing required fields for rental transaction.'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate total cost
         try:
-            from datetime import datetime
-            start = datetime.strptime(pickup_date, '%Y-%m-%d').date()
-            end = datetime.strptime(return_date, '%Y-%m-%d').date()
-            days = (end - start).days
+            # Get the car
+            with timer.stage('load_car'):
+                car = Car.objects.get(id=car_id)
             
-            if days <= 0:
-                return Response({
-                    'error': 'Return date must be after pickup date.'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            total_cost = Decimal(days) * Decimal(car.rental_rate_per_day)
+            email = customer_data.get('email')
+            license_number = customer_data.get('license_number')
+
+            # Find or Create the Customer
+            with timer.stage('upsert_customer'):
+                try:
+                    customer = Customer.objects.get(email=email)
+                    customer.license_number = license_number
+                    customer.first_name = customer_data.get('first_name', customer.first_name)
+                    customer.last_name = customer_data.get('last_name', customer.last_name)
+                    customer.phone = customer_data.get('phone', customer.phone)
+                    customer.address = customer_data.get('address', customer.address)
+                    customer.save()
+                except Customer.DoesNotExist:
+                    customer = Customer.objects.create(
+                        license_number=license_number,
+                        first_name=customer_data.get('first_name'),
+                        last_name=customer_data.get('last_name'),
+                        email=customer_data.get('email'),
+                        phone=customer_data.get('phone'),
+                        address=customer_data.get('address'),
+                        password='changepassword123',
+                    )
+
+            # Calculate total cost
+            with timer.stage('compute_cost'):
+                try:
+                    start = datetime.strptime(pickup_date, '%Y-%m-%d').date()
+                    end = datetime.strptime(return_date, '%Y-%m-%d').date()
+                    days = (end - start).days
+                    
+                    if days <= 0:
+                        timer.outcome = 'invalid_dates'
+                        return Response({
+                            'error': 'Return date must be after pickup date.'
+                        }, status=status.HTTP_400_BAD_REQUEST)
+                    
+                    total_cost = Decimal(days) * Decimal(car.rental_rate_per_day)
+                except Exception as e:
+                    timer.outcome = 'cost_error'
+                    return Response({
+                        'error': f'Error calculating rental cost: {str(e)}'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Create a pending RentalRequest so staff can see it
+            with timer.stage('create_request'):
+                rental_request = RentalRequest.objects.create(
+                    car=car,
+                    customer=customer,
+                    pickup_date=start,
+                    return_date=end,
+                    status=RentalRequest.Status.PENDING
+                )
+
+            # Create the RentalTransaction
+            with timer.stage('create_transaction'):
+                rental_transaction = RentalTransaction.objects.create(
+                    car=car,
+                    customer=customer,
+                    start_date=start,
+                    end_date=end,
+                    total_cost=total_cost,
+                    status=RentalTransaction.Status.ONGOING
+                )
+
+            return Response({
+                'message': 'Rental transaction created successfully.',
+                'transaction_id': rental_transaction.id,
+                'rental_request_id': rental_request.id,
+                'total_cost': str(rental_transaction.total_cost),
+                'car_id': car.id,
+                'customer_id': customer.id
+            }, status=status.HTTP_201_CREATED)
+
+        except Car.DoesNotExist:
+            timer.outcome = 'car_not_found'
+            return Response({
+                'error': 'Car not found.'
+            }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
+            logger.exception("Error creating rental transaction.")
+            timer.outcome = 'error'
             return Response({
-                'error': f'Error calculating rental cost: {str(e)}'
-            }, status=status.HTTP_400_BAD_REQUEST)
+                'error': f'A server error occurred: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Create a pending RentalRequest so staff can see it
-        rental_request = RentalRequest.objects.create(
-            car=car,
-            customer=customer,
-            pickup_date=start,
-            return_date=end,
-            status='PENDING'
-        )
 
-        # Create the RentalTransaction
-        rental_transaction = RentalTransaction.objects.create(
-            car=car,
-            customer=customer,
-            start_date=start,
-            end_date=end,
-            total_cost=total_cost,
-            status='Ongoing'
-        )
+@read_from_replica
+@api_view(['GET'])
+def api_rental_history(request):
+    """
+    Get a customer's rental history by email, including archived rentals and their payments.
+    """
+    email = request.GET.get('email')
 
+    if not email:
         return Response({
-            'message': 'Rental transaction created successfully.',
-            'transaction_id': rental_transaction.id,
-            'rental_request_id': rental_request.id,
-            'total_cost': str(rental_transaction.total_cost),
-            'car_id': car.id,
-            'customer_id': customer.id
-        }, status=status.HTTP_201_CREATED)
+            'error': 'Email parameter is required.'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    except Car.DoesNotExist:
+    try:
+        fields = requested_fields(request, HISTORY_FIELDS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        customer = Customer.objects.get(email=email)
+    except Customer.DoesNotExist:
         return Response({
-            'error': 'Car not found.'
+            'error': 'Customer not found.'
         }, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        print(f"Error creating rental transaction: {e}")
-        return Response({
-            'error': f'A server error occurred: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        'rentals': rental_history(customer, fields)
+    }, status=status.HTTP_200_OK)
 
 
 # --------------------------------------------------------------------------
 # NOTIFICATION API VIEWS
 # --------------------------------------------------------------------------
 
+# Response field -> ORM lookup, in response order.
+NOTIFICATION_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'message': 'message',
+    'is_read': 'is_read',
+    'created_at': 'created_at',
+    'car_brand': 'rental_request__car__brand',
+    'car_model': 'rental_request__car__model',
+    'request_status': 'rental_request__status',
+}
+
+
+@read_from_replica
+@condition(etag_func=_table_etag('notification'), last_modified_func=_table_last_modified('notification'))
 @api_view(['GET'])
 def api_get_notifications(request):
     """
@@ -625,21 +1251,28 @@ def api_get_notifications(request):
             'error': 'Email parameter is required.'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    try:
+        fields = requested_fields(request, NOTIFICATION_FIELDS)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
         customer = Customer.objects.get(email=email)
-        notifications = Notification.objects.filter(customer=customer).select_related('rental_request', 'rental_request__car')
-        
-        notifications_data = [{
-            'id': notif.id,
-            'title': notif.title,
-            'message': notif.message,
-            'is_read': notif.is_read,
-            'created_at': notif.created_at.isoformat(),
-            'car_brand': notif.rental_request.car.brand,
-            'car_model': notif.rental_request.car.model,
-            'request_status': notif.rental_request.status,
-        } for notif in notifications]
-        
+        notifications = Notification.objects.filter(customer=customer)
+
+        # values_list() only joins rental_request/car when one of their fields is selected.
+        # Broadcast notifications have no rental request, so their car fields come back as None.
+        rows = notifications.values_list(*(NOTIFICATION_FIELDS[name] for name in fields))
+        notifications_data = [dict(zip(fields, row)) for row in rows]
+        if 'created_at' in fields:
+            for notif in notifications_data:
+                notif['created_at'] = notif['created_at'].isoformat()
+        if 'request_status' in fields:
+            # Sent as the legacy upper-case name ('PENDING'), as before statuses became integer codes.
+            for notif in notifications_data:
+                if notif['request_status'] is not None:
+                    notif['request_status'] = RentalRequest.Status(notif['request_status']).legacy
+
         return Response({
             'notifications': notifications_data,
             'unread_count': notifications.filter(is_read=False).count()
@@ -678,6 +1311,31 @@ def api_mark_notification_read(request):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+def api_mark_all_notifications_read(request):
+    """
+    Mark all of a customer's notifications as read in a single UPDATE.
+    """
+    email = request.data.get('email')
+
+    if not email:
+        return Response({
+            'error': 'email is required.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    updated = Notification.objects.filter(customer__email=email, is_read=False).update(
+        is_read=True, updated_at=timezone.now()
+    )
+    if updated:
+        # update() skips post_save, so bump the notifications version for conditional GETs here.
+        TableVersion.bump('notification')
+
+    return Response({
+        'message': 'Notifications marked as read.',
+        'updated': updated
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['DELETE'])
 def api_delete_notification(request):
     """
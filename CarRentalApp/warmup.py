@@ -0,0 +1,108 @@
+import inspect
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+from rest_framework import serializers as drf_serializers
+
+# --------------------------------------------------------------------------
+# WORKER WARM-UP
+# A fresh worker pays for template compilation, URL resolver population,
+# serializer field introspection and cold catalog caches on its first
+# requests. warm_up() does that work up front; it runs from wsgi.py/asgi.py
+# when WARMUP_ON_STARTUP is set and from `manage.py warmup`.
+# --------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates():
+    """Loads every project template so the cached loader holds them compiled. Returns the count."""
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.engine.dirs:
+            root = Path(directory)
+            for path in sorted(root.rglob('*.html')):
+                engine.get_template(path.relative_to(root).as_posix())
+                count += 1
+    return count
+
+
+def populate_url_resolver():
+    """Builds the resolver's reverse and namespace maps. Returns the number of named routes."""
+    resolver = get_resolver()
+    # reverse_dict populates the whole tree, including included URLconfs.
+    return sum(1 for key in resolver.reverse_dict if isinstance(key, str))
+
+
+def build_serializer_fields():
+    """Builds the field maps of every serializer in the app and the fast list converters. Returns the count."""
+    from . import serializers
+    from .fast_serializers import car_list_serializer
+
+    count = 0
+    for _, serializer_class in inspect.getmembers(serializers, inspect.isclass):
+        if issubclass(serializer_class, drf_serializers.BaseSerializer) and serializer_class.__module__ == serializers.__name__:
+            serializer_class().fields
+            count += 1
+    car_list_serializer._converters
+    return count
+
+
+def prime_catalog():
+    """
+    Serializes the car catalog once: runs the list queries through the fast
+    converters and fills the media storage's image fingerprint cache. Returns
+    the number of cars.
+    """
+    from .fast_serializers import car_list_serializer
+    from .models import Car, TableVersion
+
+    TableVersion.current('car')
+    return len(car_list_serializer.serialize(Car.objects.all()))
+
+
+WARMUP_STEPS = [
+    ('templates', compile_templates),
+    ('url resolver', populate_url_resolver),
+    ('serializers', build_serializer_fields),
+    ('catalog', prime_catalog),
+]
+
+
+def warm_up():
+    """Runs every warm-up step. Returns a list of (step, items, seconds); failed steps report items=None."""
+    results = []
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            items = step()
+        except Exception:
+            # A cold cache is only slower, so a failing step must never stop the worker from starting.
+            logger.exception('Warm-up step %r failed', name)
+            items = None
+        results.append((name, items, time.perf_counter() - start))
+    return results
+
+
+def warm_up_on_startup():
+    """Called by the WSGI/ASGI entry points once the application is loaded."""
+    if not getattr(settings, 'WARMUP_ON_STARTUP', False):
+        return
+    try:
+        results = warm_up()
+    finally:
+        # Don't hand this thread's connection to workers forked from a preloaded app.
+        connections.close_all()
+    logger.info(
+        'Worker warm-up finished in %.3fs (%s)',
+        sum(seconds for _, _, seconds in results),
+        ', '.join(f'{name}: {seconds:.3f}s' for name, _, seconds in results),
+    )
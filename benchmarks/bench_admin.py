@@ -0,0 +1,88 @@
+"""
+Admin change list and change form timings as the tables grow. With the
+estimated-count paginator, list_select_related and raw-id inputs, query
+counts and times should stay flat from the small to the large dataset.
+
+    python -m benchmarks.bench_admin [--sizes 1000,50000]
+"""
+import argparse
+from datetime import date, timedelta
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_cars, create_customers
+
+PAGES = [
+    ('customer list', '/admin/CarRentalApp/customer/'),
+    ('customer search', '/admin/CarRentalApp/customer/?q={email}'),
+    ('transaction list', '/admin/CarRentalApp/rentaltransaction/'),
+    ('transaction by year', '/admin/CarRentalApp/rentaltransaction/?end_date__year={year}'),
+    ('transaction form', '/admin/CarRentalApp/rentaltransaction/{transaction_id}/change/'),
+    ('payment list', '/admin/CarRentalApp/payment/'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,50000', help="Comma-separated row counts per table.")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from decimal import Decimal
+
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+
+    from CarRentalApp.models import Payment, RentalTransaction
+
+    rows = []
+    with test_database():
+        cars = create_cars(2000)
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        client = Client()
+        client.login(username='admin', password='admin')
+        existing = 0
+        # The dataset grows in place from one size to the next.
+        for size in sorted(int(value) for value in args.sizes.split(',')):
+            customers = create_customers(size - existing, prefix=f'size{size}-')
+            RentalTransaction.objects.bulk_create(
+                [
+                    RentalTransaction(
+                        car=cars[i % len(cars)], customer=customer,
+                        start_date=date(2024, 1, 1) + timedelta(days=i % 700),
+                        end_date=date(2024, 1, 4) + timedelta(days=i % 700),
+                        total_cost=Decimal('4500.00'), status=RentalTransaction.Status.COMPLETED,
+                    )
+                    for i, customer in enumerate(customers)
+                ],
+                batch_size=2000,
+            )
+            Payment.objects.bulk_create(
+                [
+                    Payment(transaction_id=transaction_id, amount_paid=Decimal('4500.00'), method='Cash')
+                    for transaction_id in RentalTransaction.objects.filter(customer__in=customers).values_list('id', flat=True)
+                ],
+                batch_size=2000,
+            )
+            existing = size
+            context = {
+                'year': 2024,
+                'transaction_id': RentalTransaction.objects.order_by('id').values_list('id', flat=True).last(),
+                'email': customers[0].email,
+            }
+
+            for label, url in PAGES:
+                url = url.format(**context)
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *rest: queries.append(sql) or execute(sql, *rest)):
+                    response = client.get(url)
+                assert response.status_code == 200, (url, response.status_code)
+                elapsed = best_time(lambda: client.get(url), args.repeat)
+                rows.append([size, label, len(queries), f'{elapsed * 1000:.1f}'])
+
+    print_table(['rows', 'page', 'queries', 'request_ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares the mobile start-up calls (car list, notifications, login) made as
+separate requests with the same calls sent through /api/batch/, sequential
+and with concurrent reads. --rtt-ms adds a simulated network round trip per
+HTTP request, which is what batching actually saves on mobile links.
+
+    python -m benchmarks.bench_batch [--cars 2000] [--rtt-ms 150]
+"""
+import argparse
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_cars, create_customers, create_notifications
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cars', type=int, default=2000)
+    parser.add_argument('--notifications', type=int, default=200)
+    parser.add_argument('--rtt-ms', type=float, default=150.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    with test_database():
+        cars = create_cars(args.cars)
+        customer = create_customers(1)[0]
+        create_notifications(customer, cars, args.notifications)
+        type(customer).objects.filter(pk=customer.pk).update(password='password123')
+
+        login = {'email': customer.email, 'password': 'password123'}
+        startup = [
+            {'id': 'cars', 'path': '/api/cars/?fields=id,brand,model,rental_rate_per_day,image'},
+            {'id': 'notifications', 'path': f'/api/notifications/?email={customer.email}'},
+            {'id': 'profile', 'path': f'/api/rentals/history/?email={customer.email}'},
+            {'id': 'login', 'method': 'POST', 'path': '/api/customers/login/', 'body': login},
+        ]
+        client = Client()
+
+        def separate():
+            for item in startup:
+                if item.get('method') == 'POST':
+                    client.post(item['path'], item['body'], content_type='application/json')
+                else:
+                    client.get(item['path'], HTTP_ACCEPT='application/json')
+
+        def batched():
+            response = client.post('/api/batch/', {'requests': startup}, content_type='application/json')
+            assert all(result['status'] == 200 for result in response.json()['responses']), response.content
+
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            rows = [['separate requests', len(startup), best_time(separate, args.repeat)]]
+            with override_settings(API_BATCH_MAX_WORKERS=1):
+                rows.append(['batch, sequential', 1, best_time(batched, args.repeat)])
+            rows.append(['batch, concurrent reads', 1, best_time(batched, args.repeat)])
+
+    print_table(
+        ['mode', 'round_trips', 'server_ms', f'with_{args.rtt_ms:g}ms_rtt'],
+        [[mode, trips, f'{elapsed * 1000:.1f}', f'{elapsed * 1000 + trips * args.rtt_ms:.1f}']
+         for mode, trips, elapsed in rows],
+    )
+
+
+if __name__ == '__main__':
+    main()
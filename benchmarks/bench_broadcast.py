@@ -0,0 +1,37 @@
+"""
+Time to fan a broadcast out to N customers (chunked INSERT ... SELECT).
+
+    python -m benchmarks.bench_broadcast [--customers 100000] [--chunk-size 5000]
+"""
+import argparse
+import time
+
+from benchmarks.common import print_table, setup_django, test_database
+from benchmarks.fixtures import create_customers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, nargs='+', default=[5000, 20000])
+    args = parser.parse_args()
+
+    setup_django()
+    from CarRentalApp.broadcasts import send_broadcast
+    from CarRentalApp.models import Notification
+
+    rows = []
+    with test_database():
+        create_customers(args.customers)
+        for chunk_size in args.chunk_size:
+            Notification.objects.all().delete()
+            start = time.perf_counter()
+            broadcast = send_broadcast('Service notice', 'Branch systems are back online.', chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+            rows.append([broadcast.recipient_count, chunk_size, f'{elapsed:.2f}', f'{broadcast.recipient_count / elapsed:.0f}'])
+
+    print_table(['recipients', 'chunk_size', 'seconds', 'rows_per_s'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares a fresh install fetching the catalog live (/api/cars/) with the
+offline bundle path: the version check plus one download of the pre-built,
+gzipped bundle (served from a file, no database reads).
+
+    python -m benchmarks.bench_catalog [--cars 5000]
+"""
+import argparse
+import tempfile
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_cars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cars', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from CarRentalApp.catalog import build_catalog_snapshot
+
+    with test_database(), tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+        create_cars(args.cars)
+        build_time = best_time(lambda: build_catalog_snapshot(force=True), 1)
+        pointer, _ = build_catalog_snapshot()
+        client = Client()
+
+        def fetch(url, **headers):
+            response = client.get(url, **headers)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            return response, body
+
+        cases = [
+            ('live list', '/api/cars/', {}),
+            ('live list, gzip', '/api/cars/', {'HTTP_ACCEPT_ENCODING': 'gzip'}),
+            ('version check', '/api/catalog/version/', {}),
+            ('bundle download', pointer['url'], {}),
+        ]
+        rows = []
+        for label, url, headers in cases:
+            response, body = fetch(url, **headers)
+            assert response.status_code == 200, body[:200]
+            # Counted with an execute wrapper: the query log is reset at every request start.
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *rest: queries.append(sql) or execute(sql, *rest)):
+                fetch(url, **headers)
+            elapsed = best_time(lambda: fetch(url, **headers), args.repeat)
+            rows.append([label, len(body), len(queries), f'{elapsed * 1000:.1f}'])
+
+    print_table(['request', 'bytes on the wire', 'queries', 'request_ms'], rows)
+    print(f"\nBuilding the bundle for {args.cars} cars took {build_time * 1000:.0f} ms.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Media-serving throughput: django.views.static.serve (the old DEBUG-only path)
+against CarRentalApp.media.serve_media for full downloads, byte ranges,
+conditional revalidation and X-Accel-Redirect offload.
+
+    python -m benchmarks.bench_media [--requests 300]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.common import print_table, setup_django
+
+
+def consume(response):
+    # Drain the body the way a WSGI server would.
+    if response.streaming:
+        total = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        total = len(response.content)
+    response.close()
+    return total
+
+
+def throughput(view, make_request, path, count):
+    start = time.perf_counter()
+    total = 0
+    for _ in range(count):
+        total += consume(view(make_request(), path))
+    elapsed = time.perf_counter() - start
+    return count / elapsed, total / elapsed / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.files.storage import default_storage
+    from django.test import RequestFactory, override_settings
+    from django.views.static import serve
+
+    from CarRentalApp.media import serve_media
+
+    names = sorted(os.listdir(os.path.join(settings.MEDIA_ROOT, 'cars')))
+    path = 'cars/' + max(names, key=lambda n: os.path.getsize(os.path.join(settings.MEDIA_ROOT, 'cars', n)))
+    url = default_storage.url(path)
+    etag = f'"{default_storage.fingerprint(path)}"'
+    factory = RequestFactory()
+
+    def static_serve(request, path):
+        return serve(request, path, document_root=settings.MEDIA_ROOT)
+
+    cases = [
+        ('static.serve full', static_serve, lambda: factory.get(url)),
+        ('serve_media full', serve_media, lambda: factory.get(url)),
+        ('serve_media range 64KiB', serve_media, lambda: factory.get(url, HTTP_RANGE='bytes=0-65535')),
+        ('serve_media 304 (ETag)', serve_media, lambda: factory.get(url, HTTP_IF_NONE_MATCH=etag)),
+    ]
+
+    rows = []
+    for label, view, make_request in cases:
+        rps, mib = throughput(view, make_request, path, args.requests)
+        rows.append([label, f'{rps:.0f}', f'{mib:.1f}'])
+
+    with override_settings(MEDIA_SENDFILE_MODE='x-accel-redirect'):
+        rps, mib = throughput(serve_media, lambda: factory.get(url), path, args.requests)
+        rows.append(['serve_media x-accel-redirect', f'{rps:.0f}', f'{mib:.1f}'])
+
+    print(f'file: {path} ({os.path.getsize(os.path.join(settings.MEDIA_ROOT, path))} bytes)')
+    print_table(['case', 'req_per_s', 'MiB_per_s'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Nearest branch / nearest available car search as the number of branches and
+the fleet grow: the grid index in CarRentalApp.geo against a scan that
+computes the distance to every branch, and the full /api/cars/nearest/
+request (index lookup plus the car queries for the nearest branches).
+
+    python -m benchmarks.bench_nearest [--sizes 100,1000,10000] [--cars-per-branch 20]
+"""
+import argparse
+import random
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_branches
+
+QUERY_POINTS = 200
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='100,1000,10000', help="Comma-separated branch counts.")
+    parser.add_argument('--cars-per-branch', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from decimal import Decimal
+
+    from django.db import connection
+    from django.test import Client
+
+    from CarRentalApp.geo import GridIndex, branch_index, haversine_km
+    from CarRentalApp.models import Branch, Car, TableVersion
+
+    rng = random.Random(1)
+    points = [(rng.uniform(14.0, 18.0), rng.uniform(120.0, 122.0)) for _ in range(QUERY_POINTS)]
+
+    rows = []
+    with test_database():
+        for size in (int(value) for value in args.sizes.split(',')):
+            # Start each size from empty tables (bulk_create'd rows have no signals or change log to undo).
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {Car._meta.db_table}')
+                cursor.execute(f'DELETE FROM {Branch._meta.db_table}')
+            branches = create_branches(size)
+            Car.objects.bulk_create(
+                [
+                    Car(
+                        brand='Toyota', model='Vios', year=2022, plate_number=f'PLT-{i:07d}', type='Sedan',
+                        # Most cars are out, so the search has to look past the nearest branches.
+                        status=Car.Status.AVAILABLE if i % 10 == 0 else Car.Status.RENTED,
+                        rental_rate_per_day=Decimal('1500.00'), branch=branches[i % size],
+                    )
+                    for i in range(size * args.cars_per_branch)
+                ],
+                batch_size=2000,
+            )
+            TableVersion.bump('branch')
+            coordinates = list(Branch.objects.values_list('id', 'latitude', 'longitude'))
+
+            def scan():
+                for lat, lng in points:
+                    sorted((haversine_km(lat, lng, b_lat, b_lng), b_id) for b_id, b_lat, b_lng in coordinates)[:5]
+
+            index = GridIndex(coordinates, 0.1)
+
+            def grid():
+                for lat, lng in points:
+                    nearest = index.nearest(lat, lng)
+                    [next(nearest) for _ in range(5)]
+
+            build = best_time(lambda: GridIndex(coordinates, 0.1), 1)
+            branch_index()
+            client = Client()
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *rest: queries.append(sql) or execute(sql, *rest)):
+                response = client.get(f'/api/cars/nearest/?lat={points[0][0]}&lng={points[0][1]}&limit=10')
+            assert response.status_code == 200 and len(response.json()['cars']) == 10, response.content[:200]
+
+            def api():
+                for lat, lng in points[:20]:
+                    client.get(f'/api/cars/nearest/?lat={lat}&lng={lng}&limit=10')
+
+            rows.append([
+                size,
+                size * args.cars_per_branch,
+                f'{build * 1000:.1f}',
+                f'{best_time(scan, args.repeat) / QUERY_POINTS * 1000:.3f}',
+                f'{best_time(grid, args.repeat) / QUERY_POINTS * 1000:.3f}',
+                f'{best_time(api, args.repeat) / 20 * 1000:.2f}',
+                len(queries),
+            ])
+
+    print_table(
+        ['branches', 'cars', 'index_build_ms', 'scan_top5_ms', 'grid_top5_ms', 'api_nearest_cars_ms', 'api_queries'],
+        rows,
+    )
+
+
+if __name__ == '__main__':
+    main()
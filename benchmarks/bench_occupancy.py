@@ -0,0 +1,93 @@
+"""
+Occupancy matrix painting for a large fleet: vectorized difference-array
+painting against a per-rental Python loop, plus the full fleet_occupancy()
+call (database load included) on a smaller fleet.
+
+    python -m benchmarks.bench_occupancy [--cars 10000] [--rentals-per-car 20]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+
+
+def synthetic_intervals(cars, rentals_per_car, origin, days, seed=7):
+    rng = random.Random(seed)
+    car_ids, starts, ends = [], [], []
+    for car_id in range(1, cars + 1):
+        for _ in range(rentals_per_car):
+            start = origin + timedelta(days=rng.randrange(-10, days))
+            car_ids.append(car_id)
+            starts.append(start)
+            ends.append(start + timedelta(days=rng.randrange(1, 15)))
+    return np.array(car_ids, dtype=np.int64), starts, ends
+
+
+def loop_matrix(car_ids, interval_car_ids, starts, ends, origin, days):
+    rented = np.zeros((len(car_ids), days), dtype=bool)
+    row_of = {car_id: row for row, car_id in enumerate(car_ids.tolist())}
+    for car_id, start, end in zip(interval_car_ids.tolist(), starts, ends):
+        first = max((start - origin).days, 0)
+        last = min((end - origin).days, days)
+        for day in range(first, last):
+            rented[row_of[car_id], day] = True
+    return rented
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cars', type=int, default=10000)
+    parser.add_argument('--rentals-per-car', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--db-cars', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from CarRentalApp.analytics import fleet_occupancy, occupancy_matrix
+
+    origin = date(2025, 1, 1)
+    car_ids = np.arange(1, args.cars + 1, dtype=np.int64)
+    interval_car_ids, starts, ends = synthetic_intervals(args.cars, args.rentals_per_car, origin, args.days)
+
+    vectorized = occupancy_matrix(car_ids, interval_car_ids, starts, ends, origin, args.days)
+    assert (vectorized == loop_matrix(car_ids, interval_car_ids, starts, ends, origin, args.days)).all()
+
+    rows = [
+        [f'paint {args.cars} cars x {args.days} days, {len(starts)} rentals', 'numpy',
+         f"{best_time(lambda: occupancy_matrix(car_ids, interval_car_ids, starts, ends, origin, args.days), 3):.3f}"],
+        ['', 'python loop',
+         f"{best_time(lambda: loop_matrix(car_ids, interval_car_ids, starts, ends, origin, args.days), 1):.3f}"],
+    ]
+
+    with test_database():
+        from benchmarks.fixtures import create_cars, create_customers
+        from CarRentalApp.models import RentalTransaction
+
+        cars = create_cars(args.db_cars)
+        customer = create_customers(1)[0]
+        db_car_ids, db_starts, db_ends = synthetic_intervals(len(cars), args.rentals_per_car, origin, args.days)
+        RentalTransaction.objects.bulk_create(
+            [
+                RentalTransaction(
+                    car=cars[car_id - 1], customer=customer, start_date=start, end_date=end,
+                    total_cost=0, status=RentalTransaction.Status.COMPLETED,
+                )
+                for car_id, start, end in zip(db_car_ids.tolist(), db_starts, db_ends)
+            ],
+            batch_size=1000,
+        )
+        end = origin + timedelta(days=args.days - 1)
+        start_time = time.perf_counter()
+        fleet_occupancy(origin, end)
+        rows.append([f'fleet_occupancy() {args.db_cars} cars, {len(db_starts)} rentals from DB', 'numpy',
+                     f'{time.perf_counter() - start_time:.3f}'])
+
+    print_table(['case', 'method', 'seconds'], rows)
+
+
+if __name__ == '__main__':
+    main()
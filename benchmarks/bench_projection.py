@@ -0,0 +1,60 @@
+"""
+Reports payload size and request time of the list endpoints for the field
+sets the mobile screens actually use (?fields= / ?exclude=) against the
+full response.
+
+    python -m benchmarks.bench_projection [--cars 5000] [--notifications 500]
+"""
+import argparse
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_cars, create_customers, create_notifications
+
+CAR_FIELD_SETS = [
+    ('all fields', ''),
+    ('catalog card', '?fields=id,brand,model,rental_rate_per_day,image'),
+    ('availability', '?fields=id,status'),
+    ('no specs', '?exclude=engine_size,mileage,color,seats,fuel_type,transmission'),
+]
+
+NOTIFICATION_FIELD_SETS = [
+    ('all fields', ''),
+    ('badge list', '&fields=id,title,is_read,created_at'),
+    ('no car details', '&exclude=car_brand,car_model,request_status'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cars', type=int, default=5000)
+    parser.add_argument('--notifications', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+
+    with test_database():
+        cars = create_cars(args.cars)
+        customer = create_customers(1)[0]
+        create_notifications(customer, cars, args.notifications)
+
+        cases = [('api_car_list', label, f'/api/cars/{query}') for label, query in CAR_FIELD_SETS]
+        cases += [
+            ('api_get_notifications', label, f'/api/notifications/?email={customer.email}{query}')
+            for label, query in NOTIFICATION_FIELD_SETS
+        ]
+        client = Client()
+
+        rows = []
+        for endpoint, label, url in cases:
+            response = client.get(url, HTTP_ACCEPT='application/json')
+            assert response.status_code == 200, response.content
+            elapsed = best_time(lambda: client.get(url, HTTP_ACCEPT='application/json'), args.repeat)
+            rows.append([endpoint, label, len(response.content), f'{elapsed * 1000:.1f}'])
+
+    print_table(['endpoint', 'field set', 'bytes', 'request_ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
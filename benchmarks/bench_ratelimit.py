@@ -0,0 +1,88 @@
+"""
+Overhead of the shared token-bucket rate limiter: raw consume() latency,
+throughput with several worker processes hitting the same SQLite store, and
+the end-to-end cost on api_customer_login with limiting on and off.
+
+    python -m benchmarks.bench_ratelimit [--checks 20000] [--processes 4]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+
+
+def _worker(path, checks, results):
+    from CarRentalApp.throttling import TokenBucketStore
+
+    store = TokenBucketStore(path)
+    start = time.perf_counter()
+    for i in range(checks):
+        store.consume(f'bench:ip:10.0.{i % 50}.{os.getpid() % 250}', 100, 10)
+    results.put(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--checks', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client, override_settings
+
+    from CarRentalApp.throttling import TokenBucketStore
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ratelimit.sqlite3')
+
+        # 1. Single-process consume() latency, allowed and rejected paths.
+        store = TokenBucketStore(path)
+        allowed = best_time(lambda: [store.consume(f'bench:{i}', 10**9, 1) for i in range(args.checks)], 3)
+        rejected = best_time(lambda: [store.consume('bench:empty', 1, 1e-9) for _ in range(args.checks)], 3)
+        rows.append(['consume() allowed', 1, f'{allowed / args.checks * 1e6:.1f}', f'{args.checks / allowed:.0f}'])
+        rows.append(['consume() rejected', 1, f'{rejected / args.checks * 1e6:.1f}', f'{args.checks / rejected:.0f}'])
+
+        # 2. Several processes sharing the store.
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(path, args.checks, results))
+            for _ in range(args.processes)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - start
+        total = args.checks * args.processes
+        rows.append(['consume() shared', args.processes, f'{wall / total * 1e6:.1f}', f'{total / wall:.0f}'])
+
+        # 3. End to end on the login endpoint.
+        with test_database():
+            client = Client()
+            body = {'email': 'nobody@example.com', 'password': 'x'}
+            rates = {'endpoint': '1000000/s', 'ip': '1000000/s', 'email': '1000000/s'}
+            for enabled in (False, True):
+                with override_settings(
+                    RATE_LIMIT_ENABLED=enabled,
+                    RATE_LIMIT_DB=path,
+                    REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': rates},
+                ):
+                    elapsed = best_time(
+                        lambda: [client.post('/api/customers/login/', body, content_type='application/json')
+                                 for _ in range(args.requests)],
+                        3,
+                    )
+                label = 'login request, limiter on' if enabled else 'login request, limiter off'
+                rows.append([label, 1, f'{elapsed / args.requests * 1e6:.1f}', f'{args.requests / elapsed:.0f}'])
+
+    print_table(['case', 'processes', 'us_per_op', 'ops_per_s'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Reports bytes on the wire and render time for api_car_list and
+api_get_notifications, comparing DRF's JSONRenderer with FastJSONRenderer
+and identity / gzip / Brotli content encodings.
+
+    python -m benchmarks.bench_responses [--cars 5000] [--notifications 500]
+"""
+import argparse
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_cars, create_customers, create_notifications
+
+ENCODINGS = [('identity', ''), ('gzip', 'gzip'), ('br', 'br')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cars', type=int, default=5000)
+    parser.add_argument('--notifications', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from rest_framework.renderers import JSONRenderer
+
+    from CarRentalApp.middleware import brotli
+    from CarRentalApp.renderers import FastJSONRenderer, orjson
+
+    with test_database():
+        cars = create_cars(args.cars)
+        customer = create_customers(1)[0]
+        create_notifications(customer, cars, args.notifications)
+
+        endpoints = [
+            ('api_car_list', '/api/cars/'),
+            ('api_get_notifications', f'/api/notifications/?email={customer.email}'),
+        ]
+        client = Client()
+
+        render_rows = []
+        wire_rows = []
+        for name, url in endpoints:
+            data = client.get(url, HTTP_ACCEPT='application/json').json()
+            stock = best_time(lambda: JSONRenderer().render(data), args.repeat)
+            fast = best_time(lambda: FastJSONRenderer().render(data), args.repeat)
+            assert JSONRenderer().render(data) == FastJSONRenderer().render(data)
+            render_rows.append([name, f'{stock * 1000:.2f}', f'{fast * 1000:.2f}', f'{stock / fast:.1f}x'])
+
+            for label, accept_encoding in ENCODINGS:
+                if label == 'br' and brotli is None:
+                    wire_rows.append([name, label, 'brotli not installed', '', ''])
+                    continue
+                response = client.get(url, HTTP_ACCEPT='application/json', HTTP_ACCEPT_ENCODING=accept_encoding)
+                elapsed = best_time(
+                    lambda: client.get(url, HTTP_ACCEPT='application/json', HTTP_ACCEPT_ENCODING=accept_encoding),
+                    args.repeat,
+                )
+                wire_rows.append([
+                    name,
+                    label,
+                    len(response.content),
+                    response.get('Content-Encoding', '-'),
+                    f'{elapsed * 1000:.1f}',
+                ])
+
+    print(f'orjson: {"yes" if orjson else "no (stock json fallback)"}')
+    print_table(['endpoint', 'drf_render_ms', 'fast_render_ms', 'speedup'], render_rows)
+    print()
+    print_table(['endpoint', 'accept', 'bytes', 'content_encoding', 'request_ms'], wire_rows)
+
+
+if __name__ == '__main__':
+    main()
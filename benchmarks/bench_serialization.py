@@ -0,0 +1,43 @@
+"""
+Compares CarSerializer (DRF ModelSerializer) with the values_list() fast path
+used by api_car_list, at 1k, 10k and 100k cars.
+
+    python -m benchmarks.bench_serialization [--sizes 1000 10000 100000]
+"""
+import argparse
+
+from benchmarks.common import best_time, print_table, setup_django, test_database
+from benchmarks.fixtures import create_cars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from CarRentalApp.fast_serializers import car_list_serializer
+    from CarRentalApp.models import Car
+    from CarRentalApp.serializers import CarSerializer
+
+    rows = []
+    with test_database():
+        for size in args.sizes:
+            Car.objects.all().delete()
+            create_cars(size)
+            queryset = Car.objects.all()
+
+            drf_output = CarSerializer(queryset.all(), many=True).data
+            fast_output = car_list_serializer.serialize(queryset.all())
+            assert [dict(row) for row in drf_output] == fast_output, 'fast path output differs from CarSerializer'
+
+            drf = best_time(lambda: CarSerializer(queryset.all(), many=True).data, args.repeat)
+            fast = best_time(lambda: car_list_serializer.serialize(queryset.all()), args.repeat)
+            rows.append([size, f'{drf * 1000:.1f}', f'{fast * 1000:.1f}', f'{drf / fast:.1f}x'])
+
+    print_table(['rows', 'drf_ms', 'fast_ms', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
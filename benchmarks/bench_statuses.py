@@ -0,0 +1,97 @@
+"""
+Legacy string status columns against small-integer status codes on a
+rental-transaction-shaped table: index size (from SQLite's dbstat) and the
+time of the hot filters. The legacy column needs a case-insensitive match
+because of the mixed spellings ('Ongoing' / 'ONGOING'), which no plain
+index can serve; the exact-spelling filter is fast but misses rows.
+
+    python -m benchmarks.bench_statuses [--rows 500000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.common import best_time, print_table
+
+LEGACY = ['Ongoing', 'Completed', 'Cancelled']
+# Mostly finished rentals with a small ongoing tail, as in a real fleet; some rows use the old upper-case spelling.
+WEIGHTS = [3, 90, 7]
+
+
+def build(connection, rows):
+    connection.executescript("""
+        CREATE TABLE legacy (id INTEGER PRIMARY KEY, car_id INTEGER, end_date TEXT, status VARCHAR(20));
+        CREATE TABLE coded (id INTEGER PRIMARY KEY, car_id INTEGER, end_date TEXT, status SMALLINT);
+    """)
+    rng = random.Random(3)
+    origin = date(2020, 1, 1)
+    data = []
+    for i in range(rows):
+        code = rng.choices(range(3), WEIGHTS)[0]
+        legacy = LEGACY[code].upper() if rng.random() < 0.2 else LEGACY[code]
+        data.append((i + 1, rng.randrange(5000), (origin + timedelta(days=rng.randrange(2000))).isoformat(), legacy, code + 1))
+    connection.executemany('INSERT INTO legacy VALUES (?, ?, ?, ?)', [(i, c, d, s) for i, c, d, s, _ in data])
+    connection.executemany('INSERT INTO coded VALUES (?, ?, ?, ?)', [(i, c, d, s) for i, c, d, _, s in data])
+    connection.executescript("""
+        CREATE INDEX legacy_status_end ON legacy (status, end_date);
+        CREATE INDEX coded_status_end ON coded (status, end_date);
+        ANALYZE;
+    """)
+    connection.commit()
+
+
+def size(connection, name):
+    return connection.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = ?', (name,)).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'statuses.sqlite3'))
+        build(connection, args.rows)
+
+        def run(sql):
+            return lambda: connection.execute(sql).fetchall()
+
+        queries = [
+            ('active rentals (legacy, any spelling)',
+             "SELECT id FROM legacy WHERE lower(status) = 'ongoing' ORDER BY end_date"),
+            ('active rentals (legacy, exact spelling)',
+             "SELECT id FROM legacy WHERE status = 'Ongoing' ORDER BY end_date"),
+            ('active rentals (integer code)',
+             "SELECT id FROM coded WHERE status = 1 ORDER BY end_date"),
+            ('finished count (legacy, any spelling)',
+             "SELECT COUNT(*) FROM legacy WHERE lower(status) IN ('completed', 'cancelled')"),
+            ('finished count (integer code)',
+             "SELECT COUNT(*) FROM coded WHERE status IN (2, 3)"),
+        ]
+        query_rows = []
+        for label, sql in queries:
+            plan = ' / '.join(row[-1] for row in connection.execute('EXPLAIN QUERY PLAN ' + sql))
+            result = connection.execute(sql).fetchall()
+            matched = result[0][0] if 'COUNT' in sql else len(result)
+            query_rows.append([label, matched, f'{best_time(run(sql), args.repeat) * 1000:.1f}', plan])
+
+        size_rows = [
+            ['table (legacy)', size(connection, 'legacy')],
+            ['table (integer)', size(connection, 'coded')],
+            ['status+end_date index (legacy)', size(connection, 'legacy_status_end')],
+            ['status+end_date index (integer)', size(connection, 'coded_status_end')],
+        ]
+        connection.close()
+
+    print(f'{args.rows} rows')
+    print_table(['object', 'bytes'], size_rows)
+    print()
+    print_table(['query', 'rows', 'ms', 'plan'], query_rows)
+
+
+if __name__ == '__main__':
+    main()
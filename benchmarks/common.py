@@ -0,0 +1,64 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+Each script is run directly from the project root, e.g.
+
+    python -m benchmarks.bench_serialization
+
+and works against a throwaway test database, never db.sqlite3.
+"""
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Configures Django with the project settings so the app's models can be used."""
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CarRental.settings')
+
+    import django
+    django.setup()
+
+    # 4xx responses are expected in some benchmarks; don't let their log lines skew the timings.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+
+@contextmanager
+def test_database():
+    """Creates a migrated in-memory test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def best_time(func, repeat=5):
+    """Runs func() repeat times and returns the fastest wall-clock time in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def print_table(headers, rows):
+    """Prints rows as a plain, left-aligned text table."""
+    rows = [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(str(h)), *(len(r[i]) for r in rows)) for i, h in enumerate(headers)]
+    print('  '.join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in rows:
+        print('  '.join(cell.ljust(w) for cell, w in zip(row, widths)))
@@ -0,0 +1,100 @@
+"""Bulk fixture builders shared by the benchmark scripts."""
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+def create_cars(count, status=None):
+    from CarRentalApp.models import Car
+
+    status = Car.Status.AVAILABLE if status is None else Car.Status.from_legacy(status)
+    Car.objects.bulk_create(
+        [
+            Car(
+                brand='Toyota',
+                model=f'Model {i % 50}',
+                year=2015 + i % 10,
+                plate_number=f'PLT-{i:07d}',
+                type=('Sedan', 'SUV', 'Van')[i % 3],
+                status=status,
+                rental_rate_per_day=Decimal('1500.00') + i % 7,
+                image=f'cars/toyota-raize-front-angle-low-view-{i % 200}.avif' if i % 4 else '',
+                engine_size='1.5L' if i % 2 else None,
+                mileage=i * 13,
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+    return list(Car.objects.order_by('id'))
+
+
+def create_branches(count, seed=0):
+    """Creates count branches spread over Luzon, in a fixed pseudo-random layout."""
+    import random
+
+    from CarRentalApp.models import Branch
+
+    rng = random.Random(seed)
+    Branch.objects.bulk_create(
+        [
+            Branch(
+                name=f'Branch {i}',
+                address=f'{i} Rizal Avenue',
+                latitude=rng.uniform(13.5, 18.5),
+                longitude=rng.uniform(119.8, 122.5),
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+    return list(Branch.objects.order_by('id'))
+
+
+def create_customers(count, prefix='customer'):
+    from CarRentalApp.models import Customer
+
+    Customer.objects.bulk_create(
+        [
+            Customer(
+                first_name='Juan',
+                last_name=f'Dela Cruz {i}',
+                email=f'{prefix}{i}@example.com',
+                phone='09170000000',
+                address='Manila',
+                license_number=f'{prefix.upper()}-LIC-{i:07d}',
+            )
+            for i in range(count)
+        ],
+        batch_size=1000,
+    )
+    return list(Customer.objects.filter(email__startswith=prefix).order_by('id'))
+
+
+def create_notifications(customer, cars, count):
+    """Creates count approved requests for customer, each with one notification."""
+    from CarRentalApp.models import Notification, RentalRequest
+
+    pickup = date.today()
+    requests = RentalRequest.objects.bulk_create(
+        [
+            RentalRequest(
+                car=cars[i % len(cars)],
+                customer=customer,
+                pickup_date=pickup + timedelta(days=i),
+                return_date=pickup + timedelta(days=i + 3),
+                status=RentalRequest.Status.APPROVED,
+            )
+            for i in range(count)
+        ]
+    )
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                customer=customer,
+                rental_request=rental_request,
+                title='Rental Request Approved',
+                message=f'Your rental request has been approved! Pickup date: {rental_request.pickup_date}.',
+            )
+            for rental_request in requests
+        ]
+    )